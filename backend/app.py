@@ -3,12 +3,21 @@ EagleEye Flask Backend Application
 Main Flask application with all the core functionality
 """
 
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Blueprint, current_app, has_app_context, request, jsonify, send_file, send_from_directory
 from flask_cors import CORS 
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from flask_socketio import SocketIO, emit
+from sqlalchemy import tuple_, func
+from sqlalchemy.orm import Session
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, get_jwt
+from flask_socketio import SocketIO, emit, join_room
+from werkzeug.local import LocalProxy
+import base64
+import importlib
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
 import sys
 from datetime import datetime, timedelta, timezone
 from flask import Flask, render_template_string
@@ -26,50 +35,222 @@ except ImportError:
         SECRET_KEY = 'your-secret-key-change-this'
         SQLALCHEMY_DATABASE_URI = 'sqlite:///eagleeye.db'
         SQLALCHEMY_TRACK_MODIFICATIONS = False
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 10,
+            'pool_recycle': 3600,
+            'connect_args': {'check_same_thread': False, 'timeout': 5},
+        }
+        SQLITE_PRAGMAS = None  # None applies utils.database.SQLITE_PRAGMAS (WAL, synchronous=NORMAL, ...)
+        DB_BATCH_FLUSH_INTERVAL = 0.5  # seconds between batched progress writes
+        COMPRESSION = {
+            'min_size': 1024,  # bytes; smaller bodies are sent as-is
+            'gzip_level': 6,
+            'brotli_quality': 4,
+            'zstd_level': 3,
+            'algorithms': ['zstd', 'br', 'gzip'],  # server preference, unavailable codecs are skipped
+        }
+        # Cross-process state for multi-worker mode (serve.py sets both to SQLite files)
+        SHARED_STATE_URL = os.environ.get('EAGLEEYE_SHARED_STATE', 'memory://')  # or sqlite:///path
+        SOCKETIO_MESSAGE_QUEUE = os.environ.get('EAGLEEYE_MESSAGE_QUEUE')  # sqlite:///path or redis://...
+        MSGPACK_RESPONSES = True  # answer Accept: application/msgpack when msgpack is installed
         JWT_SECRET_KEY = 'jwt-secret-string-change-this'
         JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
+        JWT_DENYLIST_PATH = 'token_denylist.db'  # None keeps revocations in memory only
+        ADMISSION_CONTROL = {'enabled': True, 'concurrency': 4, 'queue_size': 32, 'queue_timeout': 10.0}
+        ADMIN_USERS = [name for name in os.environ.get('EAGLEEYE_ADMIN_USERS', '').split(',') if name]
+        PROFILER = {
+            'max_seconds': 60,  # longest on-demand profile from /api/admin/profile
+            'slow_request_threshold': 2.0,  # seconds; None turns slow-request capture off
+            'slow_request_interval': 0.02,  # seconds between stack samples of in-flight requests
+            'slow_request_keep': 50,  # slow-request reports kept, oldest dropped first
+        }
+        DOWNLOADS_PAGE_MAX = 100
+        DASHBOARD_DEADLINES = {'default': 1.0, 'popular': 3.0}  # seconds per part of /api/dashboard
+        DASHBOARD_RECENT_DOWNLOADS = 5
+        RATE_LIMITS = {
+            'anonymous': {'rate': 0.2, 'burst': 5},  # expensive routes, per client address
+            'user': {'rate': 1.0, 'burst': 10},  # expensive routes, per user
+            'auth': {'rate': 0.1, 'burst': 10},  # login/register, per address and per account
+        }
         UPLOAD_FOLDER = 'downloads'
+        TORRENT_PROVIDERS = ['1337x', 'apibay']
+        TORRENT_SEARCH_DEADLINE = 8
+        TORRENT_MIRRORS = {
+            '1337x': ['https://www.1337x.to', 'https://1337x.st', 'https://x1337x.ws', 'https://x1337x.eu']
+        }
+        TORRENT_INDEX_PATH = 'torrent_index.db'
+        TORRENT_SEEDER_HALF_LIFE = 86400
+        # Index rows not seen by any scrape for this many seconds are pruned; None keeps them forever
+        TORRENT_INDEX_MAX_AGE = 30 * 86400
+        TORRENT_LOCAL_FIRST = False
+        QBITTORRENT_HOST = os.environ.get('EAGLEEYE_QBITTORRENT_HOST', 'http://localhost:8080')
+        QBITTORRENT_USERNAME = 'admin'
+        QBITTORRENT_PASSWORD = 'adminadmin'
+        QBITTORRENT_POLL_INTERVAL = 1.0
+        UPSTREAM_CIRCUIT_BREAKER = {'failure_threshold': 5, 'reset_timeout': 30}
+        UPSTREAM_CONCURRENCY = {'initial': 8, 'max_limit': 32, 'latency_target': 3.0}
+        # Record upstream HTTP (torrent sites, yt-dlp) to a cassette file, or replay it without the network
+        HTTP_CASSETTE = {
+            'path': os.environ.get('EAGLEEYE_CASSETTE'),  # None leaves upstream HTTP alone
+            'mode': os.environ.get('EAGLEEYE_CASSETTE_MODE', 'replay'),  # or 'record'
+            'latency': float(os.environ.get('EAGLEEYE_CASSETTE_LATENCY', 0)),  # 1 replays the recorded latencies
+        }
+        USER_STORE = 'sqlite'  # or 'json' for the legacy users_data.json file
+        USER_DB_PATH = 'users.db'
+        USERS_JSON_PATH = 'users_data.json'
+        USER_LOGIN_FLUSH_INTERVAL = 5.0  # seconds between write-behind last_login flushes
+        PASSWORD_HASH_METHOD = 'scrypt'  # or 'pbkdf2'
+        PASSWORD_HASH_COST = 32768  # scrypt N, or pbkdf2 iterations
+        PASSWORD_HASH_WORKERS = None  # hashing processes, defaults to the CPU count
 
     config = {'development': Config, 'default': Config}
 
 # Import our custom modules
 try:
-    from services.youtube_service import YouTubeService
-    from services.torrent_service import TorrentService
     from services.auth_service import AuthService
-    from services.media_service import MediaService
-    from utils.helpers import create_response, ensure_directory
+    from services.user_store import create_user_store
+    from utils.passwords import PasswordHasher
+    from services.token_denylist import TokenDenylist
+    from utils.admission import AdmissionControl
+    from utils.database import BatchWriter, enable_sqlite_pragmas
+    from utils.compression import Compression
+    from utils.json_provider import FastJSONProvider
+    from utils.fanout import gather
+    from utils.shared_state import create_shared_state
+    from utils.message_queue import message_queue_options
+    from utils.registry import ServiceRegistry
+    from utils import metrics
+    from utils.profiler import RequestProfiler, format_collapsed
+    from utils import cassette
+    from utils.helpers import (
+        create_response, ensure_directory, encode_cursor, decode_cursor,
+        parse_fields, select_fields, select_result_fields
+    )
+    from utils.resilience import configure as configure_upstream
 except ImportError as e:
     print(f"Warning: Could not import some services: {e}")
     # Create dummy classes for missing services
-    class YouTubeService:
-        def search_videos(self, query, limit=20):
-            return {'success': False, 'error': 'Service not available'}
-        def download_video(self, data, user_id):
-            return {'success': False, 'error': 'Service not available'}
-        def get_video_info(self, url):
-            return {'success': False, 'error': 'Service not available'}
+    def configure_upstream(breaker=None, limiter=None):
+        pass
 
-    class TorrentService:
-        def search_torrents(self, query):
-            return {'success': False, 'error': 'Service not available'}
-        def get_popular_torrents(self, category):
-            return {'success': False, 'error': 'Service not available'}
-        def launch_qbittorrent(self):
-            return {'success': False, 'error': 'Service not available'}
+    def create_user_store(*args, **kwargs):
+        return None
+
+    def PasswordHasher(*args, **kwargs):
+        return None
+
+    class TokenDenylist:
+        def __init__(self, *args, **kwargs):
+            pass
+        def revoke(self, jti, expires_at=None):
+            pass
+        def revoke_all(self, username, before=None):
+            pass
+        def is_revoked(self, payload):
+            return False
+
+    class AdmissionControl:
+        def __init__(self, *args, **kwargs):
+            pass
+        def init_app(self, app):
+            pass
+        def guard(self, kind):
+            return lambda view: view
+
+    def enable_sqlite_pragmas(engine, pragmas=None):
+        pass
+
+    class Compression:
+        def __init__(self, app=None, **kwargs):
+            pass
+
+    from flask.json.provider import DefaultJSONProvider as FastJSONProvider
+
+    def create_shared_state(url=None):
+        return None
+
+    def message_queue_options(url):
+        return {}
+
+    class metrics:
+        CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+        @staticmethod
+        def init_app(app):
+            pass
+        @staticmethod
+        def instrument_sqlalchemy(session_class):
+            pass
+        @staticmethod
+        def instrument_socketio(socketio):
+            pass
+        @staticmethod
+        def render():
+            return ''
+
+    class RequestProfiler:
+        def __init__(self, app=None, **kwargs):
+            self.profiling = threading.Lock()
+        def profile(self, seconds, interval=0.005, all_threads=False, route=None):
+            return {}, {}
+        def slow_requests(self):
+            return []
+        def slow_request(self, report_id):
+            return None
+
+    def format_collapsed(stacks):
+        return ''
+
+    class cassette:
+        @staticmethod
+        def init_app(app):
+            pass
+
+    class ServiceRegistry:
+        def __init__(self, app, factories):
+            self.app, self.factories, self.instances = app, factories, {}
+        def get(self, name):
+            if name not in self.instances:
+                self.instances[name] = self.factories[name](self.app)
+            return self.instances[name]
+        def built(self, name):
+            return self.instances.get(name)
+
+    def gather(executor, parts, deadlines=None, default_deadline=2.0, context=None):
+        results = {}
+        for name, func in parts.items():
+            try:
+                with context():
+                    results[name] = {'status': 'ok', 'data': func(), 'elapsed_ms': None}
+            except Exception as e:
+                results[name] = {'status': 'error', 'error': str(e), 'elapsed_ms': None}
+        return results
+
+    class BatchWriter:
+        def __init__(self, app, db, flush_interval=0.5):
+            self.app, self.db = app, db
+        def update(self, model, pk, **values):
+            with self.app.app_context():
+                model.query.filter_by(id=pk).update(values)
+                self.db.session.commit()
+        def flush(self):
+            return 0
+        def close(self):
+            pass
 
     class AuthService:
+        def __init__(self, *args, **kwargs):
+            pass
         def register_user(self, data):
             return {'success': False, 'error': 'Service not available'}
         def login_user(self, data):
             return {'success': False, 'error': 'Service not available'}
         def get_user_profile(self, username):
             return {'success': False, 'error': 'Service not available'}
-
-    class MediaService:
-        def stream_media(self, data):
-            return {'success': False, 'error': 'Service not available'}
-        def get_video_formats(self, url):
+        def get_user_profile_with_etag(self, username):
+            return {'success': False, 'error': 'Service not available'}, None
+        def update_user_profile(self, username, profile_data):
             return {'success': False, 'error': 'Service not available'}
 
     def create_response(success=True, data=None, message=None, error=None, status_code=200):
@@ -86,30 +267,246 @@ except ImportError as e:
         if not os.path.exists(path):
             os.makedirs(path, exist_ok=True)
 
+    def encode_cursor(state):
+        return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+    def decode_cursor(cursor):
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except Exception:
+            return None
+
+    def parse_fields(value):
+        return None
+
+    def select_fields(item, fields, keep=('success', 'error')):
+        return item
+
+    def select_result_fields(result, fields, key='results'):
+        return result
+
+# Stand-ins for services whose modules (or their yt-dlp, cloudscraper, bs4 imports) are missing
+class UnavailableYouTubeService:
+    def __init__(self, *args, **kwargs):
+        pass
+    def search_videos(self, query, limit=20, fields=None):
+        return {'success': False, 'error': 'Service not available'}
+    def download_video(self, data, user_id):
+        return {'success': False, 'error': 'Service not available'}
+    def get_video_info(self, url, fields=None):
+        return {'success': False, 'error': 'Service not available'}
+
+class UnavailableTorrentService:
+    def __init__(self, *args, **kwargs):
+        pass
+    def search_torrents(self, query, page=1, local_first=False):
+        return {'success': False, 'error': 'Service not available'}
+    def browse_torrents(self, query, **kwargs):
+        return {'success': False, 'error': 'Service not available'}
+    def get_popular_torrents(self, category):
+        return {'success': False, 'error': 'Service not available'}
+    def launch_qbittorrent(self):
+        return {'success': False, 'error': 'Service not available'}
+    def add_torrents_to_qbittorrent(self, magnet_links, **kwargs):
+        return {'success': False, 'error': 'Service not available'}
+    def get_upstream_status(self):
+        return {'success': False, 'error': 'Service not available'}
+
+class UnavailableMediaService:
+    def stream_media(self, data):
+        return {'success': False, 'error': 'Service not available'}
+    def get_video_formats(self, url):
+        return {'success': False, 'error': 'Service not available'}
+
+def unavailable(*args, **kwargs):
+    return None
+
+def load_service(module, name, fallback):
+    """Import a service class on first use, so its heavy dependencies load only then"""
+    try:
+        return getattr(importlib.import_module(module), name)
+    except ImportError as e:
+        print(f"Warning: Could not import {name}: {e}")
+        return fallback
+
+# Extensions and routes are declared once here and bound to each app by create_app()
+db = SQLAlchemy()
+jwt = JWTManager()
+socketio = SocketIO()
+# Rate limits and a bounded queue in front of yt-dlp extraction and login/register
+admission = AdmissionControl()
+api = Blueprint('api', __name__)
+
+# Service factories, each run once per app on first use
+def build_youtube_service(app):
+    YouTubeService = load_service('services.youtube_service', 'YouTubeService', UnavailableYouTubeService)
+    return YouTubeService(state=create_shared_state(app.config.get('SHARED_STATE_URL')))
+
+def build_torrent_service(app):
+    TorrentService = load_service('services.torrent_service', 'TorrentService', UnavailableTorrentService)
+    TorrentIndex = load_service('services.torrent_index', 'TorrentIndex', unavailable)
+    QBittorrentService = load_service('services.qbittorrent_service', 'QBittorrentService', unavailable)
+    return TorrentService(
+        providers=app.config.get('TORRENT_PROVIDERS'),
+        search_deadline=app.config.get('TORRENT_SEARCH_DEADLINE', 8),
+        mirrors=app.config.get('TORRENT_MIRRORS'),
+        index=TorrentIndex(
+            app.config.get('TORRENT_INDEX_PATH', 'torrent_index.db'),
+            seeder_half_life=app.config.get('TORRENT_SEEDER_HALF_LIFE', 86400)
+        ),
+        index_max_age=app.config.get('TORRENT_INDEX_MAX_AGE', 30 * 86400),
+        qbittorrent=QBittorrentService(
+            host=app.config.get('QBITTORRENT_HOST', 'http://localhost:8080'),
+            username=app.config.get('QBITTORRENT_USERNAME', 'admin'),
+            password=app.config.get('QBITTORRENT_PASSWORD', 'adminadmin'),
+            poll_interval=app.config.get('QBITTORRENT_POLL_INTERVAL', 1.0),
+            emit=lambda event, payload, room: socketio.emit(event, payload, to=room),
+            # Owners, subscriptions and the poller lease are shared by every worker process
+            state=create_shared_state(app.config.get('SHARED_STATE_URL'))
+        )
+    )
+
+def build_media_service(app):
+    return load_service('services.media_service', 'MediaService', UnavailableMediaService)()
+
+def build_auth_service(app):
+    return AuthService(
+        store=create_user_store(
+            app.config.get('USER_STORE', 'sqlite'),
+            db_path=app.config.get('USER_DB_PATH', 'users.db'),
+            users_file=app.config.get('USERS_JSON_PATH', 'users_data.json')
+        ),
+        flush_interval=app.config.get('USER_LOGIN_FLUSH_INTERVAL', 5.0),
+        hasher=PasswordHasher(
+            app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+            cost=app.config.get('PASSWORD_HASH_COST'),
+            workers=app.config.get('PASSWORD_HASH_WORKERS')
+        )
+    )
+
+def build_token_denylist(app):
+    # Revoked tokens are only kept until they would have expired anyway
+    token_expiry = app.config.get('JWT_ACCESS_TOKEN_EXPIRES')
+    return TokenDenylist(
+        app.config.get('JWT_DENYLIST_PATH'),
+        max_token_age=int(token_expiry.total_seconds()) if token_expiry else 10 * 365 * 86400
+    )
+
+def build_batch_writer(app):
+    # Coalesces per-row writes such as download progress ticks into one transaction
+    return BatchWriter(app, db, flush_interval=app.config.get('DB_BATCH_FLUSH_INTERVAL', 0.5))
+
+SERVICE_FACTORIES = {
+    'youtube': build_youtube_service,
+    'torrent': build_torrent_service,
+    'media': build_media_service,
+    'auth': build_auth_service,
+    'token_denylist': build_token_denylist,
+    'batch_writer': build_batch_writer,
+}
+
+# The first app created; module-level users (`from app import app`, worker threads) resolve to it
+_default_app = None
+_default_app_lock = threading.RLock()
+
 # Initialize Flask app
 def create_app(config_name='development'):
+    global _default_app
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.json = FastJSONProvider(app)
+    app.json.msgpack_enabled = app.config.get('MSGPACK_RESPONSES', True)
 
     # Ensure required directories exist
     ensure_directory(app.config['UPLOAD_FOLDER'])
     ensure_directory('logs')
 
+    metrics.init_app(app)
+    profiler_options = app.config.get('PROFILER', {})
+    app.extensions['profiler'] = RequestProfiler(
+        app,
+        slow_threshold=profiler_options.get('slow_request_threshold', 2.0),
+        interval=profiler_options.get('slow_request_interval', 0.02),
+        keep=profiler_options.get('slow_request_keep', 50)
+    )
+    db.init_app(app)
+    metrics.instrument_sqlalchemy(Session)
+    jwt.init_app(app)
+    # With a message queue, events emitted by any worker process reach clients on every worker
+    socketio.init_app(
+        app, cors_allowed_origins="*",
+        **message_queue_options(app.config.get('SOCKETIO_MESSAGE_QUEUE'))
+    )
+    metrics.instrument_socketio(socketio)
+    CORS(app)
+    app.extensions['compression'] = Compression(app, **app.config.get('COMPRESSION', {}))
+    admission.init_app(app)
+    configure_upstream(
+        breaker=app.config.get('UPSTREAM_CIRCUIT_BREAKER'),
+        limiter=app.config.get('UPSTREAM_CONCURRENCY')
+    )
+    cassette.init_app(app)
+    app.extensions['services'] = ServiceRegistry(app, SERVICE_FACTORIES)
+    app.register_blueprint(api)
+
+    # Create database tables
+    with app.app_context():
+        enable_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
+        db.create_all()
+        # create_all skips tables that already exist, so add indexes introduced later
+        for index in Download.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    with _default_app_lock:
+        if _default_app is None:
+            _default_app = app
     return app
 
-app = create_app()
-
-# Initialize extensions
-db = SQLAlchemy(app)
-jwt = JWTManager(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
-CORS(app)
-
-# Initialize services
-youtube_service = YouTubeService()
-torrent_service = TorrentService()
-auth_service = AuthService()
-media_service = MediaService()
+def shutdown_services(app):
+    """Write pending batched rows and stop the qBittorrent poller of the services app has built"""
+    services = app.extensions['services']
+    writer = services.built('batch_writer')
+    if writer is not None:
+        writer.close()
+    qbittorrent = getattr(services.built('torrent'), 'qbittorrent', None)
+    if qbittorrent is not None:
+        qbittorrent.stop()
+
+def get_app():
+    """The app built by the first create_app() call, created on demand"""
+    if _default_app is None:
+        with _default_app_lock:
+            if _default_app is None:
+                create_app()
+    return _default_app
+
+def service(name):
+    """A service of the current app, or of the default app outside any app context (worker threads)"""
+    app = current_app._get_current_object() if has_app_context() else get_app()
+    return app.extensions['services'].get(name)
+
+# Built on first use; proxies so routes, worker threads and tests share one instance per app
+youtube_service = LocalProxy(lambda: service('youtube'))
+torrent_service = LocalProxy(lambda: service('torrent'))
+media_service = LocalProxy(lambda: service('media'))
+auth_service = LocalProxy(lambda: service('auth'))
+token_denylist = LocalProxy(lambda: service('token_denylist'))
+batch_writer = LocalProxy(lambda: service('batch_writer'))
+# Runs the parts of /api/dashboard side by side; parts past their deadline finish here unobserved
+dashboard_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dashboard')
+
+def __getattr__(name):
+    # `from app import app` still works and builds the default app on first access
+    if name == 'app':
+        return get_app()
+    if name == 'compression':
+        return get_app().extensions['compression']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    # Deactivating an account ends its sessions too, not just future logins
+    return token_denylist.is_revoked(jwt_payload) or not auth_service.is_active(jwt_payload['sub'])
 
 # Database Models
 class User(db.Model):
@@ -122,6 +519,9 @@ class User(db.Model):
     is_active = db.Column(db.Boolean, default=True)
 
 class Download(db.Model):
+    # Serves the per-user history newest first, including the keyset cursor tie-break on id
+    __table_args__ = (db.Index('ix_download_user_created', 'user_id', 'created_at', 'id'),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     url = db.Column(db.String(500), nullable=False)
@@ -132,9 +532,73 @@ class Download(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     completed_at = db.Column(db.DateTime)
 
+DOWNLOAD_COLUMNS = (
+    Download.id, Download.url, Download.title, Download.status,
+    Download.progress, Download.created_at, Download.completed_at
+)
+
+def serialize_download(row):
+    return {
+        'id': row.id,
+        'url': row.url,
+        'title': row.title,
+        'status': row.status,
+        'progress': row.progress,
+        'created_at': row.created_at.isoformat(),
+        'completed_at': row.completed_at.isoformat() if row.completed_at else None
+    }
+
+def system_info():
+    from utils.helpers import get_platform_info
+    return {
+        'success': True,
+        'platform': get_platform_info(),
+        'version': '2.0.0',
+        'features': {
+            'youtube_download': True,
+            'torrent_search': True,
+            'media_streaming': True,
+            'user_authentication': True
+        }
+    }
+
+def dashboard_downloads(username, limit):
+    """Per-status counts from one GROUP BY plus the newest few rows, instead of the whole history"""
+    counts = dict(
+        db.session.query(Download.status, func.count(Download.id))
+        .filter(Download.user_id == username)
+        .group_by(Download.status)
+        .all()
+    )
+    recent = (
+        Download.query.with_entities(*DOWNLOAD_COLUMNS)
+        .filter(Download.user_id == username)
+        .order_by(Download.created_at.desc(), Download.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return {
+        'total': sum(counts.values()),
+        'counts': counts,
+        'recent': [serialize_download(row) for row in recent]
+    }
+
+def admin_required(view):
+    """jwt_required, and the identity must be listed in ADMIN_USERS"""
+    @wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if get_jwt_identity() not in current_app.config.get('ADMIN_USERS', ()):
+            return jsonify({'success': False, 'error': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def requested_fields(data=None):
+    """Sparse fieldset from ?fields=a,b or a JSON body "fields" (string or list); None means all"""
+    return parse_fields(request.args.get('fields') or (data or {}).get('fields'))
+
 # Routes
-# Note: app is already created above with create_app()
-@app.route("/")
+@api.route("/")
 def home():
     return render_template_string("""
     <!DOCTYPE html>
@@ -382,35 +846,130 @@ def home():
     """)
 
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now(timezone.utc).isoformat()})
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'worker': os.getpid()
+    })
+
+@api.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape target; each worker process keeps its own counters"""
+    return current_app.response_class(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@api.route('/api/admin/profile', methods=['POST'])
+@admin_required
+def run_profile():
+    """Sample in-flight requests for `seconds` and answer with collapsed stacks for flame graph tools"""
+    options = {**request.args.to_dict(), **(request.get_json(silent=True) or {})}
+    max_seconds = current_app.config.get('PROFILER', {}).get('max_seconds', 60)
+    try:
+        seconds = float(options.get('seconds', 10))
+        interval = float(options.get('interval_ms', 5)) / 1000
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'seconds and interval_ms must be numbers'}), 400
+    if not 0 < seconds <= max_seconds or not 0.001 <= interval <= 1:
+        return jsonify({'success': False, 'error': f"seconds must be in (0, {max_seconds}], interval_ms in [1, 1000]"}), 400
+
+    profiler = current_app.extensions['profiler']
+    if not profiler.profiling.acquire(blocking=False):
+        return jsonify({'success': False, 'error': 'A profile is already running'}), 409
+    try:
+        all_threads = str(options.get('all_threads', '')).lower() in ('1', 'true', 'yes')
+        stacks, stats = profiler.profile(seconds, interval, all_threads=all_threads, route=options.get('route'))
+    finally:
+        profiler.profiling.release()
+
+    response = current_app.response_class(format_collapsed(stacks), content_type='text/plain; charset=utf-8')
+    # Sample counts and sampler lag (time spent waiting for the GIL) ride along as headers
+    for key, value in stats.items():
+        response.headers['X-Profile-' + key.replace('_', '-').title()] = str(value)
+    return response
 
-@app.route('/api/auth/register', methods=['POST'])
+@api.route('/api/admin/slow-requests', methods=['GET'])
+@admin_required
+def get_slow_requests():
+    profiler = current_app.extensions['profiler']
+    return jsonify({
+        'success': True,
+        'threshold_ms': (current_app.config.get('PROFILER', {}).get('slow_request_threshold') or 0) * 1000,
+        'reports': profiler.slow_requests()
+    })
+
+@api.route('/api/admin/slow-requests/<int:report_id>', methods=['GET'])
+@admin_required
+def get_slow_request_stacks(report_id):
+    """Stack samples of one slow request, collapsed"""
+    report = current_app.extensions['profiler'].slow_request(report_id)
+    if report is None:
+        return jsonify({'success': False, 'error': 'Report not found'}), 404
+    return current_app.response_class(format_collapsed(report['stacks']), content_type='text/plain; charset=utf-8')
+
+def auth_response(result):
+    """A saturated password hasher is overload, tell the client when to come back"""
+    if isinstance(result, dict) and result.get('busy'):
+        return result, 503, {'Retry-After': str(result['retry_after'])}
+    return result
+
+@api.route('/api/auth/register', methods=['POST'])
+@admission.guard('auth')
 def register():
     data = request.get_json()
-    return auth_service.register_user(data)
+    return auth_response(auth_service.register_user(data))
 
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
+@admission.guard('auth')
 def login():
     data = request.get_json()
-    return auth_service.login_user(data)
+    return auth_response(auth_service.login_user(data))
 
-@app.route('/api/auth/profile', methods=['GET'])
+@api.route('/api/auth/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     current_user_id = get_jwt_identity()
-    return auth_service.get_user_profile(current_user_id)
+    result, etag = auth_service.get_user_profile_with_etag(current_user_id)
+    if not etag:
+        return result
+    
+    # Answer If-None-Match with 304 when the cached profile is unchanged
+    response = jsonify(result)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+@api.route('/api/auth/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    claims = get_jwt()
+    token_denylist.revoke(claims['jti'], claims.get('exp'))
+    return {'success': True, 'message': 'Logged out'}
 
-@app.route('/api/youtube/search', methods=['POST'])
+@api.route('/api/auth/revoke-all', methods=['POST'])
+@jwt_required()
+def revoke_all_sessions():
+    claims = get_jwt()
+    token_denylist.revoke_all(claims['sub'])
+    return {'success': True, 'message': 'All sessions revoked'}
+
+@api.route('/api/auth/profile', methods=['PUT'])
+@jwt_required()
+def update_profile():
+    current_user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    return auth_service.update_user_profile(current_user_id, data)
+
+@api.route('/api/youtube/search', methods=['POST'])
 @jwt_required()
 def youtube_search():
     data = request.get_json()
     query = data.get('query', '')
     limit = data.get('limit', 20)
-    return youtube_service.search_videos(query, limit)
+    return youtube_service.search_videos(query, limit, fields=requested_fields(data))
 
-@app.route('/api/youtube/download', methods=['POST'])
+@api.route('/api/youtube/download', methods=['POST'])
+@admission.guard('expensive')
 def youtube_download():
     data = request.get_json()
     
@@ -422,35 +981,76 @@ def youtube_download():
     
     return youtube_service.download_video(data, current_user_id)
 
-@app.route('/api/torrent/search', methods=['POST'])
+@api.route('/api/torrent/search', methods=['POST'])
 @jwt_required()
 def torrent_search():
     data = request.get_json()
     query = data.get('query', '')
-    return torrent_service.search_torrents(query)
+    
+    fields = requested_fields(data)
+    
+    # Sorting, filtering or a cursor switch to the paginated browse mode
+    if any(key in data for key in ('sort', 'filters', 'cursor')):
+        result = torrent_service.browse_torrents(
+            query,
+            sort=data.get('sort', 'seeders'),
+            order=data.get('order', 'desc'),
+            filters=data.get('filters'),
+            cursor=data.get('cursor'),
+            limit=data.get('limit', 20)
+        )
+        return select_result_fields(result, fields), 400 if result.get('invalid') else 200
+    
+    page = data.get('page', 1)
+    local_first = data.get('local_first', current_app.config.get('TORRENT_LOCAL_FIRST', False))
+    result = torrent_service.search_torrents(query, page=page, local_first=local_first)
+    return select_result_fields(result, fields)
 
-@app.route('/api/media/stream', methods=['POST'])
+@api.route('/api/media/stream', methods=['POST'])
 @jwt_required()
 def stream_media():
     data = request.get_json()
-    return media_service.stream_media(data)
+    return select_fields(media_service.stream_media(data), requested_fields(data))
 
-@app.route('/api/downloads', methods=['GET'])
+@api.route('/api/downloads', methods=['GET'])
 @jwt_required()
 def get_downloads():
     current_user_id = get_jwt_identity()
-    downloads = Download.query.filter_by(user_id=current_user_id).order_by(Download.created_at.desc()).all()
-    return jsonify([{
-        'id': d.id,
-        'url': d.url,
-        'title': d.title,
-        'status': d.status,
-        'progress': d.progress,
-        'created_at': d.created_at.isoformat(),
-        'completed_at': d.completed_at.isoformat() if d.completed_at else None
-    } for d in downloads])
-
-@app.route('/api/downloads/<int:download_id>', methods=['DELETE'])
+    max_limit = current_app.config.get('DOWNLOADS_PAGE_MAX', 100)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), max_limit)
+    
+    # Only the columns we serialize, no ORM objects
+    query = Download.query.with_entities(*DOWNLOAD_COLUMNS).filter(Download.user_id == current_user_id)
+    
+    statuses = [s for s in request.args.get('status', '').split(',') if s]
+    if statuses:
+        query = query.filter(Download.status.in_(statuses))
+    
+    # Keyset pagination: continue strictly after the last (created_at, id) served
+    cursor = request.args.get('cursor')
+    if cursor:
+        state = decode_cursor(cursor)
+        try:
+            after = (datetime.fromisoformat(state['created_at']), int(state['id']))
+        except (TypeError, KeyError, ValueError):
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        query = query.filter(tuple_(Download.created_at, Download.id) < after)
+    
+    rows = query.order_by(Download.created_at.desc(), Download.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({'created_at': rows[-1].created_at.isoformat(), 'id': rows[-1].id})
+    
+    return jsonify({
+        'success': True,
+        'downloads': [serialize_download(row) for row in rows],
+        'count': len(rows),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
+
+@api.route('/api/downloads/<int:download_id>', methods=['DELETE'])
 @jwt_required()
 def delete_download(download_id):
     current_user_id = get_jwt_identity()
@@ -471,7 +1071,7 @@ def delete_download(download_id):
 
     return jsonify({'success': True, 'message': 'Download deleted successfully'})
 
-@app.route('/api/downloads/<int:download_id>/file', methods=['GET'])
+@api.route('/api/downloads/<int:download_id>/file', methods=['GET'])
 @jwt_required()
 def download_file(download_id):
     current_user_id = get_jwt_identity()
@@ -485,7 +1085,8 @@ def download_file(download_id):
 
     return send_file(download.file_path, as_attachment=True)
 
-@app.route('/api/youtube/info', methods=['POST'])
+@api.route('/api/youtube/info', methods=['POST'])
+@admission.guard('expensive')
 def get_video_info():
     data = request.get_json()
     url = data.get('url')
@@ -493,9 +1094,9 @@ def get_video_info():
     if not url:
         return jsonify({'success': False, 'error': 'URL is required'}), 400
 
-    return youtube_service.get_video_info(url)
+    return youtube_service.get_video_info(url, fields=requested_fields(data))
 
-@app.route('/api/media/formats', methods=['POST'])
+@api.route('/api/media/formats', methods=['POST'])
 @jwt_required()
 def get_media_formats():
     data = request.get_json()
@@ -504,35 +1105,83 @@ def get_media_formats():
     if not url:
         return jsonify({'success': False, 'error': 'URL is required'}), 400
 
-    return media_service.get_video_formats(url)
+    return select_fields(media_service.get_video_formats(url), requested_fields(data))
 
-@app.route('/api/torrent/popular', methods=['GET'])
+@api.route('/api/torrent/popular', methods=['GET'])
 @jwt_required()
 def get_popular_torrents():
     category = request.args.get('category', 'movies')
-    return torrent_service.get_popular_torrents(category)
+    return select_result_fields(torrent_service.get_popular_torrents(category), requested_fields())
 
-@app.route('/api/torrent/launch', methods=['POST'])
+@api.route('/api/torrent/launch', methods=['POST'])
 @jwt_required()
 def launch_qbittorrent():
     return torrent_service.launch_qbittorrent()
 
-@app.route('/api/system/info', methods=['GET'])
+@api.route('/api/torrent/add', methods=['POST'])
+@jwt_required()
+def add_torrents():
+    data = request.get_json()
+    magnet_links = data.get('magnet_links') or [data.get('magnet_link')]
+    if isinstance(magnet_links, str):
+        magnet_links = [magnet_links]
+    if not isinstance(magnet_links, list) or not all(isinstance(link, str) or link is None for link in magnet_links):
+        return jsonify({'success': False, 'error': 'magnet_links must be a list of magnet links'}), 400
+    
+    if not any(magnet_links):
+        return jsonify({'success': False, 'error': 'Magnet link is required'}), 400
+    
+    return torrent_service.add_torrents_to_qbittorrent(
+        magnet_links, username=get_jwt_identity(), category=data.get('category')
+    )
+
+@api.route('/api/torrent/active', methods=['GET'])
+@jwt_required()
+def get_active_torrents():
+    if not getattr(torrent_service, 'qbittorrent', None):
+        return jsonify({'success': False, 'error': 'qBittorrent Web API is not configured'}), 503
+    return torrent_service.qbittorrent.get_torrents(get_jwt_identity())
+
+@api.route('/api/torrent/status', methods=['GET'])
+def get_torrent_status():
+    return torrent_service.get_upstream_status()
+
+@api.route('/api/system/info', methods=['GET'])
 def get_system_info():
-    from utils.helpers import get_platform_info
+    return jsonify(system_info())
+
+@api.route('/api/dashboard', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """Profile, download stats, system info and popular torrents in one round trip"""
+    current_user_id = get_jwt_identity()
+    category = request.args.get('category', 'movies')
+    recent = current_app.config.get('DASHBOARD_RECENT_DOWNLOADS', 5)
+    parts = {
+        'profile': lambda: auth_service.get_user_profile(current_user_id),
+        'downloads': lambda: dashboard_downloads(current_user_id, recent),
+        'system': system_info,
+        'popular': lambda: torrent_service.get_popular_torrents(category),
+    }
+    selected = parse_fields(request.args.get('parts'))
+    if selected:
+        parts = {name: part for name, part in parts.items() if name in selected}
+    
+    deadlines = dict(current_app.config.get('DASHBOARD_DEADLINES', {}))
+    results = gather(
+        dashboard_executor, parts,
+        deadlines=deadlines,
+        default_deadline=deadlines.pop('default', 1.0),
+        context=current_app._get_current_object().app_context
+    )
     return jsonify({
         'success': True,
-        'platform': get_platform_info(),
-        'version': '2.0.0',
-        'features': {
-            'youtube_download': True,
-            'torrent_search': True,
-            'media_streaming': True,
-            'user_authentication': True
-        }
+        'parts': results,
+        'partial': any(part['status'] != 'ok' for part in results.values())
     })
 
-@app.route('/api/youtube/formats', methods=['POST'])
+@api.route('/api/youtube/formats', methods=['POST'])
+@admission.guard('expensive')
 def get_video_formats():
     data = request.get_json()
     url = data.get('url')
@@ -541,7 +1190,7 @@ def get_video_formats():
         return jsonify({'success': False, 'error': 'URL is required'}), 400
 
     try:
-        video_info = youtube_service.get_video_info(url)
+        video_info = youtube_service.get_video_info(url, fields=requested_fields(data))
         if video_info.get('success'):
             return jsonify(video_info)
         else:
@@ -549,7 +1198,7 @@ def get_video_formats():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/youtube/stream/<stream_token>', methods=['GET'])
+@api.route('/api/youtube/stream/<stream_token>', methods=['GET'])
 def stream_video(stream_token):
     """Proxy stream video content to avoid 403 errors"""
     response = youtube_service.stream_video(stream_token)
@@ -559,7 +1208,8 @@ def stream_video(stream_token):
     
     return response
 
-@app.route('/api/youtube/download-with-quality', methods=['POST'])
+@api.route('/api/youtube/download-with-quality', methods=['POST'])
+@admission.guard('expensive')
 def download_with_quality():
     data = request.get_json()
     url = data.get('url')
@@ -590,15 +1240,27 @@ def download_with_quality():
 @jwt_required()
 def handle_connect():
     print('Client connected')
+    # Per-user room so torrent progress only reaches its owner
+    join_room(f"user:{get_jwt_identity()}")
     emit('status', {'msg': 'Connected to EagleEye server'})
 
+@socketio.on('subscribe_torrents')
+@jwt_required()
+def handle_subscribe_torrents(data):
+    qbittorrent = getattr(torrent_service, 'qbittorrent', None)
+    hashes = (data or {}).get('hashes')
+    if not qbittorrent or not isinstance(hashes, list) or not all(isinstance(h, str) for h in hashes):
+        return {'success': False, 'error': 'hashes must be a list of infohashes'}
+    # The return value is the client's acknowledgement
+    return qbittorrent.subscribe(get_jwt_identity(), hashes, session=request.sid)
+
 @socketio.on('disconnect')
 def handle_disconnect():
     print('Client disconnected')
-
-# Create database tables
-with app.app_context():
-    db.create_all()
+    # Only if the torrent service was built; nobody can have subscribed otherwise
+    qbittorrent = getattr(current_app.extensions['services'].built('torrent'), 'qbittorrent', None)
+    if qbittorrent is not None:
+        qbittorrent.disconnect(request.sid)
 
 if __name__ == '__main__':
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
+    socketio.run(create_app(), debug=True, host='0.0.0.0', port=5000)
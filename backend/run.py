@@ -5,7 +5,7 @@ Simple runner for the EagleEye backend server
 
 import os
 import sys
-from app import app, socketio
+from app import create_app, socketio
 
 if __name__ == '__main__':
     print("🦅 EagleEye Backend Server Starting...")
@@ -15,7 +15,7 @@ if __name__ == '__main__':
     
     # Run the app with SocketIO
     socketio.run(
-        app,
+        create_app(),
         debug=True,
         host='0.0.0.0',
         port=5000,
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Production runner: N gunicorn worker processes serving one port
+
+gunicorn's master binds the port once, the workers inherit the listening socket
+and the master restarts any worker that dies. Workers use gunicorn's threaded
+(gthread) worker class: the services block on yt-dlp, scrapers and SQLite and run
+background threads of their own, so they stay on plain threads rather than
+eventlet or gevent monkey patching, and Socket.IO websockets are served by
+simple-websocket on the same threads.
+
+Stream tokens, revoked tokens, users, downloads and qBittorrent subscriptions
+live in SQLite files next to each other, and Socket.IO events go through a SQLite
+message queue, so any worker can answer any request. One worker at a time, holder
+of a lease, polls qBittorrent. Clients must use the websocket transport:
+long-polling needs every request of a session to reach the same worker. Rate
+limits and admission queues stay per worker.
+
+    python serve.py --workers 4 --port 5000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_SHARED_STATE = 'sqlite:///shared_state.db'
+DEFAULT_MESSAGE_QUEUE = 'sqlite:///socketio_queue.db'
+
+def prepare():
+    """Create every table once, before workers that would otherwise race to create them start"""
+    from app import create_app
+    create_app()
+
+def build_server(workers, host, port, threads=100, graceful_timeout=10):
+    """A gunicorn application whose workers each build the app and shut its services down on exit"""
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"[{host}]:{port}" if ':' in host else f"{host}:{port}")
+            self.cfg.set('workers', workers)
+            self.cfg.set('worker_class', 'gthread')
+            # Each open websocket holds a thread for as long as it stays connected
+            self.cfg.set('threads', threads)
+            self.cfg.set('graceful_timeout', graceful_timeout)
+            # One per user by default (~/.gunicorn), shared by every instance on the host
+            self.cfg.set('control_socket_disable', True)
+            self.cfg.set('when_ready', lambda arbiter: print(
+                f"🦅 EagleEye serving on http://{host}:{port} with {workers} workers", flush=True
+            ))
+            self.cfg.set('post_worker_init', lambda worker: print(f"Worker {worker.pid} ready", flush=True))
+            self.cfg.set('worker_exit', self.worker_exit)
+
+        def load(self):
+            from app import create_app
+            self.app = create_app()
+            return self.app
+
+        def worker_exit(self, arbiter, worker):
+            # Runs in the worker after SIGTERM: write pending progress, hand over the poller lease
+            app = getattr(self, 'app', None)
+            if app is not None:
+                from app import shutdown_services
+                shutdown_services(app)
+
+    return Server()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run EagleEye with several worker processes')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=100, help='threads, and so open websockets, per worker')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--prepare', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.prepare:
+        return prepare()
+
+    # Workers inherit these, so they all agree on where shared state lives
+    os.environ.setdefault('EAGLEEYE_SHARED_STATE', DEFAULT_SHARED_STATE)
+    os.environ.setdefault('EAGLEEYE_MESSAGE_QUEUE', DEFAULT_MESSAGE_QUEUE)
+    if args.workers > 1:
+        # In a child, so the master forks workers without app state or open connections of its own
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--prepare'], check=True)
+    build_server(args.workers, args.host, args.port, args.threads).run()
+
+if __name__ == '__main__':
+    main()
@@ -2,41 +2,105 @@
 Authentication Service - Handles user registration, login, and profile management
 """
 
+import atexit
+import copy
 import hashlib
 import json
-import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from flask import jsonify
 from flask_jwt_extended import create_access_token
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.user_store import UserExistsError, create_user_store
+from utils.passwords import HasherBusy, PasswordHasher
+from utils import metrics
 
 class AuthService:
-    def __init__(self):
-        self.users_file = 'users_data.json'
-        self.ensure_users_file()
+    def __init__(self, store=None, flush_interval=5.0, hasher=None, profile_cache_size=1024):
+        # Indexed lookups by username and email instead of reading every user per request
+        self.store = store or create_user_store()
+        self.hasher = hasher or PasswordHasher()
+        
+        # Write-behind buffer: last_login per user, flushed in one transaction
+        self.flush_interval = flush_interval
+        self._pending_logins = {}
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+        atexit.register(self.close)
+        
+        # Profile cache: username -> (store data version, result, etag), least recently used first.
+        # Every invalidation bumps one counter, so a read that raced any of them is not cached.
+        self.profile_cache_size = profile_cache_size
+        self._profiles = OrderedDict()
+        self._generation = 0
+        self._profiles_lock = threading.Lock()
     
-    def ensure_users_file(self):
-        """Ensure users data file exists"""
-        if not os.path.exists(self.users_file):
-            with open(self.users_file, 'w') as f:
-                json.dump({}, f)
+    def record_login(self, username, timestamp):
+        """Buffer a last_login update; repeated logins of one user coalesce into one write"""
+        with self._pending_lock:
+            self._pending_logins[username] = timestamp
+            if self._flusher is None or not self._flusher.is_alive():
+                self._stop.clear()
+                self._flusher = threading.Thread(target=self._flush_loop, name='auth-login-flush', daemon=True)
+                self._flusher.start()
+        self._invalidate_profile(username)
     
-    def load_users(self):
-        """Load users from JSON file"""
+    def flush_logins(self):
+        """Write every buffered last_login in a single transaction"""
+        with self._pending_lock:
+            pending, self._pending_logins = self._pending_logins, {}
+        if not pending:
+            return 0
         try:
-            with open(self.users_file, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
+            self.store.record_logins(pending)
+        except Exception:
+            # Keep the updates for the next flush, newer logins win
+            with self._pending_lock:
+                self._pending_logins = {**pending, **self._pending_logins}
+            raise
+        return len(pending)
     
-    def save_users(self, users_data):
-        """Save users to JSON file"""
-        with open(self.users_file, 'w') as f:
-            json.dump(users_data, f, indent=2)
+    def close(self):
+        """Stop the flusher and write whatever is still buffered"""
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join(timeout=5)
+        try:
+            self.flush_logins()
+        except Exception as e:
+            print(f"Could not flush last_login updates: {e}")
+        self.hasher.close()
+    
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush_logins()
+            except Exception as e:
+                print(f"Could not flush last_login updates: {e}")
+    
+    def _invalidate_profile(self, username):
+        """Drop the user's cached profile so the next read goes to the store"""
+        with self._profiles_lock:
+            self._generation += 1
+            self._profiles.pop(username, None)
+    
+    def _get_user(self, username):
+        """Stored user with any last_login that has not been flushed yet"""
+        user_data = self.store.get(username)
+        if user_data:
+            with self._pending_lock:
+                if username in self._pending_logins:
+                    user_data['last_login'] = self._pending_logins[username]
+        return user_data
+    
+    def _busy(self, error):
+        # Overload, not bad credentials: the route answers 503 with Retry-After
+        return {'success': False, 'error': str(error), 'busy': True, 'retry_after': error.retry_after}
     
     def hash_password(self, password):
-        """Hash password using SHA256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Salted scrypt/pbkdf2 hash computed in the hasher's process pool"""
+        return self.hasher.hash(password)
     
     def register_user(self, data):
         """Register a new user"""
@@ -65,21 +129,18 @@ class AuthService:
                 }
             
             # Check if user already exists
-            users = self.load_users()
-            
-            if username in users:
+            if self.store.get(username):
                 return {
                     'success': False,
                     'error': 'Username already exists'
                 }
             
             # Check if email already exists
-            for user_data in users.values():
-                if user_data.get('email') == email:
-                    return {
-                        'success': False,
-                        'error': 'Email already registered'
-                    }
+            if self.store.email_exists(email):
+                return {
+                    'success': False,
+                    'error': 'Email already registered'
+                }
             
             # Create new user
             user_data = {
@@ -100,8 +161,15 @@ class AuthService:
                 }
             }
             
-            users[username] = user_data
-            self.save_users(users)
+            try:
+                self.store.create(user_data)
+            except UserExistsError as e:
+                # Lost a race with a concurrent registration
+                return {
+                    'success': False,
+                    'error': 'Email already registered' if e.field == 'Email' else 'Username already exists'
+                }
+            self._invalidate_profile(username)
             
             # Create access token
             access_token = create_access_token(identity=username)
@@ -117,6 +185,8 @@ class AuthService:
                 }
             }
             
+        except HasherBusy as e:
+            return self._busy(e)
         except Exception as e:
             return {
                 'success': False,
@@ -135,16 +205,14 @@ class AuthService:
                     'error': 'Username and password are required'
                 }
             
-            users = self.load_users()
+            user_data = self.store.get(username)
             
-            if username not in users:
+            if not user_data:
                 return {
                     'success': False,
                     'error': 'Invalid username or password'
                 }
             
-            user_data = users[username]
-            
             # Check if user is active
             if not user_data.get('is_active', True):
                 return {
@@ -153,16 +221,19 @@ class AuthService:
                 }
             
             # Verify password
-            if user_data['password_hash'] != self.hash_password(password):
+            if not self.hasher.verify(user_data['password_hash'], password):
                 return {
                     'success': False,
                     'error': 'Invalid username or password'
                 }
             
+            # Upgrade legacy SHA-256 hashes and hashes made with an older cost
+            if self.hasher.needs_rehash(user_data['password_hash']):
+                self.store.update(username, password_hash=self.hash_password(password))
+            
             # Update last login
             user_data['last_login'] = datetime.utcnow().isoformat()
-            users[username] = user_data
-            self.save_users(users)
+            self.record_login(username, user_data['last_login'])
             
             # Create access token
             access_token = create_access_token(identity=username)
@@ -179,6 +250,8 @@ class AuthService:
                 }
             }
             
+        except HasherBusy as e:
+            return self._busy(e)
         except Exception as e:
             return {
                 'success': False,
@@ -187,18 +260,37 @@ class AuthService:
     
     def get_user_profile(self, username):
         """Get user profile"""
+        return self.get_user_profile_with_etag(username)[0]
+    
+    def is_active(self, username):
+        """False once a stored user is deactivated; read through the profile cache, so cheap per request"""
+        result = self.get_user_profile(username)
+        return not result.get('success') or result['user']['is_active']
+    
+    def get_user_profile_with_etag(self, username):
+        """Profile and its ETag, served from the cache until the user is invalidated"""
         try:
-            users = self.load_users()
-            
-            if username not in users:
+            # The JSON file can be edited by other processes, so its mtime is part of the key
+            data_version = self.store.data_version()
+            with self._profiles_lock:
+                generation = self._generation
+                cached = self._profiles.get(username)
+                if cached and cached[0] == data_version:
+                    self._profiles.move_to_end(username)
+                    metrics.cache_lookup('profile', hit=True)
+                    # Callers get their own copy, nested dicts included, never the cached one
+                    return copy.deepcopy(cached[1]), cached[2]
+            metrics.cache_lookup('profile', hit=False)
+            
+            user_data = self._get_user(username)
+            
+            if not user_data:
                 return {
                     'success': False,
                     'error': 'User not found'
-                }
+                }, None
             
-            user_data = users[username]
-            
-            return {
+            result = {
                 'success': True,
                 'user': {
                     'username': username,
@@ -209,26 +301,35 @@ class AuthService:
                     'is_active': user_data.get('is_active', True)
                 }
             }
+            etag = hashlib.sha1(json.dumps(result['user'], sort_keys=True).encode()).hexdigest()
+            
+            with self._profiles_lock:
+                # Skip caching if anyone was invalidated while we were reading
+                if self._generation == generation:
+                    self._profiles[username] = (data_version, copy.deepcopy(result), etag)
+                    self._profiles.move_to_end(username)
+                    while len(self._profiles) > self.profile_cache_size:
+                        self._profiles.popitem(last=False)
+            
+            return result, etag
             
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e)
-            }
+            }, None
     
     def update_user_profile(self, username, profile_data):
         """Update user profile"""
         try:
-            users = self.load_users()
+            user_data = self.store.get(username)
             
-            if username not in users:
+            if not user_data:
                 return {
                     'success': False,
                     'error': 'User not found'
                 }
             
-            user_data = users[username]
-            
             # Update profile fields
             if 'profile' not in user_data:
                 user_data['profile'] = {}
@@ -238,8 +339,8 @@ class AuthService:
                 if field in profile_data:
                     user_data['profile'][field] = profile_data[field]
             
-            users[username] = user_data
-            self.save_users(users)
+            self.store.update(username, profile=user_data['profile'])
+            self._invalidate_profile(username)
             
             return {
                 'success': True,
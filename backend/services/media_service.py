@@ -7,6 +7,7 @@ import subprocess
 import tempfile
 import yt_dlp
 from flask import jsonify
+from utils import metrics
 
 class MediaService:
     def __init__(self):
@@ -45,7 +46,8 @@ class MediaService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('media'):
+                    info = ydl.extract_info(url, download=False)
                 
                 return {
                     'success': True,
@@ -72,7 +74,8 @@ class MediaService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('media'):
+                    info = ydl.extract_info(url, download=False)
                 
                 return {
                     'success': True,
@@ -98,7 +101,8 @@ class MediaService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('media'):
+                    info = ydl.extract_info(url, download=False)
                 formats = info.get('formats', [])
                 
                 # Process formats
@@ -171,7 +175,8 @@ class MediaService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('media'):
+                    info = ydl.extract_info(url, download=False)
                 
                 if 'entries' in info:
                     # It's a playlist
@@ -219,7 +224,8 @@ class MediaService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('media'):
+                    info = ydl.extract_info(url, download=False)
                 
                 subtitles = info.get('subtitles', {})
                 auto_subtitles = info.get('automatic_captions', {})
@@ -0,0 +1,241 @@
+"""
+qBittorrent Service - Adds torrents through the qBittorrent Web API and pushes progress deltas
+"""
+
+import logging
+import threading
+import uuid
+import qbittorrentapi
+from utils.helpers import extract_infohash
+from utils.shared_state import MemoryState
+
+# Torrent fields forwarded to clients when they change
+PROGRESS_FIELDS = (
+    'name', 'progress', 'dlspeed', 'upspeed', 'eta', 'state',
+    'num_seeds', 'num_leechs', 'size', 'downloaded', 'ratio'
+)
+
+POLLER_LEASE = 'qbittorrent:poller'
+KNOWN_TORRENTS = 'qbittorrent:torrents'
+# Torrents with at least one subscriber; the poller stops once this is empty
+SUBSCRIBED_TORRENTS = 'qbittorrent:subscribed'
+
+logger = logging.getLogger(__name__)
+
+def _key(kind, name):
+    return f"qbittorrent:{kind}:{name}"
+
+class QBittorrentService:
+    """
+    One background poller follows qBittorrent with the incremental sync/maindata
+    endpoint (rid based deltas) and fans changes out to the users subscribed to
+    each torrent, instead of polling every torrent separately.
+
+    Owners, subscriptions and the last known torrent state live in the shared
+    state, so every worker process sees the same torrents. Each worker with a
+    subscriber runs a poll thread, but only the holder of the poller lease syncs;
+    another takes over once a lease holder stops renewing it. Poll threads exit
+    once no torrent has a subscriber left, and the next subscription restarts them.
+    """
+
+    def __init__(self, host='http://localhost:8080', username='admin', password='adminadmin',
+                 poll_interval=1.0, emit=None, timeout=10, state=None, lease_ttl=None):
+        self.client = qbittorrentapi.Client(
+            host=host,
+            username=username,
+            password=password,
+            REQUESTS_ARGS={'timeout': timeout}
+        )
+        self.poll_interval = poll_interval
+        # emit(event, payload, room) - wired to Socket.IO by the app
+        self.emit = emit
+        self.state = state or MemoryState()
+        self.lease_ttl = lease_ttl or max(5.0, poll_interval * 5)
+        self.poller_id = uuid.uuid4().hex
+
+        self._rid = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller = None
+
+    def add_torrents(self, magnet_links, username=None, category=None, save_path=None):
+        """Add many magnets in a single Web API call and subscribe the caller to them"""
+        magnet_links = [link for link in magnet_links if link]
+        if not magnet_links:
+            return {'success': False, 'error': 'At least one magnet link is required'}
+
+        hashes = [extract_infohash(link) for link in magnet_links]
+        if not all(hashes):
+            return {'success': False, 'error': 'Invalid magnet link'}
+
+        try:
+            result = self.client.torrents_add(urls=magnet_links, category=category, save_path=save_path)
+        except qbittorrentapi.APIError as e:
+            return {'success': False, 'error': f"qBittorrent error: {e}"}
+
+        if result != 'Ok.':
+            return {'success': False, 'error': 'qBittorrent rejected the torrents'}
+
+        if username:
+            self.claim(username, hashes)
+            self.subscribe(username, hashes)
+
+        return {
+            'success': True,
+            'message': f"Added {len(hashes)} torrent(s) to qBittorrent",
+            'hashes': hashes
+        }
+
+    def claim(self, username, hashes):
+        """Record that username added these torrents"""
+        for infohash in hashes:
+            self.state.add_member(_key('owners', infohash.lower()), username)
+            self.state.add_member(_key('owned', username), infohash.lower())
+
+    def owned(self, username, hashes):
+        return [infohash.lower() for infohash in hashes if username in self.state.members(_key('owners', infohash.lower()))]
+
+    def subscribers(self, infohash):
+        return self.state.members(_key('subscribers', infohash.lower()))
+
+    def subscribe(self, username, hashes, session=None):
+        """
+        Push progress of the given torrents to a user; starts the poller on first use.
+        Torrents the user did not add are rejected, not subscribed. A socket session
+        subscribing is remembered so that disconnect() can drop the subscriptions.
+        """
+        accepted = self.owned(username, hashes)
+        rejected = [infohash for infohash in hashes if infohash.lower() not in accepted]
+        if accepted:
+            for infohash in accepted:
+                self.state.add_member(_key('subscribers', infohash), username)
+                self.state.add_member(SUBSCRIBED_TORRENTS, infohash)
+            if session:
+                self.state.set(_key('session', session), username)
+                self.state.add_member(_key('sessions', username), session)
+            self.start()
+        result = {'success': not rejected, 'subscribed': accepted}
+        if rejected:
+            result.update(error='Only torrents you added can be followed', rejected=rejected)
+        return result
+
+    def unsubscribe(self, username, hashes=None):
+        for infohash in list(hashes or self.state.members(_key('owned', username))):
+            infohash = infohash.lower()
+            self.state.remove_member(_key('subscribers', infohash), username)
+            if not self.subscribers(infohash):
+                self.state.remove_member(SUBSCRIBED_TORRENTS, infohash)
+
+    def disconnect(self, session):
+        """A socket closed; its user stops following torrents once none of their sockets remain"""
+        username = self.state.get(_key('session', session))
+        if username is None:
+            return
+        self.state.delete(_key('session', session))
+        self.state.remove_member(_key('sessions', username), session)
+        if not self.state.members(_key('sessions', username)):
+            self.unsubscribe(username)
+
+    def get_torrents(self, username):
+        """Current state of every torrent a user added"""
+        torrents = []
+        for infohash in sorted(self.state.members(_key('owned', username))):
+            torrent = self.state.get(_key('torrent', infohash))
+            if torrent is not None:
+                torrents.append(dict(torrent, hash=infohash))
+        return {'success': True, 'torrents': torrents}
+
+    def start(self):
+        with self._lock:
+            if self._poller and self._poller.is_alive():
+                return
+            self._stop.clear()
+            self._poller = threading.Thread(target=self._poll_loop, name='qbittorrent-sync', daemon=True)
+            self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._poller:
+            self._poller.join(timeout=5)
+        self._release_lease()
+
+    def _release_lease(self):
+        # Hand the lease over now instead of when it expires
+        if self.state.get(POLLER_LEASE) == self.poller_id:
+            self.state.delete(POLLER_LEASE)
+
+    def _poll_loop(self):
+        delay = self.poll_interval
+        while not self._stop.is_set():
+            # Under the lock, so a subscribe() either sees this thread exit or is seen by it
+            with self._lock:
+                if not self.state.members(SUBSCRIBED_TORRENTS):
+                    self._poller = None
+                    self._rid = 0
+                    self._release_lease()
+                    return
+            try:
+                if self.state.acquire(POLLER_LEASE, self.poller_id, self.lease_ttl):
+                    self.sync_once()
+                else:
+                    # Another worker polls; should this one take over, it starts from a full update
+                    self._rid = 0
+                delay = self.poll_interval
+            except Exception as e:
+                # Back off while qBittorrent is unreachable, then resync from scratch
+                logger.warning("qBittorrent sync error: %s", e)
+                self._rid = 0
+                delay = min(delay * 2, 30)
+            self._stop.wait(delay)
+
+    def sync_once(self):
+        """Fetch one sync/maindata delta, apply it to the shared state and fan the changes out"""
+        data = self.client.sync_maindata(rid=self._rid)
+        full_update = bool(data.get('full_update'))
+        torrents = data.get('torrents') or {}
+
+        changed = {}
+        if full_update:
+            # A full update lists every torrent, anything else stored is gone
+            for infohash in self.state.members(KNOWN_TORRENTS) - set(torrents):
+                self.state.delete(_key('torrent', infohash))
+                self.state.remove_member(KNOWN_TORRENTS, infohash)
+        for infohash, fields in torrents.items():
+            delta = {k: v for k, v in fields.items() if k in PROGRESS_FIELDS}
+            current = {} if full_update else self.state.get(_key('torrent', infohash), {})
+            self.state.set(_key('torrent', infohash), {**current, **delta})
+            self.state.add_member(KNOWN_TORRENTS, infohash)
+            if delta:
+                changed[infohash] = delta
+
+        removed = list(data.get('torrents_removed') or [])
+        updates = self._group_by_user(changed, removed)
+        for infohash in removed:
+            self._forget(infohash)
+        self._rid = data.get('rid', self._rid)
+
+        if self.emit:
+            for username, payload in updates.items():
+                self.emit('torrent_progress', payload, f"user:{username}")
+
+        return updates
+
+    def _forget(self, infohash):
+        for username in self.state.members(_key('subscribers', infohash)):
+            self.unsubscribe(username, [infohash])
+        for username in self.state.members(_key('owners', infohash)):
+            self.state.remove_member(_key('owned', username), infohash)
+        for kind in ('torrent', 'owners'):
+            self.state.delete(_key(kind, infohash))
+        self.state.remove_member(KNOWN_TORRENTS, infohash)
+
+    def _group_by_user(self, changed, removed):
+        updates = {}
+        for infohash, delta in changed.items():
+            for username in self.subscribers(infohash):
+                payload = updates.setdefault(username, {'torrents': [], 'removed': []})
+                payload['torrents'].append(dict(delta, hash=infohash))
+        for infohash in removed:
+            for username in self.subscribers(infohash):
+                updates.setdefault(username, {'torrents': [], 'removed': []})['removed'].append(infohash)
+        return updates
@@ -0,0 +1,157 @@
+"""
+Token Denylist - Revoked JWTs by jti and per-user revoke-all cutoffs, with optional SQLite persistence
+"""
+
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti TEXT PRIMARY KEY,
+    expires_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens (expires_at);
+
+CREATE TABLE IF NOT EXISTS revoked_sessions (
+    username TEXT PRIMARY KEY,
+    revoked_before INTEGER NOT NULL
+);
+"""
+
+class TokenDenylist:
+    """
+    Revoked jtis live in a dict for O(1) checks. They are also grouped in
+    buckets by expiry time so expired entries are dropped a whole bucket at a
+    time instead of scanning every jti. A revoke-all stores one cutoff second
+    per user: tokens issued in or before it are rejected. iat has one second
+    resolution, so a new login in that same second is rejected as well. With a
+    db_path, revocations committed by other processes are picked up through
+    SQLite's data_version before the next check.
+    """
+
+    def __init__(self, db_path=None, bucket_seconds=300, max_token_age=86400):
+        self.db_path = db_path
+        self.bucket_seconds = bucket_seconds
+        # Cutoffs older than the longest token lifetime can no longer match anything
+        self.max_token_age = max_token_age
+        self._revoked = {}
+        self._buckets = {}
+        self._cutoffs = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0
+        self._local = threading.local()
+        self._watch = None
+        self._data_version = None
+
+        if self.db_path:
+            self._connect().executescript(SCHEMA)
+            # One long-lived connection whose data_version moves when any other connection commits
+            self._watch = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._data_version = self._watch.execute('PRAGMA data_version').fetchone()[0]
+            self._load()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _load(self):
+        now = int(time.time())
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM revoked_tokens WHERE expires_at <= ?', (now,))
+            conn.execute('DELETE FROM revoked_sessions WHERE revoked_before < ?', (now - self.max_token_age,))
+        for jti, expires_at in conn.execute('SELECT jti, expires_at FROM revoked_tokens'):
+            self._add(jti, expires_at)
+        self._cutoffs.update(conn.execute('SELECT username, revoked_before FROM revoked_sessions'))
+
+    def revoke(self, jti, expires_at=None):
+        """Deny one token until it would have expired anyway"""
+        if expires_at is None:
+            expires_at = time.time() + self.max_token_age
+        with self._lock:
+            self._add(jti, int(expires_at))
+        if self.db_path:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)',
+                    (jti, int(expires_at))
+                )
+
+    def revoke_all(self, username, before=None):
+        """Deny every token of a user issued up to `before` (default now)"""
+        cutoff = int(before if before is not None else time.time())
+        with self._lock:
+            self._cutoffs[username] = max(cutoff, self._cutoffs.get(username, 0))
+            cutoff = self._cutoffs[username]
+        if self.db_path:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO revoked_sessions (username, revoked_before) VALUES (?, ?)',
+                    (username, cutoff)
+                )
+        return cutoff
+
+    def is_revoked(self, payload):
+        """Check decoded JWT claims; called on every authenticated request"""
+        now = time.time()
+        if self._watch is not None:
+            self._sync()
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        if payload.get('jti') in self._revoked:
+            return True
+        cutoff = self._cutoffs.get(payload.get('sub'))
+        return cutoff is not None and payload.get('iat', 0) <= cutoff
+
+    def sweep(self, now=None):
+        """Drop whole buckets whose tokens have all expired"""
+        now = now or time.time()
+        current = int(now) // self.bucket_seconds
+        removed = 0
+        with self._lock:
+            self._next_sweep = now + self.bucket_seconds
+            for bucket in [b for b in self._buckets if b < current]:
+                for jti in self._buckets.pop(bucket):
+                    # Skip jtis revoked again later with another expiry
+                    if self._revoked.get(jti, 0) // self.bucket_seconds == bucket:
+                        del self._revoked[jti]
+                        removed += 1
+            stale = now - self.max_token_age
+            for username in [u for u, cutoff in self._cutoffs.items() if cutoff < stale]:
+                del self._cutoffs[username]
+
+        if self.db_path and removed:
+            conn = self._connect()
+            with conn:
+                conn.execute('DELETE FROM revoked_tokens WHERE expires_at < ?', (current * self.bucket_seconds,))
+        return removed
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def _sync(self):
+        with self._lock:
+            version = self._watch.execute('PRAGMA data_version').fetchone()[0]
+            if version == self._data_version:
+                return
+            self._data_version = version
+            revoked = self._watch.execute('SELECT jti, expires_at FROM revoked_tokens').fetchall()
+            cutoffs = self._watch.execute('SELECT username, revoked_before FROM revoked_sessions').fetchall()
+            # Another process (or another connection here) committed: rebuild from the tables
+            self._revoked, self._buckets = {}, {}
+            for jti, expires_at in revoked:
+                self._add(jti, expires_at)
+            self._cutoffs = dict(cutoffs)
+
+    def _add(self, jti, expires_at):
+        # A jti's bucket is the one its expiry falls in; the bucket is dropped once it has fully passed
+        self._revoked[jti] = expires_at
+        self._buckets.setdefault(expires_at // self.bucket_seconds, set()).add(jti)
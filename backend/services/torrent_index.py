@@ -0,0 +1,215 @@
+"""
+Torrent Index - Local SQLite FTS5 index of every torrent row seen while scraping
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from utils.helpers import parse_file_size
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS torrents (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    infohash TEXT,
+    title TEXT NOT NULL,
+    size TEXT,
+    size_bytes INTEGER,
+    seeders INTEGER NOT NULL DEFAULT 0,
+    leechers INTEGER NOT NULL DEFAULT 0,
+    magnet_link TEXT,
+    detail_url TEXT,
+    quality TEXT,
+    provider TEXT,
+    category TEXT,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_torrents_infohash ON torrents (infohash);
+CREATE INDEX IF NOT EXISTS idx_torrents_last_seen ON torrents (last_seen);
+
+-- Detail pages whose infohash is known, so rows scraped without a magnet land on the same row
+CREATE TABLE IF NOT EXISTS torrent_aliases (
+    detail_url TEXT PRIMARY KEY,
+    key TEXT NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS torrents_fts USING fts5(
+    title, content='torrents', content_rowid='id', tokenize='unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS torrents_ai AFTER INSERT ON torrents BEGIN
+    INSERT INTO torrents_fts (rowid, title) VALUES (new.id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS torrents_ad AFTER DELETE ON torrents BEGIN
+    INSERT INTO torrents_fts (torrents_fts, rowid, title) VALUES ('delete', old.id, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS torrents_au AFTER UPDATE OF title ON torrents BEGIN
+    INSERT INTO torrents_fts (torrents_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    INSERT INTO torrents_fts (rowid, title) VALUES (new.id, new.title);
+END;
+"""
+
+UPSERT = """
+INSERT INTO torrents (key, infohash, title, size, size_bytes, seeders, leechers,
+                      magnet_link, detail_url, quality, provider, category, last_seen)
+VALUES (:key, :infohash, :title, :size, :size_bytes, :seeders, :leechers,
+        :magnet_link, :detail_url, :quality, :provider, :category, :last_seen)
+ON CONFLICT (key) DO UPDATE SET
+    title = excluded.title,
+    size = COALESCE(excluded.size, size),
+    size_bytes = COALESCE(excluded.size_bytes, size_bytes),
+    seeders = excluded.seeders,
+    leechers = excluded.leechers,
+    magnet_link = COALESCE(excluded.magnet_link, magnet_link),
+    infohash = COALESCE(excluded.infohash, infohash),
+    detail_url = COALESCE(excluded.detail_url, detail_url),
+    quality = excluded.quality,
+    provider = excluded.provider,
+    category = COALESCE(excluded.category, category),
+    last_seen = excluded.last_seen
+"""
+
+class TorrentIndex:
+    """Full-text index over scraped torrents; seeder counts decay with the age of the sighting"""
+
+    def __init__(self, db_path='torrent_index.db', seeder_half_life=86400):
+        self.db_path = db_path
+        self.seeder_half_life = seeder_half_life
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            # The clock is passed in as a bound parameter, so the function really is deterministic
+            conn.create_function('decayed', 3, self._decayed_seeders, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    def _decayed_seeders(self, seeders, last_seen, now):
+        age = max(0.0, now - last_seen)
+        return seeders * 0.5 ** (age / self.seeder_half_life)
+
+    def add(self, torrents, category=None):
+        """
+        Upsert scraped rows in one transaction, keyed by infohash where known. A row
+        first seen without a magnet (1337x listings) is keyed by its detail page until
+        a sighting with the magnet moves it onto the infohash.
+        """
+        now = time.time()
+        rows = []
+        for torrent in torrents:
+            key = torrent.get('infohash') or torrent.get('detail_url')
+            if not key or not torrent.get('title'):
+                continue
+
+            size = torrent.get('size')
+            rows.append({
+                'key': key,
+                'infohash': torrent.get('infohash'),
+                'title': torrent['title'],
+                'size': size,
+                'size_bytes': torrent.get('size_bytes', parse_file_size(size)),
+                'seeders': torrent.get('seeders', 0),
+                'leechers': torrent.get('leechers', 0),
+                'magnet_link': torrent.get('magnet_link'),
+                'detail_url': torrent.get('detail_url'),
+                'quality': torrent.get('quality'),
+                'provider': torrent.get('provider'),
+                'category': category or torrent.get('category'),
+                'last_seen': now
+            })
+
+        if rows:
+            conn = self._connect()
+            with conn:
+                for row in rows:
+                    if row['infohash'] and row['detail_url']:
+                        self._rekey(conn, row)
+                    elif not row['infohash']:
+                        alias = conn.execute(
+                            'SELECT key FROM torrent_aliases WHERE detail_url = ?', (row['detail_url'],)
+                        ).fetchone()
+                        if alias:
+                            row['key'] = alias['key']
+                conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def _rekey(self, conn, row):
+        """Remember the detail page of an infohash and fold the row keyed by that page into it"""
+        conn.execute(
+            'INSERT OR REPLACE INTO torrent_aliases (detail_url, key) VALUES (?, ?)',
+            (row['detail_url'], row['key'])
+        )
+        stale = conn.execute('SELECT category FROM torrents WHERE key = ?', (row['detail_url'],)).fetchone()
+        if stale:
+            conn.execute('DELETE FROM torrents WHERE key = ?', (row['detail_url'],))
+            row['category'] = row['category'] or stale['category']
+
+    def search(self, query, limit=20, category=None):
+        """Answer a query from the index, ordered by decayed seeder count"""
+        match = self._match_expression(query)
+        if not match:
+            return []
+
+        sql = """
+            SELECT t.*, decayed(t.seeders, t.last_seen, ?) AS decayed_seeders
+            FROM torrents_fts JOIN torrents t ON t.id = torrents_fts.rowid
+            WHERE torrents_fts MATCH ?
+        """
+        params = [time.time(), match]
+        if category:
+            sql += " AND t.category = ?"
+            params.append(category)
+        sql += " ORDER BY decayed_seeders DESC LIMIT ?"
+        params.append(limit)
+
+        return [self._to_result(row) for row in self._connect().execute(sql, params)]
+
+    def popular(self, category, limit=15):
+        """Best seeded rows of a category, used when upstream popular lists are unavailable"""
+        rows = self._connect().execute(
+            """
+            SELECT *, decayed(seeders, last_seen, ?) AS decayed_seeders FROM torrents
+            WHERE category = ? ORDER BY decayed_seeders DESC LIMIT ?
+            """,
+            (time.time(), category, limit)
+        )
+        return [self._to_result(row) for row in rows]
+
+    def count(self):
+        return self._connect().execute('SELECT COUNT(*) FROM torrents').fetchone()[0]
+
+    def prune(self, max_age):
+        """Drop rows not seen for max_age seconds, and aliases pointing at them"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute('DELETE FROM torrents WHERE last_seen < ?', (time.time() - max_age,))
+            conn.execute('DELETE FROM torrent_aliases WHERE key NOT IN (SELECT key FROM torrents)')
+        return cursor.rowcount
+
+    def _match_expression(self, query):
+        # Every word must appear; quoting keeps FTS5 operators in user input literal
+        terms = [term.replace('"', '""') for term in (query or '').split()]
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def _to_result(self, row):
+        return {
+            'title': row['title'],
+            'size': row['size'],
+            'size_bytes': row['size_bytes'],
+            'seeders': int(round(row['decayed_seeders'])),
+            'seeders_seen': row['seeders'],
+            'leechers': row['leechers'],
+            'quality': row['quality'],
+            'magnet_link': row['magnet_link'],
+            'infohash': row['infohash'],
+            'detail_url': row['detail_url'],
+            'provider': row['provider'],
+            'category': row['category'],
+            'last_seen': datetime.fromtimestamp(row['last_seen'], timezone.utc).isoformat()
+        }
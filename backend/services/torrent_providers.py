@@ -0,0 +1,236 @@
+"""
+Torrent Providers - Pluggable torrent index scrapers used by TorrentService
+"""
+
+import requests
+import cloudscraper
+from bs4 import BeautifulSoup
+from urllib.parse import quote, urljoin
+from utils.helpers import extract_infohash, format_file_size, parse_file_size
+from utils.mirrors import MirrorPool
+
+class TorrentProvider:
+    """Base class for a torrent index that TorrentService can fan out to"""
+
+    name = 'base'
+    default_base_url = None
+
+    def __init__(self, base_url=None, timeout=10, enabled=True, mirrors=None):
+        # Every request goes through the mirror pool, a single base URL is a pool of one
+        self.mirrors = MirrorPool(mirrors or [base_url or self.default_base_url])
+        self.timeout = timeout
+        self.enabled = enabled
+
+    @property
+    def base_url(self):
+        return self.mirrors.primary.base_url
+
+    def search(self, query, page=1):
+        """Return a list of torrent rows matching query"""
+        raise NotImplementedError
+
+    def popular(self, category='movies'):
+        """Return a list of popular torrent rows for a category"""
+        raise NotImplementedError
+
+    def _get(self, path, session, **kwargs):
+        """GET path from the healthiest mirror, hedging when it is slow"""
+        return self.mirrors.fetch(path, lambda url: session.get(url, timeout=self.timeout, **kwargs))
+
+    def _make_row(self, title, size, seeders, leechers=0, magnet_link=None, detail_url=None, size_bytes=None):
+        """Build a result row in the shape TorrentService merges"""
+        return {
+            'title': title,
+            'size': size,
+            'size_bytes': size_bytes if size_bytes is not None else parse_file_size(size),
+            'seeders': seeders,
+            'leechers': leechers,
+            'magnet_link': magnet_link,
+            'infohash': extract_infohash(magnet_link),
+            'detail_url': detail_url,
+            'provider': self.name
+        }
+
+class X1337Provider(TorrentProvider):
+    """Scrapes search and popular listings from 1337x"""
+
+    name = '1337x'
+    default_base_url = 'https://www.1337x.to'
+
+    category_paths = {
+        'movies': '/popular-movies',
+        'tv': '/popular-tv',
+        'games': '/popular-games',
+        'music': '/popular-music',
+        'apps': '/popular-applications'
+    }
+
+    def search(self, query, page=1):
+        # Use cloudscraper to bypass Cloudflare
+        scraper = cloudscraper.create_scraper()
+
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+
+        response = self._get(f"/search/{query}/{page}/", scraper, headers=headers)
+
+        torrents = []
+        for row in self._parse_rows(response.text)[:20]:  # Limit to 20 results
+            try:
+                title_cell = row.select_one("td.name a")
+                if not title_cell:
+                    continue
+
+                detail_page = urljoin(response.url, title_cell['href'])
+                magnet_link = self._get_magnet_link(title_cell['href'], scraper)
+
+                torrents.append(self._make_row(
+                    title_cell.text.strip(),
+                    self._cell_text(row, "td.size", "Unknown"),
+                    self._cell_int(row, "td.seeds"),
+                    self._cell_int(row, "td.leeches"),
+                    magnet_link,
+                    detail_page
+                ))
+
+            except Exception as e:
+                continue  # Skip problematic entries
+
+        return torrents
+
+    def popular(self, category='movies'):
+        path = self.category_paths.get(category, self.category_paths['movies'])
+
+        scraper = cloudscraper.create_scraper()
+        response = self._get(path, scraper)
+
+        torrents = []
+        for row in self._parse_rows(response.text)[:15]:  # Limit to 15 popular items
+            try:
+                title_cell = row.select_one("td.name a")
+                if not title_cell:
+                    continue
+
+                torrents.append(self._make_row(
+                    title_cell.text.strip(),
+                    self._cell_text(row, "td.size", "Unknown"),
+                    self._cell_int(row, "td.seeds"),
+                    self._cell_int(row, "td.leeches"),
+                    detail_url=urljoin(response.url, title_cell['href'])
+                ))
+
+            except Exception as e:
+                continue
+
+        return torrents
+
+    def _parse_rows(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        return soup.select("table.table-list tbody tr")
+
+    def _cell_text(self, row, selector, default=None):
+        cell = row.select_one(selector)
+        return cell.text.strip() if cell else default
+
+    def _cell_int(self, row, selector):
+        text = self._cell_text(row, selector, '')
+        return int(text) if text.isdigit() else 0
+
+    def _get_magnet_link(self, detail_path, scraper):
+        """Extract magnet link from torrent detail page"""
+        try:
+            response = self._get(detail_path, scraper)
+
+            soup = BeautifulSoup(response.text, 'html.parser')
+
+            # Look for magnet link
+            magnet_link = soup.find("a", href=lambda x: x and x.startswith("magnet:"))
+            if magnet_link:
+                return magnet_link['href']
+
+            # Alternative search patterns
+            magnet_patterns = [
+                'a[href^="magnet:"]',
+                'a:contains("Magnet Download")',
+                '.magnet-download a'
+            ]
+
+            for pattern in magnet_patterns:
+                element = soup.select_one(pattern)
+                if element and element.get('href'):
+                    return element['href']
+
+            return None
+
+        except Exception as e:
+            return None
+
+class ApibayProvider(TorrentProvider):
+    """Queries the apibay JSON API that backs The Pirate Bay"""
+
+    name = 'apibay'
+    default_base_url = 'https://apibay.org'
+
+    category_codes = {
+        'movies': 201,
+        'tv': 205,
+        'games': 400,
+        'music': 101,
+        'apps': 300
+    }
+
+    def search(self, query, page=1):
+        # apibay has no paging, everything is returned on the first page
+        if page > 1:
+            return []
+
+        response = self._get('/q.php', requests, params={'q': query, 'cat': 0})
+        return self._parse_entries(response.json()[:20])
+
+    def popular(self, category='movies'):
+        code = self.category_codes.get(category, self.category_codes['movies'])
+        response = self._get(f"/precompiled/data_top100_{code}.json", requests)
+        return self._parse_entries(response.json()[:15])
+
+    def _parse_entries(self, entries):
+        torrents = []
+        for entry in entries:
+            try:
+                infohash = entry.get('info_hash', '')
+                # An all-zero hash is how apibay reports "No results returned"
+                if not infohash or not infohash.strip('0'):
+                    continue
+
+                name = entry.get('name', '')
+                magnet_link = f"magnet:?xt=urn:btih:{infohash}&dn={quote(name)}"
+                size_bytes = int(entry.get('size', 0))
+
+                torrents.append(self._make_row(
+                    name,
+                    format_file_size(size_bytes),
+                    int(entry.get('seeders', 0)),
+                    int(entry.get('leechers', 0)),
+                    magnet_link,
+                    f"{self.base_url}/description.php?id={entry.get('id')}",
+                    size_bytes=size_bytes
+                ))
+
+            except Exception as e:
+                continue
+
+        return torrents
+
+# Providers available to TorrentService, keyed by the names used in configuration
+PROVIDERS = {
+    X1337Provider.name: X1337Provider,
+    ApibayProvider.name: ApibayProvider
+}
+
+def create_providers(names, timeout=10, mirrors=None):
+    """Instantiate providers by name, ignoring unknown names; mirrors maps a name to base URLs"""
+    mirrors = mirrors or {}
+    return [
+        PROVIDERS[name](timeout=timeout, mirrors=mirrors.get(name))
+        for name in names if name in PROVIDERS
+    ]
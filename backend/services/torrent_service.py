@@ -2,87 +2,119 @@
 Torrent Service - Handles torrent search and management
 """
 
-import requests
-import cloudscraper
-from bs4 import BeautifulSoup
 from flask import jsonify
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+import base64
+import hashlib
+import json
+import shutil
 import subprocess
+import threading
+import time
 import os
+from services.torrent_providers import X1337Provider, create_providers
+from utils.helpers import parse_file_size
+from utils.release_parser import parse_release_name
+from utils import metrics, resilience
+
+# Quality labels from best to worst, used for server-side sorting
+QUALITY_RANK = {'4K': 5, '1080p': 4, '720p': 3, '480p': 2, 'HD': 1, 'SD': 0}
+
+SORT_KEYS = {
+    'seeders': lambda t: t.get('seeders') or 0,
+    'size': lambda t: t.get('size_bytes') or 0,
+    'quality': lambda t: (QUALITY_RANK.get(t.get('quality'), 0), t.get('seeders') or 0)
+}
 
 class TorrentService:
-    def __init__(self):
+    def __init__(self, providers=None, search_deadline=8, mirrors=None, index=None, qbittorrent=None,
+                 index_max_age=None):
         self.qbittorrent_path = os.path.join("resources", "qbittorrent.exe")
+        # Optional QBittorrentService for adding torrents through the Web API
+        self.qbittorrent = qbittorrent
+        
+        # Providers are either instances or configured names, 1337x alone by default
+        if providers is None:
+            providers = [X1337Provider()]
+        elif providers and isinstance(providers[0], str):
+            providers = create_providers(providers, mirrors=mirrors)
+        self.providers = providers
+        
+        # Searches return whatever has arrived once the deadline passes
+        self.search_deadline = search_deadline
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='torrent-provider')
+        # Prefetches and index refreshes wait on provider futures, so they get their own pool
+        self._background = ThreadPoolExecutor(max_workers=4, thread_name_prefix='torrent-background')
+        
+        # Upstream pages by (query, page), each a future so concurrent readers share one fetch
+        self._pages = OrderedDict()
+        self._pages_lock = threading.Lock()
+        self.page_cache_size = 64
+        self.page_cache_ttl = 300
+        # browse_torrents fetches upstream pages this many at a time, and reads no more than browse_max_pages
+        self.browse_window_pages = 5
+        self.browse_max_pages = 20
+        
+        # Optional TorrentIndex that remembers every row we scrape
+        self.index = index
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        # Rows not seen for index_max_age seconds are pruned, at most once per index_prune_interval
+        self.index_max_age = index_max_age
+        self.index_prune_interval = 3600
+        self._next_prune = 0
         
-    def search_torrents(self, query, page=1):
-        """Search torrents from 1337x"""
+    def search_torrents(self, query, page=1, local_first=False):
+        """Search torrents across every enabled provider, or answer from the local index first"""
         try:
-            base_url = "https://www.1337x.to"
-            search_url = f"{base_url}/search/{query}/{page}/"
-            
-            # Use cloudscraper to bypass Cloudflare
-            scraper = cloudscraper.create_scraper()
-            
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            
-            response = scraper.get(search_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, "html.parser")
+            if local_first and self.index and page == 1:
+                cached = self.index.search(query, limit=20)
+                if cached:
+                    self._refresh_async(query, page)
+                    return {
+                        'success': True,
+                        'results': cached,
+                        'count': len(cached),
+                        'source': 'index',
+                        'refreshing': True
+                    }
             
-            torrents = []
-            rows = soup.select("table.table-list tbody tr")
+            outcome = self._fan_out('search', query, page)
             
-            if not rows:
+            if outcome['results'] is None:
+                # Upstream is unreachable, the index is better than nothing
+                cached = self.index.search(query, limit=20) if self.index else []
+                if cached:
+                    return {
+                        'success': True,
+                        'results': cached,
+                        'count': len(cached),
+                        'source': 'index',
+                        'providers': outcome['providers'],
+                        'message': 'Upstream unavailable, showing indexed results'
+                    }
                 return {
-                    'success': True,
-                    'results': [],
-                    'message': 'No results found'
+                    'success': False,
+                    'error': outcome['error'],
+                    'providers': outcome['providers']
                 }
             
-            for row in rows[:20]:  # Limit to 20 results
-                try:
-                    title_cell = row.select_one("td.name a")
-                    if not title_cell:
-                        continue
-                        
-                    title = title_cell.text.strip()
-                    detail_page = base_url + title_cell['href']
-                    
-                    size_cell = row.select_one("td.size")
-                    size = size_cell.text.strip() if size_cell else "Unknown"
-                    
-                    seeders_cell = row.select_one("td.seeds")
-                    seeders = int(seeders_cell.text.strip()) if seeders_cell and seeders_cell.text.strip().isdigit() else 0
-                    
-                    leechers_cell = row.select_one("td.leeches")
-                    leechers = int(leechers_cell.text.strip()) if leechers_cell and leechers_cell.text.strip().isdigit() else 0
-                    
-                    # Determine quality based on title keywords
-                    quality = self._determine_quality(title)
-                    
-                    # Get magnet link
-                    magnet_link = self._get_magnet_link(detail_page, scraper)
-                    
-                    torrents.append({
-                        'title': title,
-                        'size': size,
-                        'seeders': seeders,
-                        'leechers': leechers,
-                        'quality': quality,
-                        'magnet_link': magnet_link,
-                        'detail_url': detail_page
-                    })
-                    
-                except Exception as e:
-                    continue  # Skip problematic entries
+            torrents = outcome['results'][:20]  # Limit to 20 results
+            self._index_results(torrents)
             
-            return {
+            response = {
                 'success': True,
                 'results': torrents,
-                'count': len(torrents)
+                'count': len(torrents),
+                'source': 'upstream',
+                'providers': outcome['providers'],
+                'partial': outcome['partial']
             }
+            if not torrents:
+                response['message'] = 'No results found'
+            
+            return response
             
         except Exception as e:
             return {
@@ -90,59 +122,348 @@ class TorrentService:
                 'error': str(e)
             }
     
-    def _determine_quality(self, title):
-        """Determine video quality from title"""
-        title_lower = title.lower()
-        
-        if any(keyword in title_lower for keyword in ['4k', '2160p', 'uhd']):
-            return '4K'
-        elif any(keyword in title_lower for keyword in ['1080p', 'fhd']):
-            return '1080p'
-        elif any(keyword in title_lower for keyword in ['720p', 'hd']):
-            return '720p'
-        elif any(keyword in title_lower for keyword in ['480p']):
-            return '480p'
-        elif any(keyword in title_lower for keyword in ['bluray', 'brrip', 'webrip']):
-            return 'HD'
-        else:
-            return 'SD'
-    
-    def _get_magnet_link(self, detail_url, scraper):
-        """Extract magnet link from torrent detail page"""
+    def browse_torrents(self, query, sort='seeders', order='desc', filters=None, cursor=None, limit=20):
+        """
+        Sorted, filtered search with cursor pagination across upstream pages.
+        
+        Upstream pages are fetched `browse_window_pages` at a time, merged and sorted
+        as one list, so the order is global over every page fetched so far. When a
+        cursor page runs past the rows fetched, the next pages are fetched, up to
+        `browse_max_pages`; a response cut off there says `truncated`. The cursor holds
+        the sort position of the last row returned, so a row first seen on a later
+        upstream page that ranks above rows already returned is skipped, not repeated.
+        """
         try:
-            response = scraper.get(detail_url, timeout=10)
-            if response.status_code != 200:
-                return None
+            try:
+                limit = self._check_browse_options(sort, order, limit)
+                filters = self._normalize_filters(filters or {})
+            except ValueError as e:
+                return {'success': False, 'error': str(e), 'invalid': True}
+            signature = self._browse_signature(query, sort, order, filters)
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            after = None
+            pages = min(self.browse_window_pages, self.browse_max_pages)
+            if cursor:
+                state = self._decode_cursor(cursor)
+                if not state or state.get('sig') != signature:
+                    return {'success': False, 'error': 'Invalid cursor', 'invalid': True}
+                after, pages = state['after'], min(state['pages'], self.browse_max_pages)
             
-            # Look for magnet link
-            magnet_link = soup.find("a", href=lambda x: x and x.startswith("magnet:"))
-            if magnet_link:
-                return magnet_link['href']
+            descending = order == 'desc'
+            while True:
+                window, scanned, exhausted, partial = self._get_window(query, pages)
+                matching = sorted(
+                    (t for t in window if self._matches(t, filters)),
+                    key=lambda t: self._position(t, sort), reverse=descending
+                )
+                total = len(matching)
+                if after is not None:
+                    matching = [t for t in matching if (self._position(t, sort) < after) == descending
+                                and self._position(t, sort) != after]
+                # One row past the page is enough to know there is a next one
+                if len(matching) > limit or exhausted or partial or pages >= self.browse_max_pages:
+                    break
+                pages = min(pages + self.browse_window_pages, self.browse_max_pages)
             
-            # Alternative search patterns
-            magnet_patterns = [
-                'a[href^="magnet:"]',
-                'a:contains("Magnet Download")',
-                '.magnet-download a'
-            ]
+            results = matching[:limit]
+            next_cursor = None
+            if len(matching) > limit:
+                next_cursor = self._encode_cursor(signature, self._position(results[-1], sort), pages)
             
-            for pattern in magnet_patterns:
-                element = soup.select_one(pattern)
-                if element and element.get('href'):
-                    return element['href']
-            
-            return None
+            return {
+                'success': True,
+                'results': results,
+                'count': len(results),
+                'total': total,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None,
+                'sort': sort,
+                'order': order,
+                'filters': filters,
+                'pages_scanned': scanned,
+                'partial': partial,
+                # Upstream may have more pages than browse_max_pages lets us read
+                'truncated': not exhausted and not partial and pages >= self.browse_max_pages
+            }
             
         except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def _get_window(self, query, pages):
+        """Rows of the first `pages` upstream pages, deduped; also whether upstream ran out and whether a page failed"""
+        futures = [self._page_future(query, page) for page in range(1, pages + 1)]
+        merged = {}
+        scanned = 0
+        for page, future in enumerate(futures, start=1):
+            try:
+                rows = future.result()
+            except Exception:
+                if page == 1:
+                    raise
+                # A later page failing still leaves a sorted, smaller window
+                return list(merged.values()), scanned, False, True
+            if not rows:
+                return list(merged.values()), scanned, True, False
+            scanned += 1
+            for row in rows:
+                merged.setdefault(self._row_id(row), row)
+        return list(merged.values()), scanned, False, False
+    
+    @staticmethod
+    def _row_id(row):
+        return row.get('infohash') or row.get('detail_url') or row['title']
+    
+    def _position(self, row, sort):
+        # The row id breaks ties, so every row has its own place in the order
+        return (SORT_KEYS[sort](row), self._row_id(row))
+    
+    def _page_future(self, query, page):
+        """Cached future for one merged upstream page, fetching it if missing or stale"""
+        key = (query.lower(), page)
+        now = time.monotonic()
+        with self._pages_lock:
+            entry = self._pages.get(key)
+            if entry and now - entry[0] < self.page_cache_ttl:
+                self._pages.move_to_end(key)
+                metrics.cache_lookup('torrent_pages', hit=True)
+                return entry[1]
+            metrics.cache_lookup('torrent_pages', hit=False)
+            
+            future = self._background.submit(self._fetch_page, query, page)
+            self._pages[key] = (now, future)
+            while len(self._pages) > self.page_cache_size:
+                self._pages.popitem(last=False)
+        
+        def forget_failure(done):
+            if done.exception() is not None:
+                with self._pages_lock:
+                    if self._pages.get(key, (None, None))[1] is done:
+                        del self._pages[key]
+        
+        future.add_done_callback(forget_failure)
+        return future
+    
+    def _fetch_page(self, query, page):
+        outcome = self._fan_out('search', query, page)
+        if outcome['results'] is None:
+            raise RuntimeError(outcome['error'])
+        self._index_results(outcome['results'])
+        return outcome['results']
+    
+    def _check_browse_options(self, sort, order, limit):
+        """The page size capped at 100; ValueError for an unknown sort or order, or a limit that is not a count"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unsupported sort '{sort}'")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"order must be 'asc' or 'desc', not {order!r}")
+        if isinstance(limit, bool):
+            limit = None
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValueError(f"limit must be a whole number, not {limit!r}")
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+        return min(limit, 100)
+    
+    def _normalize_filters(self, filters):
+        """Filters with sizes in bytes; ValueError names the first value that makes no sense"""
+        if not isinstance(filters, dict):
+            raise ValueError('filters must be an object')
+        normalized = {}
+        if filters.get('min_seeders') not in (None, ''):
+            try:
+                normalized['min_seeders'] = int(filters['min_seeders'])
+            except (TypeError, ValueError):
+                raise ValueError(f"min_seeders must be a whole number, not {filters['min_seeders']!r}")
+            if normalized['min_seeders'] < 0:
+                raise ValueError('min_seeders cannot be negative')
+        if filters.get('qualities'):
+            qualities = filters['qualities']
+            if isinstance(qualities, str):
+                qualities = [qualities]
+            if not isinstance(qualities, list) or not all(isinstance(q, str) for q in qualities):
+                raise ValueError(f"qualities must be a quality or a list of them, not {filters['qualities']!r}")
+            normalized['qualities'] = sorted(set(qualities))
+        for bound in ('min_size', 'max_size'):
+            value = filters.get(bound)
+            if value in (None, ''):
+                continue
+            size = int(value) if str(value).isdigit() else parse_file_size(str(value))
+            if size is None:
+                raise ValueError(f"{bound} must be a byte count or a size like '1.5 GB', not {value!r}")
+            normalized[bound] = size
+        return normalized
+    
+    def _matches(self, torrent, filters):
+        if torrent.get('seeders', 0) < filters.get('min_seeders', 0):
+            return False
+        if 'qualities' in filters and torrent.get('quality') not in filters['qualities']:
+            return False
+        size = torrent.get('size_bytes')
+        if 'min_size' in filters and (size is None or size < filters['min_size']):
+            return False
+        if 'max_size' in filters and (size is None or size > filters['max_size']):
+            return False
+        return True
+    
+    def _browse_signature(self, query, sort, order, filters):
+        raw = json.dumps([query.lower(), sort, order, filters], sort_keys=True)
+        return hashlib.sha1(raw.encode()).hexdigest()[:12]
+    
+    def _encode_cursor(self, signature, after, pages):
+        raw = json.dumps({'sig': signature, 'after': after, 'pages': pages}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+    
+    def _decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            key, row_id = state['after']
+            if not isinstance(state['pages'], int) or state['pages'] < 1:
+                return None
+            # JSON turned the tuple keys into lists
+            state['after'] = (tuple(key) if isinstance(key, list) else key, row_id)
+            return state
+        except Exception:
             return None
     
+    def _refresh_async(self, query, page):
+        """Re-scrape a query in the background so the index stays fresh"""
+        key = (query.lower(), page)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                outcome = self._fan_out('search', query, page)
+                if outcome['results']:
+                    self._index_results(outcome['results'])
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        self._background.submit(refresh)
+    
+    def _index_results(self, torrents, category=None):
+        if not self.index:
+            return
+        try:
+            self.index.add(torrents, category=category)
+        except Exception as e:
+            # Indexing is best effort and must never fail a search
+            print(f"Torrent index error: {e}")
+        self._prune_index_when_due()
+    
+    def _prune_index_when_due(self):
+        """Drop stale index rows in the background, once per index_prune_interval"""
+        if not self.index_max_age:
+            return
+        now = time.monotonic()
+        with self._refresh_lock:
+            if now < self._next_prune:
+                return
+            self._next_prune = now + self.index_prune_interval
+        
+        def prune():
+            try:
+                self.index.prune(self.index_max_age)
+            except Exception as e:
+                print(f"Torrent index error: {e}")
+        
+        self._background.submit(prune)
+    
+    def _fan_out(self, method, *args):
+        """Call method on every enabled provider at once and merge rows as they arrive"""
+        providers = [p for p in self.providers if p.enabled]
+        futures = {
+            self._executor.submit(getattr(provider, method), *args): provider
+            for provider in providers
+        }
+        
+        merged = {}
+        statuses = {}
+        partial = False
+        
+        try:
+            for future in as_completed(futures, timeout=self.search_deadline):
+                provider = futures[future]
+                try:
+                    rows = future.result()
+                    statuses[provider.name] = {'success': True, 'count': len(rows)}
+                    self._merge_rows(merged, rows)
+                except Exception as e:
+                    statuses[provider.name] = {'success': False, 'error': str(e)}
+        except FuturesTimeoutError:
+            # Deadline passed: answer with what has arrived, stragglers finish in the background
+            partial = True
+            for future, provider in futures.items():
+                if not future.done():
+                    future.cancel()
+                    statuses[provider.name] = {'success': False, 'error': 'Deadline exceeded'}
+        
+        if providers and not merged and not any(s['success'] for s in statuses.values()):
+            errors = '; '.join(f"{name}: {s['error']}" for name, s in statuses.items())
+            return {'results': None, 'error': errors, 'providers': statuses, 'partial': partial}
+        
+        results = sorted(merged.values(), key=lambda t: t['seeders'], reverse=True)
+        for torrent in results:
+            release = parse_release_name(torrent['title'])
+            torrent['quality'] = release.pop('quality')
+            torrent['release'] = release
+        
+        return {'results': results, 'providers': statuses, 'partial': partial}
+    
+    def _merge_rows(self, merged, rows):
+        """Dedupe rows by infohash, keeping the best swarm counts seen for each torrent"""
+        for row in rows:
+            key = row.get('infohash') or row.get('detail_url') or row['title']
+            existing = merged.get(key)
+            
+            if existing is None:
+                row['sources'] = [row['provider']]
+                merged[key] = row
+                continue
+            
+            if row['provider'] not in existing['sources']:
+                existing['sources'].append(row['provider'])
+            existing['seeders'] = max(existing['seeders'], row['seeders'])
+            existing['leechers'] = max(existing.get('leechers', 0), row.get('leechers', 0))
+            if not existing.get('magnet_link') and row.get('magnet_link'):
+                existing['magnet_link'] = row['magnet_link']
+    
+    def get_upstream_status(self):
+        """Mirror health scores, circuit breakers and concurrency limits for monitoring"""
+        return {
+            'success': True,
+            'providers': {
+                provider.name: {
+                    'enabled': provider.enabled,
+                    'mirrors': provider.mirrors.scores()
+                }
+                for provider in self.providers
+            },
+            **resilience.snapshot()
+        }
+    
+    def _determine_quality(self, title):
+        """Determine video quality from title"""
+        return parse_release_name(title)['quality']
+    
     def launch_qbittorrent(self):
         """Launch qBittorrent application"""
         try:
-            if os.path.exists(self.qbittorrent_path):
-                subprocess.Popen(self.qbittorrent_path)
+            # Bundled Windows build first, then whatever is installed on the PATH
+            executable = self.qbittorrent_path if os.path.exists(self.qbittorrent_path) else (
+                shutil.which('qbittorrent') or shutil.which('qbittorrent-nox')
+            )
+            if executable:
+                subprocess.Popen(executable)
                 return {
                     'success': True,
                     'message': 'qBittorrent launched successfully'
@@ -159,14 +480,21 @@ class TorrentService:
                 'error': str(e)
             }
     
-    def add_torrent_to_qbittorrent(self, magnet_link):
+    def add_torrent_to_qbittorrent(self, magnet_link, username=None):
         """Add torrent to qBittorrent via magnet link"""
+        return self.add_torrents_to_qbittorrent([magnet_link], username)
+    
+    def add_torrents_to_qbittorrent(self, magnet_links, username=None, category=None):
+        """Add a batch of magnet links to qBittorrent in one Web API call"""
         try:
-            # This would require qBittorrent Web API setup
-            # For now, we'll just return the magnet link for manual addition
+            if self.qbittorrent:
+                return self.qbittorrent.add_torrents(magnet_links, username=username, category=category)
+            
+            # Without the Web API configured, hand the magnet links back for manual addition
             return {
                 'success': True,
-                'magnet_link': magnet_link,
+                'magnet_link': magnet_links[0] if len(magnet_links) == 1 else None,
+                'magnet_links': magnet_links,
                 'message': 'Use this magnet link in your torrent client'
             }
             
@@ -179,61 +507,39 @@ class TorrentService:
     def get_popular_torrents(self, category='movies'):
         """Get popular torrents by category"""
         try:
-            base_url = "https://www.1337x.to"
-            
-            category_urls = {
-                'movies': f"{base_url}/popular-movies",
-                'tv': f"{base_url}/popular-tv",
-                'games': f"{base_url}/popular-games",
-                'music': f"{base_url}/popular-music",
-                'apps': f"{base_url}/popular-applications"
-            }
-            
-            url = category_urls.get(category, category_urls['movies'])
-            
-            scraper = cloudscraper.create_scraper()
-            response = scraper.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, "html.parser")
+            outcome = self._fan_out('popular', category)
             
-            torrents = []
-            rows = soup.select("table.table-list tbody tr")
+            if outcome['results'] is None:
+                # Circuits open or upstream down: serve the last popular rows we saw
+                cached = self.index.popular(category) if self.index else []
+                if cached:
+                    return {
+                        'success': True,
+                        'results': cached,
+                        'category': category,
+                        'count': len(cached),
+                        'source': 'index',
+                        'providers': outcome['providers'],
+                        'message': 'Upstream unavailable, showing indexed results'
+                    }
+                return {
+                    'success': False,
+                    'error': outcome['error'],
+                    'providers': outcome['providers']
+                }
             
-            for row in rows[:15]:  # Limit to 15 popular items
-                try:
-                    title_cell = row.select_one("td.name a")
-                    if not title_cell:
-                        continue
-                        
-                    title = title_cell.text.strip()
-                    detail_page = base_url + title_cell['href']
-                    
-                    size_cell = row.select_one("td.size")
-                    size = size_cell.text.strip() if size_cell else "Unknown"
-                    
-                    seeders_cell = row.select_one("td.seeds")
-                    seeders = int(seeders_cell.text.strip()) if seeders_cell and seeders_cell.text.strip().isdigit() else 0
-                    
-                    quality = self._determine_quality(title)
-                    
-                    torrents.append({
-                        'title': title,
-                        'size': size,
-                        'seeders': seeders,
-                        'quality': quality,
-                        'detail_url': detail_page,
-                        'category': category
-                    })
-                    
-                except Exception as e:
-                    continue
+            torrents = outcome['results'][:15]  # Limit to 15 popular items
+            for torrent in torrents:
+                torrent['category'] = category
+            self._index_results(torrents, category)
             
             return {
                 'success': True,
                 'results': torrents,
                 'category': category,
-                'count': len(torrents)
+                'count': len(torrents),
+                'providers': outcome['providers'],
+                'partial': outcome['partial']
             }
             
         except Exception as e:
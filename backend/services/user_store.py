@@ -0,0 +1,238 @@
+"""
+User Store - Indexed persistence for user accounts, with the legacy JSON file as an option
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_login TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    profile TEXT NOT NULL DEFAULT '{}'
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Bumped by every profile-visible change, from any process; last_login flushes are left out
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('revision', 0);
+CREATE TRIGGER IF NOT EXISTS users_revision_insert AFTER INSERT ON users BEGIN
+    UPDATE store_meta SET value = value + 1 WHERE key = 'revision';
+END;
+CREATE TRIGGER IF NOT EXISTS users_revision_update AFTER UPDATE OF username, email, is_active, profile ON users BEGIN
+    UPDATE store_meta SET value = value + 1 WHERE key = 'revision';
+END;
+CREATE TRIGGER IF NOT EXISTS users_revision_delete AFTER DELETE ON users BEGIN
+    UPDATE store_meta SET value = value + 1 WHERE key = 'revision';
+END;
+"""
+
+COLUMNS = ('username', 'email', 'password_hash', 'created_at', 'last_login', 'is_active', 'profile')
+
+class UserExistsError(Exception):
+    """Raised when a username or email is already registered"""
+
+    def __init__(self, field):
+        super().__init__(f"{field} already exists")
+        self.field = field
+
+class SQLiteUserStore:
+    """Users in a SQLite table with unique indexes on username and email"""
+
+    def __init__(self, db_path='users.db', migrate_from=None):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+        if migrate_from:
+            self.migrate_from_json(migrate_from)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, username):
+        row = self._connect().execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+        return self._to_user(row) if row else None
+
+    def email_exists(self, email):
+        return self._connect().execute('SELECT 1 FROM users WHERE email = ?', (email,)).fetchone() is not None
+
+    def create(self, user):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    f"INSERT INTO users ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    self._to_row(user)
+                )
+        except sqlite3.IntegrityError as e:
+            raise UserExistsError('Email' if 'email' in str(e) else 'Username') from e
+
+    def update(self, username, **fields):
+        """Set the given columns of one user; profile is stored as JSON"""
+        if 'profile' in fields:
+            fields['profile'] = json.dumps(fields['profile'])
+        assignments = ', '.join(f"{column} = ?" for column in fields if column in COLUMNS)
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE users SET {assignments} WHERE username = ?",
+                [value for column, value in fields.items() if column in COLUMNS] + [username]
+            )
+        return cursor.rowcount > 0
+
+    def record_logins(self, logins):
+        """Apply {username: last_login} in one transaction"""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                'UPDATE users SET last_login = ? WHERE username = ?',
+                [(timestamp, username) for username, timestamp in logins.items()]
+            )
+
+    def count(self):
+        return self._connect().execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+    def data_version(self):
+        """Revision counter kept by triggers, so writes by other worker processes invalidate cached profiles"""
+        row = self._connect().execute("SELECT value FROM store_meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else None
+
+    def migrate_from_json(self, users_file):
+        """One-time import of a legacy users_data.json; later calls are no-ops"""
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM store_meta WHERE key = 'migrated_from'").fetchone():
+            return 0
+        if not os.path.exists(users_file):
+            return 0
+
+        with open(users_file, 'r') as f:
+            users = json.load(f)
+
+        with conn:
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO users ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [self._to_row(dict(user, username=username)) for username, user in users.items()]
+            )
+            conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES ('migrated_from', ?)",
+                (os.path.abspath(users_file),)
+            )
+        return cursor.rowcount
+
+    def _to_row(self, user):
+        return (
+            user['username'],
+            user['email'],
+            user['password_hash'],
+            user['created_at'],
+            user.get('last_login'),
+            int(user.get('is_active', True)),
+            json.dumps(user.get('profile', {}))
+        )
+
+    def _to_user(self, row):
+        user = {column: row[column] for column in COLUMNS}
+        user['is_active'] = bool(user['is_active'])
+        user['profile'] = json.loads(user['profile'])
+        return user
+
+class JsonUserStore:
+    """The original users_data.json layout, kept for small single-user installs"""
+
+    def __init__(self, users_file='users_data.json'):
+        self.users_file = users_file
+        # Serializes read-modify-write cycles, e.g. the login flusher against a registration
+        self._lock = threading.RLock()
+        if not os.path.exists(self.users_file):
+            self._save({})
+
+    def _load(self):
+        try:
+            with open(self.users_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, users):
+        # Write a sibling temp file and rename it over the original so a crash
+        # leaves either the old or the new file, never a truncated one
+        directory = os.path.dirname(os.path.abspath(self.users_file))
+        fd, temp_path = tempfile.mkstemp(prefix='.users-', suffix='.json', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(users, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.users_file)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get(self, username):
+        user = self._load().get(username)
+        return dict(user, username=username) if user else None
+
+    def email_exists(self, email):
+        return any(user.get('email') == email for user in self._load().values())
+
+    def create(self, user):
+        with self._lock:
+            users = self._load()
+            if user['username'] in users:
+                raise UserExistsError('Username')
+            if any(existing.get('email') == user['email'] for existing in users.values()):
+                raise UserExistsError('Email')
+            users[user['username']] = user
+            self._save(users)
+
+    def update(self, username, **fields):
+        with self._lock:
+            users = self._load()
+            if username not in users:
+                return False
+            users[username].update(fields)
+            self._save(users)
+            return True
+
+    def record_logins(self, logins):
+        with self._lock:
+            users = self._load()
+            for username, timestamp in logins.items():
+                if username in users:
+                    users[username]['last_login'] = timestamp
+            self._save(users)
+
+    def count(self):
+        return len(self._load())
+
+    def data_version(self):
+        """mtime of the file, so edits by other processes invalidate cached profiles"""
+        try:
+            return os.stat(self.users_file).st_mtime_ns
+        except OSError:
+            return None
+
+def create_user_store(backend='sqlite', db_path='users.db', users_file='users_data.json'):
+    """Build the configured store; the SQLite store imports users_file once if it exists"""
+    if backend == 'json':
+        return JsonUserStore(users_file)
+    return SQLiteUserStore(db_path, migrate_from=users_file)
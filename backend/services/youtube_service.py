@@ -9,29 +9,49 @@ from flask import jsonify
 from datetime import datetime
 import tempfile
 import subprocess
+from utils.database import unit_of_work
+from utils.helpers import select_fields
+from utils.shared_state import MemoryState
+from utils import metrics
+
+# Search result fields a flat (per-playlist) extraction already carries; a search
+# asking only for these skips the full per-video extraction
+FLAT_SEARCH_FIELDS = frozenset({
+    'id', 'title', 'url', 'thumbnail', 'duration', 'duration_str', 'view_count', 'uploader', 'channel_url'
+})
+
+# Proxy stream tokens stay valid this long
+STREAM_TOKEN_TTL = 300
 
 class YouTubeService:
-    def __init__(self):
+    def __init__(self, state=None):
         self.download_folder = "downloads"
         os.makedirs(self.download_folder, exist_ok=True)
+        # Stream tokens live here; a shared backend lets any worker process serve them
+        self.state = state or MemoryState()
         
-    def search_videos(self, query, limit=20):
-        """Search YouTube videos with detailed information"""
+    def search_videos(self, query, limit=20, fields=None):
+        """Search YouTube videos with detailed information, or just the selected fields"""
         try:
+            def wanted(*names):
+                return fields is None or any(name in fields for name in names)
+
             ydl_opts = {
                 'quiet': True,
                 'skip_download': True,
-                'extract_flat': False,  # Get full info for better results
+                # Full info per video unless every requested field is in the flat listing
+                'extract_flat': 'in_playlist' if fields is not None and fields <= FLAT_SEARCH_FIELDS else False,
             }
 
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                search_result = ydl.extract_info(f"ytsearch{limit}:{query}", download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('youtube'):
+                    search_result = ydl.extract_info(f"ytsearch{limit}:{query}", download=False)
                 results = search_result.get('entries', [])
 
                 formatted_results = []
                 for entry in results:
                     # Get available formats for quality info
-                    formats = entry.get('formats', [])
+                    formats = entry.get('formats', []) if wanted('video_qualities', 'audio_qualities') else []
                     video_qualities = []
                     audio_qualities = []
 
@@ -58,9 +78,10 @@ class YouTubeService:
                     duration = entry.get('duration')
                     duration_str = "Unknown"
                     if duration:
-                        hours = duration // 3600
-                        minutes = (duration % 3600) // 60
-                        seconds = duration % 60
+                        # Flat listings report fractional seconds
+                        hours = int(duration) // 3600
+                        minutes = (int(duration) % 3600) // 60
+                        seconds = int(duration) % 60
                         if hours > 0:
                             duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
                         else:
@@ -76,7 +97,7 @@ class YouTubeService:
                                 best_thumbnail = thumb['url']
                                 break
 
-                    formatted_results.append({
+                    formatted_results.append(select_fields({
                         'id': entry.get('id'),
                         'title': entry.get('title'),
                         'url': f"https://www.youtube.com/watch?v={entry.get('id')}",
@@ -86,13 +107,13 @@ class YouTubeService:
                         'view_count': entry.get('view_count'),
                         'uploader': entry.get('uploader'),
                         'upload_date': entry.get('upload_date'),
-                        'description': entry.get('description', '')[:200] + '...' if entry.get('description') else '',
+                        'description': entry.get('description', '')[:200] + '...' if wanted('description') and entry.get('description') else '',
                         'video_qualities': video_qualities,
                         'audio_qualities': audio_qualities,
                         'like_count': entry.get('like_count'),
                         'channel_url': entry.get('channel_url'),
                         'webpage_url': entry.get('webpage_url')
-                    })
+                    }, fields, keep=()))
 
                 return {
                     'success': True,
@@ -107,8 +128,8 @@ class YouTubeService:
                 'error': str(e)
             }
     
-    def get_video_info(self, url):
-        """Get detailed video information"""
+    def get_video_info(self, url, fields=None):
+        """Get detailed video information, or just the selected fields"""
         try:
             ydl_opts = {
                 'quiet': True,
@@ -116,11 +137,17 @@ class YouTubeService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('youtube'):
+                    info = ydl.extract_info(url, download=False)
                 
+                # The quality ladder is the only part worth skipping when unrequested
+                formats = None
+                if fields is None or 'formats' in fields:
+                    formats = self._get_available_formats(info.get('formats', []))
+
                 return {
                     'success': True,
-                    'info': {
+                    'info': select_fields({
                         'id': info.get('id'),
                         'title': info.get('title'),
                         'description': info.get('description'),
@@ -130,10 +157,10 @@ class YouTubeService:
                         'uploader': info.get('uploader'),
                         'upload_date': info.get('upload_date'),
                         'thumbnail': info.get('thumbnail'),
-                        'formats': self._get_available_formats(info.get('formats', [])),
+                        'formats': formats,
                         'tags': info.get('tags', []),
                         'categories': info.get('categories', [])
-                    }
+                    }, fields, keep=())
                 }
                 
         except Exception as e:
@@ -230,15 +257,14 @@ class YouTubeService:
             if user_id:
                 try:
                     from app import db, Download
-                    download_record = Download(
-                        user_id=user_id,
-                        url=url,
-                        status='completed',
-                        download_type=download_type,
-                        quality=quality
-                    )
-                    db.session.add(download_record)
-                    db.session.commit()
+                    with unit_of_work(db.session) as session:
+                        session.add(Download(
+                            user_id=user_id,
+                            url=url,
+                            status='completed',
+                            download_type=download_type,
+                            quality=quality
+                        ))
                 except:
                     # If database operations fail, continue with download
                     pass
@@ -247,23 +273,12 @@ class YouTubeService:
             import uuid
             stream_token = str(uuid.uuid4())
             
-            # Store stream info in a temporary structure (in production, use Redis or cache)
-            if not hasattr(self, '_stream_cache'):
-                self._stream_cache = {}
-            
-            self._stream_cache[stream_token] = {
+            self.state.set(f"stream:{stream_token}", {
                 'url': url,
                 'quality': quality,
                 'download_type': download_type,
                 'timestamp': datetime.now().timestamp()
-            }
-            
-            # Clean up old cache entries (older than 5 minutes)
-            current_time = datetime.now().timestamp()
-            self._stream_cache = {
-                k: v for k, v in self._stream_cache.items() 
-                if current_time - v['timestamp'] < 300
-            }
+            }, ttl=STREAM_TOKEN_TTL)
             
             proxy_url = f"/api/youtube/stream/{stream_token}"
             filename = self._generate_filename(url, download_type)
@@ -283,7 +298,7 @@ class YouTubeService:
     
     def _download_worker(self, download_id, url, quality, download_type):
         """Background worker for downloading videos"""
-        from app import db, Download, socketio
+        from app import db, Download, socketio, batch_writer
         
         try:
             download_record = Download.query.get(download_id)
@@ -307,9 +322,8 @@ class YouTubeService:
                         percent = d.get('_percent_str', '0%').strip('%')
                         progress = float(percent) / 100
                         
-                        # Update database
-                        download_record.progress = progress
-                        db.session.commit()
+                        # Batched: progress ticks of a download coalesce into one write
+                        batch_writer.update(Download, download_id, progress=progress)
                         
                         # Emit progress via WebSocket
                         socketio.emit('download_progress', {
@@ -320,11 +334,13 @@ class YouTubeService:
                     except:
                         pass
                 elif d['status'] == 'finished':
-                    download_record.status = 'completed'
-                    download_record.progress = 1.0
-                    download_record.file_path = d['filename']
-                    download_record.completed_at = datetime.utcnow()
-                    db.session.commit()
+                    # Same path as the ticks so a late progress write cannot overtake it
+                    batch_writer.update(
+                        Download, download_id,
+                        status='completed', progress=1.0,
+                        file_path=d['filename'], completed_at=datetime.utcnow()
+                    )
+                    batch_writer.flush()
                     
                     socketio.emit('download_complete', {
                         'download_id': download_id,
@@ -339,9 +355,10 @@ class YouTubeService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                download_record.title = info.get('title', 'Unknown')
-                db.session.commit()
+                with metrics.EXTRACT_INFO_DURATION.time('youtube'):
+                    info = ydl.extract_info(url, download=False)
+                with unit_of_work(db.session):
+                    download_record.title = info.get('title', 'Unknown')
                 
                 ydl.download([url])
                 
@@ -387,7 +404,8 @@ class YouTubeService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('youtube'):
+                    info = ydl.extract_info(url, download=False)
                 
                 # Get the best format URL
                 stream_url = None
@@ -451,7 +469,8 @@ class YouTubeService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('youtube'):
+                    info = ydl.extract_info(url, download=False)
                 title = info.get('title', 'video')
                 
                 # Clean title for filename
@@ -468,18 +487,8 @@ class YouTubeService:
             return f"youtube_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
     
     def get_stream_info(self, stream_token):
-        """Get stream information from cache"""
-        if not hasattr(self, '_stream_cache'):
-            return None
-            
-        # Clean up old cache entries first
-        current_time = datetime.now().timestamp()
-        self._stream_cache = {
-            k: v for k, v in self._stream_cache.items() 
-            if current_time - v['timestamp'] < 300
-        }
-        
-        return self._stream_cache.get(stream_token)
+        """Get stream information for a token that has not expired"""
+        return self.state.get(f"stream:{stream_token}")
     
     def stream_video(self, stream_token):
         """Stream video content through proxy to avoid 403 errors"""
@@ -527,7 +536,8 @@ class YouTubeService:
             
             def generate():
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info_dict = ydl.extract_info(url, download=False)
+                    with metrics.EXTRACT_INFO_DURATION.time('youtube'):
+                        info_dict = ydl.extract_info(url, download=False)
                     
                     # Get the actual stream URL with proper authentication
                     for fmt in info_dict.get('formats', []):
@@ -565,8 +575,13 @@ class YouTubeService:
                         # Stream the content
                         with requests.get(stream_url, headers=headers, stream=True) as r:
                             r.raise_for_status()
-                            for chunk in r.iter_content(chunk_size=8192):
-                                yield chunk
+                            metrics.ACTIVE_STREAMS.inc()
+                            try:
+                                for chunk in r.iter_content(chunk_size=8192):
+                                    metrics.STREAM_BYTES.inc(amount=len(chunk))
+                                    yield chunk
+                            finally:
+                                metrics.ACTIVE_STREAMS.dec()
             
             filename = self._generate_filename(url, download_type)
             
@@ -596,7 +611,8 @@ class YouTubeService:
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=False)
+                with metrics.EXTRACT_INFO_DURATION.time('youtube'):
+                    info = ydl.extract_info(video_url, download=False)
                 return {
                     'success': True,
                     'stream_url': info.get('url'),
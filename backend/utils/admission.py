@@ -0,0 +1,210 @@
+"""
+Admission control: token-bucket rate limits per client and per user, and a bounded
+priority queue in front of expensive endpoints that sheds load with 429 + Retry-After
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+# Queue priorities, lower is served first
+AUTHENTICATED = 0
+ANONYMOUS = 1
+
+class AdmissionRejected(Exception):
+    """Raised when a request is rate limited or shed; retry_after is in seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+class TokenBucket:
+    """rate tokens per second up to burst; each request takes one"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, now=None):
+        """Return 0 if a token was taken, otherwise the seconds until one is available"""
+        now = now if now is not None else time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+class KeyedRateLimiter:
+    """One token bucket per key (client address, username), least recently used keys evicted"""
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.rejected = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            wait = bucket.take()
+            if wait:
+                self.rejected += 1
+                raise AdmissionRejected('Rate limit exceeded', wait)
+
+class AdmissionQueue:
+    """
+    At most max_concurrent requests run; up to max_queue more wait, served by
+    priority then arrival. A waiter still queued after max_wait is shed.
+    """
+
+    def __init__(self, max_concurrent=4, max_queue=32, max_wait=10.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.shed = 0
+        # EWMA of how long a request holds a slot, for Retry-After estimates
+        self.service_time = 1.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self, priority=ANONYMOUS):
+        with self._lock:
+            if self.active < self.max_concurrent and not self._waiters:
+                self.active += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                self.shed += 1
+                raise AdmissionRejected('Server busy, queue is full', self._retry_after())
+            waiter = {'event': threading.Event(), 'granted': False}
+            entry = (priority, next(self._sequence), waiter)
+            heapq.heappush(self._waiters, entry)
+
+        if waiter['event'].wait(self.max_wait):
+            return
+
+        with self._lock:
+            if waiter['granted']:
+                return  # handed a slot just as the wait ran out
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self.shed += 1
+            raise AdmissionRejected('Server busy, try again later', self._retry_after())
+
+    def release(self, held=None):
+        with self._lock:
+            if held is not None:
+                self.service_time += 0.2 * (held - self.service_time)
+            if self._waiters:
+                # Hand the slot straight to the next waiter; active stays the same
+                _, _, waiter = heapq.heappop(self._waiters)
+                waiter['granted'] = True
+                waiter['event'].set()
+            else:
+                self.active -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'active': self.active,
+                'queued': len(self._waiters),
+                'shed': self.shed,
+                'service_time': round(self.service_time, 3)
+            }
+
+    def _retry_after(self):
+        return self.service_time * (len(self._waiters) + 1) / self.max_concurrent
+
+class AdmissionControl:
+    """Route decorators: guard('expensive') for yt-dlp work, guard('auth') for login/register"""
+
+    DEFAULT_LIMITS = {
+        'anonymous': {'rate': 0.2, 'burst': 5},
+        'user': {'rate': 1.0, 'burst': 10},
+        'auth': {'rate': 0.1, 'burst': 10},
+    }
+
+    def __init__(self, limits=None, concurrency=4, queue_size=32, queue_timeout=10.0, enabled=True):
+        self.configure(limits, concurrency, queue_size, queue_timeout, enabled)
+
+    def init_app(self, app):
+        """Apply RATE_LIMITS and ADMISSION_CONTROL; guards are declared before any app exists"""
+        self.configure(app.config.get('RATE_LIMITS'), **app.config.get('ADMISSION_CONTROL', {}))
+
+    def configure(self, limits=None, concurrency=4, queue_size=32, queue_timeout=10.0, enabled=True):
+        self.enabled = enabled
+        options = {name: dict(opts, **(limits or {}).get(name, {})) for name, opts in self.DEFAULT_LIMITS.items()}
+        self.limiters = {name: KeyedRateLimiter(**opts) for name, opts in options.items()}
+        self.queue = AdmissionQueue(concurrency, queue_size, queue_timeout)
+
+    def guard(self, kind):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+                try:
+                    if kind == 'auth':
+                        self._check_auth()
+                        return view(*args, **kwargs)
+                    return self._run_expensive(view, args, kwargs)
+                except AdmissionRejected as e:
+                    response = jsonify({'success': False, 'error': str(e), 'retry_after': e.retry_after})
+                    return response, 429, {'Retry-After': str(e.retry_after)}
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        return {
+            'queue': self.queue.snapshot(),
+            'rate_limited': {name: limiter.rejected for name, limiter in self.limiters.items()}
+        }
+
+    def _check_auth(self):
+        self.limiters['auth'].check(f"ip:{request.remote_addr}")
+        # Also per target account, so rotating addresses cannot hammer one user
+        username = (request.get_json(silent=True) or {}).get('username')
+        if (request.endpoint or '').rpartition('.')[2] == 'login' and isinstance(username, str) and username:
+            self.limiters['auth'].check(f"login:{username.strip().lower()}")
+
+    def _run_expensive(self, view, args, kwargs):
+        identity = self._identity()
+        if identity:
+            self.limiters['user'].check(f"user:{identity}")
+            priority = AUTHENTICATED
+        else:
+            self.limiters['anonymous'].check(f"ip:{request.remote_addr}")
+            priority = ANONYMOUS
+
+        self.queue.acquire(priority)
+        started = time.monotonic()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            self.queue.release(time.monotonic() - started)
+
+    def _identity(self):
+        # A bad or revoked token is treated like no token
+        try:
+            verify_jwt_in_request(optional=True)
+            return get_jwt_identity()
+        except Exception:
+            return None
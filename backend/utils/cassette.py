@@ -0,0 +1,290 @@
+"""
+Record and replay of upstream HTTP. requests and cloudscraper exchanges are captured
+at requests' HTTPAdapter.send, yt-dlp's at YoutubeDL.urlopen, and written with their
+latency as JSON Lines to a cassette file. Replay answers the same requests from the
+cassette, in recorded order, optionally after the recorded latency.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+MODES = ('record', 'replay')
+# Bodies are stored decoded, so these no longer describe them
+DROPPED_HEADERS = frozenset({'content-encoding', 'transfer-encoding'})
+
+class CassetteMiss(ConnectionError):
+    """Replay was asked for a request the cassette has no recording of"""
+
+class Cassette:
+    """
+    Interactions keyed by method, URL with its query sorted, and a digest of the
+    request body. A request recorded several times replays its responses in order,
+    starting over after the last, so a short recording can drive a long load test.
+    `latency` scales the recorded time to respond: 0 answers at once, 1 as recorded.
+    Bodies over `max_body` bytes keep only their size and replay as that many zeros.
+    """
+
+    def __init__(self, path, mode='replay', latency=0.0, max_body=1024 * 1024, ignore_params=()):
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {', '.join(MODES)}, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.max_body = max_body
+        self.ignore_params = frozenset(ignore_params)
+        self._interactions = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        if mode == 'replay':
+            self._load()
+
+    def __len__(self):
+        return sum(len(recorded) for recorded in self._interactions.values())
+
+    def key(self, method, url, body=None):
+        parts = urlsplit(url)
+        query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if name not in self.ignore_params)
+        key = f"{method.upper()} {urlunsplit(parts._replace(query=urlencode(query), fragment=''))}"
+        if body:
+            key += ' ' + hashlib.sha1(body).hexdigest()[:16]
+        return key
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"No cassette at {self.path}; record one with mode='record' first")
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions.setdefault(interaction['key'], []).append(interaction)
+
+    # Recording
+
+    def record(self, method, url, body, elapsed, status=None, reason=None, headers=(), content=b'',
+               response_url=None, error=None):
+        """Append one exchange; error is (exception class name, message) for requests that never got a response"""
+        interaction = {
+            'key': self.key(method, url, body),
+            'method': method.upper(),
+            'url': url,
+            'elapsed': round(elapsed, 6),
+            'recorded_at': datetime.now(timezone.utc).isoformat()
+        }
+        if error is not None:
+            interaction['error'] = {'type': error[0], 'message': error[1]}
+        else:
+            interaction.update({
+                'status': status,
+                'reason': reason,
+                'response_url': response_url or url,
+                'headers': [
+                    [name, str(len(content)) if name.lower() == 'content-length' else value]
+                    for name, value in headers if name.lower() not in DROPPED_HEADERS
+                ]
+            })
+            interaction.update(self._encode_body(content))
+
+        line = json.dumps(interaction, ensure_ascii=False) + '\n'
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self._interactions.setdefault(interaction['key'], []).append(interaction)
+
+    def _encode_body(self, content):
+        if len(content) > self.max_body:
+            return {'body_size': len(content)}
+        try:
+            return {'body': content.decode('utf-8')}
+        except UnicodeDecodeError:
+            return {'body_b64': base64.b64encode(content).decode('ascii')}
+
+    # Replay
+
+    def play(self, method, url, body=None):
+        """The next recorded interaction for this request, after its scaled latency"""
+        key = self.key(method, url, body)
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                raise CassetteMiss(f"{key} is not in cassette {self.path}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = (position + 1) % len(recorded)
+            interaction = recorded[position]
+        if self.latency:
+            time.sleep(interaction['elapsed'] * self.latency)
+        return interaction
+
+    @staticmethod
+    def body(interaction):
+        if 'body_b64' in interaction:
+            return base64.b64decode(interaction['body_b64'])
+        if 'body_size' in interaction:
+            return bytes(interaction['body_size'])
+        return interaction.get('body', '').encode('utf-8')
+
+# Process-wide hooks; install() patches once, the active cassette decides what they do
+
+_active = None
+_originals = {}
+_local = threading.local()
+_install_lock = threading.Lock()
+
+def _request_body(body):
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    return body if isinstance(body, bytes) else None
+
+def _adapter_send(adapter, request, **kwargs):
+    cassette = _active
+    send = _originals['requests']
+    # yt-dlp's own requests handler runs inside urlopen, which records the exchange itself
+    if cassette is None or getattr(_local, 'inside_urlopen', False):
+        return send(adapter, request, **kwargs)
+    body = _request_body(request.body)
+
+    if cassette.mode == 'replay':
+        return _replay_requests(adapter, request, cassette.play(request.method, request.url, body))
+
+    import requests
+    started = time.perf_counter()
+    try:
+        response = send(adapter, request, **kwargs)
+        content = response.content  # streamed bodies are read in full while recording
+    except requests.exceptions.RequestException as e:
+        cassette.record(request.method, request.url, body, time.perf_counter() - started,
+                        error=(type(e).__name__, str(e)))
+        raise
+    cassette.record(
+        request.method, request.url, body, time.perf_counter() - started, response.status_code,
+        response.reason, list(response.headers.items()), content, response.url
+    )
+    return response
+
+def _replay_requests(adapter, request, interaction):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    error = interaction.get('error')
+    if error:
+        exception = requests.exceptions.Timeout if 'Timeout' in error['type'] else requests.exceptions.ConnectionError
+        raise exception(f"{error['type']}: {error['message']} (replayed)", request=request)
+
+    response = requests.Response()
+    content = Cassette.body(interaction)
+    response.status_code = interaction['status']
+    response.reason = interaction['reason']
+    response.headers = CaseInsensitiveDict(interaction['headers'])
+    response.url = interaction['response_url']
+    response.raw = io.BytesIO(content)
+    response._content = content
+    response._content_consumed = True
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.request = request
+    response.connection = adapter
+    return response
+
+def _urlopen(ydl, req):
+    cassette = _active
+    urlopen = _originals['yt_dlp']
+    if cassette is None:
+        return urlopen(ydl, req)
+    url = req if isinstance(req, str) else req.url
+    method = 'GET' if isinstance(req, str) else (req.method or 'GET')
+    body = None if isinstance(req, str) else _request_body(req.data)
+
+    if cassette.mode == 'replay':
+        return _replay_yt_dlp(cassette.play(method, url, body))
+
+    from yt_dlp.networking.exceptions import HTTPError, RequestError
+    started = time.perf_counter()
+    _local.inside_urlopen = True
+    try:
+        response = urlopen(ydl, req)
+        content = response.read()
+    except HTTPError as e:
+        content = e.response.read()
+        cassette.record(method, url, body, time.perf_counter() - started, e.status, e.reason,
+                        list(e.response.headers.items()), content, e.response.url)
+        # The original body was consumed above, extractors read error pages from this copy
+        raise HTTPError(_yt_dlp_response(e.response.url, e.response.headers.items(), content, e.status, e.reason)) from e
+    except RequestError as e:
+        cassette.record(method, url, body, time.perf_counter() - started, error=(type(e).__name__, str(e)))
+        raise
+    finally:
+        _local.inside_urlopen = False
+    cassette.record(method, url, body, time.perf_counter() - started, response.status, response.reason,
+                    list(response.headers.items()), content, response.url)
+    return _yt_dlp_response(response.url, response.headers.items(), content, response.status, response.reason)
+
+def _yt_dlp_response(url, headers, content, status, reason):
+    from email.message import Message
+    from yt_dlp.networking.common import Response
+
+    # A Message keeps repeated headers such as Set-Cookie, a dict would not
+    message = Message()
+    for name, value in headers:
+        message[name] = value
+    return Response(io.BytesIO(content), url, message, status, reason)
+
+def _replay_yt_dlp(interaction):
+    from yt_dlp.networking.exceptions import HTTPError, TransportError
+
+    error = interaction.get('error')
+    if error:
+        raise TransportError(f"{error['type']}: {error['message']} (replayed)")
+    response = _yt_dlp_response(
+        interaction['response_url'], interaction['headers'], Cassette.body(interaction),
+        interaction['status'], interaction['reason']
+    )
+    if response.status >= 400:
+        raise HTTPError(response)
+    return response
+
+def install(cassette):
+    """Route upstream HTTP of this process through cassette; None puts the network back"""
+    global _active
+    with _install_lock:
+        if cassette is not None and not _originals:
+            from requests.adapters import HTTPAdapter
+            _originals['requests'] = HTTPAdapter.send
+            HTTPAdapter.send = _adapter_send
+            try:
+                import yt_dlp
+            except ImportError:
+                yt_dlp = None
+            if yt_dlp is not None:
+                _originals['yt_dlp'] = yt_dlp.YoutubeDL.urlopen
+                yt_dlp.YoutubeDL.urlopen = _urlopen
+        _active = cassette
+
+def uninstall():
+    install(None)
+
+@contextmanager
+def use_cassette(path, mode='replay', **options):
+    """Record or replay upstream HTTP inside the block"""
+    previous = _active
+    cassette = Cassette(path, mode, **options)
+    install(cassette)
+    try:
+        yield cassette
+    finally:
+        install(previous)
+
+def init_app(app):
+    """Install the cassette named by HTTP_CASSETTE['path'], if any, for the whole process"""
+    options = dict(app.config.get('HTTP_CASSETTE') or {})
+    path = options.pop('path', None)
+    if path:
+        install(Cassette(path, **options))
@@ -0,0 +1,103 @@
+"""
+Response compression: zstd, brotli or gzip negotiated from Accept-Encoding for
+text and JSON bodies above a size threshold; streamed and file responses pass through
+"""
+
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/javascript',
+    'application/msgpack',
+    'application/xml',
+    'image/svg+xml',
+}
+
+class Compression:
+    """after_request hook; install with Compression(app) or compression.init_app(app)"""
+
+    def __init__(self, app=None, min_size=1024, gzip_level=6, brotli_quality=4, zstd_level=3,
+                 algorithms=('zstd', 'br', 'gzip'), enabled=True):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.enabled = enabled
+        # Server preference order, limited to the codecs importable here
+        available = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+        self.algorithms = [name for name in algorithms if available.get(name)]
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.compress)
+
+    def negotiate(self, accept_encoding):
+        """Pick our most preferred codec the client accepts (q > 0), or None"""
+        accepted = {}
+        for part in (accept_encoding or '').split(','):
+            name, _, params = part.strip().partition(';')
+            quality = 1.0
+            if params.strip().startswith('q='):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name.strip().lower()] = quality
+
+        for name in self.algorithms:
+            quality = accepted.get(name, accepted.get('*', 0.0))
+            if quality > 0:
+                return name
+        return None
+
+    def compress(self, response):
+        if not self.enabled or not self._compressible(response):
+            return response
+
+        encoding = self.negotiate(request.headers.get('Accept-Encoding'))
+        response.vary.add('Accept-Encoding')
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        response.set_data(self._encode(encoding, data))
+        response.headers['Content-Encoding'] = encoding
+        # The compressed body is a different representation of the same resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _compressible(self, response):
+        # send_file sets direct_passthrough; stream_video returns a generator
+        if response.direct_passthrough or response.is_streamed:
+            return False
+        if not 200 <= response.status_code < 300 or response.status_code == 206:
+            return False
+        if 'Content-Encoding' in response.headers:
+            return False
+        mimetype = response.mimetype or ''
+        return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+    def _encode(self, encoding, data):
+        if encoding == 'zstd':
+            return zstandard.ZstdCompressor(level=self.zstd_level).compress(data)
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
@@ -0,0 +1,56 @@
+"""
+Parallel fan-out of independent calls with a deadline per part, for aggregate endpoints
+"""
+
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+def gather(executor, parts, deadlines=None, default_deadline=2.0, context=None):
+    """
+    Run every callable in parts ({name: func}) on executor at once and wait for
+    each until its own deadline, counted from the start of the call. Returns
+    {name: {'status': 'ok'|'error'|'timeout', 'data' or 'error', 'elapsed_ms'}}.
+    A part that misses its deadline keeps running in the background. Service
+    results shaped {'success': False, 'error': ...} count as errors. context is
+    an optional factory such as app.app_context, entered around each part.
+    """
+    deadlines = deadlines or {}
+    started = time.monotonic()
+    futures = {name: executor.submit(_timed, func, context) for name, func in parts.items()}
+
+    results = {}
+    # Shortest deadlines first, so a slow part never delays reporting a fast one
+    for name in sorted(futures, key=lambda n: deadlines.get(n, default_deadline)):
+        remaining = started + deadlines.get(name, default_deadline) - time.monotonic()
+        try:
+            data, elapsed = futures[name].result(timeout=max(0, remaining))
+        except FuturesTimeoutError:
+            futures[name].cancel()
+            results[name] = {
+                'status': 'timeout',
+                'error': 'Deadline exceeded',
+                'elapsed_ms': round((time.monotonic() - started) * 1000)
+            }
+            continue
+        except Exception as e:
+            results[name] = {
+                'status': 'error',
+                'error': str(e),
+                'elapsed_ms': round((time.monotonic() - started) * 1000)
+            }
+            continue
+
+        if isinstance(data, dict) and data.get('success') is False:
+            results[name] = {'status': 'error', 'error': data.get('error'), 'elapsed_ms': elapsed}
+        else:
+            results[name] = {'status': 'ok', 'data': data, 'elapsed_ms': elapsed}
+    return results
+
+def _timed(func, context):
+    started = time.monotonic()
+    if context is None:
+        data = func()
+    else:
+        with context():
+            data = func()
+    return data, round((time.monotonic() - started) * 1000)
@@ -4,6 +4,7 @@ Utility helper functions for the EagleEye backend
 
 import os
 import re
+import base64
 import hashlib
 import mimetypes
 from urllib.parse import urlparse
@@ -40,6 +41,31 @@ def extract_video_id(url):
             return match.group(1)
     return None
 
+def extract_infohash(magnet_link):
+    """Extract the BitTorrent infohash from a magnet link as lowercase hex"""
+    if not magnet_link:
+        return None
+
+    match = re.search(r'xt=urn:btih:([0-9a-zA-Z]+)', magnet_link)
+    if not match:
+        return None
+
+    value = match.group(1)
+    if len(value) == 40:
+        try:
+            return bytes.fromhex(value).hex()
+        except ValueError:
+            return None
+
+    # Older clients publish the 20-byte hash base32 encoded
+    if len(value) == 32:
+        try:
+            return base64.b32decode(value.upper()).hex()
+        except ValueError:
+            return None
+
+    return None
+
 def sanitize_filename(filename):
     """Sanitize filename for safe file system storage"""
     # Remove or replace invalid characters
@@ -70,6 +96,24 @@ def format_file_size(size_bytes):
     
     return f"{size_bytes:.1f} {size_names[i]}"
 
+def parse_file_size(size_str):
+    """Parse a human readable size such as "1.4 GB" into bytes, None if unparseable"""
+    if not size_str:
+        return None
+
+    match = re.match(r'\s*([\d.,]+)\s*([KMGTP]?i?B)\b', size_str, re.IGNORECASE)
+    if not match:
+        return None
+
+    units = {'B': 0, 'KB': 1, 'MB': 2, 'GB': 3, 'TB': 4, 'PB': 5}
+    unit = match.group(2).upper().replace('I', '')
+    try:
+        value = float(match.group(1).replace(',', ''))
+    except ValueError:
+        return None
+
+    return int(value * 1024 ** units[unit])
+
 def format_duration(seconds):
     """Format duration in seconds to HH:MM:SS"""
     if not seconds:
@@ -132,6 +176,41 @@ def create_response(success=True, data=None, message=None, error=None, status_co
     
     return response, status_code
 
+def encode_cursor(state):
+    """Opaque URL-safe pagination cursor for a small JSON-serializable dict"""
+    raw = json.dumps(state, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; None for anything malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return state if isinstance(state, dict) else None
+    except Exception:
+        return None
+
+def parse_fields(value):
+    """A fields= selection from a comma-separated string or a list; None selects everything"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    fields = frozenset(str(name).strip() for name in value if str(name).strip())
+    return fields or None
+
+def select_fields(item, fields, keep=('success', 'error')):
+    """Copy of a dict with only the selected keys (plus keep); item itself when fields is None"""
+    if fields is None or not isinstance(item, dict):
+        return item
+    return {key: value for key, value in item.items() if key in fields or key in keep}
+
+def select_result_fields(result, fields, key='results'):
+    """Apply a selection to every row of result[key], leaving the envelope alone"""
+    if fields is None or not isinstance(result, dict) or not isinstance(result.get(key), list):
+        return result
+    return {**result, key: [select_fields(row, fields, keep=()) for row in result[key]]}
+
 def validate_video_quality(quality):
     """Validate video quality parameter"""
     valid_qualities = ['144p', '240p', '360p', '480p', '720p', '1080p', '1440p', '2160p', 'best', 'worst']
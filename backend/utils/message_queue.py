@@ -0,0 +1,83 @@
+"""
+Socket.IO message queue so events emitted by one worker process reach clients
+connected to any other. A SQLite table stands in for Redis on a single host;
+redis:// and other broker URLs go to the managers python-socketio ships.
+"""
+
+import sqlite3
+import threading
+import time
+
+import socketio
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS socketio_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+class SQLiteQueueManager(socketio.PubSubManager):
+    """
+    Pub/sub over an append-only SQLite table. Every listener polls for rows
+    newer than the last one it saw; rows older than `retention` seconds are
+    deleted by publishers.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, url='sqlite:///socketio_queue.db', channel='flask-socketio', write_only=False,
+                 logger=None, json=None, poll_interval=0.05, retention=60):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.db_path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else url
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._next_cleanup = 0
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _publish(self, data):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT INTO socketio_messages (channel, payload, created_at) VALUES (?, ?, ?)',
+                (self.channel, self.json.dumps(data), now)
+            )
+            if now >= self._next_cleanup:
+                self._next_cleanup = now + self.retention
+                conn.execute('DELETE FROM socketio_messages WHERE created_at < ?', (now - self.retention,))
+
+    def _listen(self):
+        conn = self._connect()
+        # Only messages published after this listener started
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM socketio_messages').fetchone()[0]
+        while True:
+            rows = conn.execute(
+                'SELECT id, payload FROM socketio_messages WHERE id > ? AND channel = ? ORDER BY id',
+                (last_id, self.channel)
+            ).fetchall()
+            for message_id, payload in rows:
+                last_id = message_id
+                yield payload
+            if not rows:
+                self.server.sleep(self.poll_interval)
+
+def message_queue_options(url):
+    """SocketIO keyword arguments for a SOCKETIO_MESSAGE_QUEUE URL; {} keeps events in-process"""
+    if not url:
+        return {}
+    if url.startswith('sqlite:///'):
+        return {'client_manager': SQLiteQueueManager(url)}
+    return {'message_queue': url}
@@ -0,0 +1,246 @@
+"""
+Process-wide counters, gauges and histograms rendered in the Prometheus text format.
+Each update is a dict lookup and an add under the metric's own lock; histograms keep
+per-bucket counts and only turn them cumulative when /api/metrics is scraped.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import request
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def _register(metric):
+    # Re-registering a name (another create_app in the same process) keeps the existing series
+    with _metrics_lock:
+        return _metrics.setdefault(metric.name, metric)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=''):
+    # zip() would drop the surplus, and two label tuples could render as the same series
+    if len(names) != len(values):
+        raise ValueError(f"Label values {values!r} do not match label names {names!r}")
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic total per label tuple"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self):
+        for labels, value in sorted(self.snapshot().items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Gauge(Counter):
+    """Value that goes up and down; with collect, read from a callback at scrape time instead"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self):
+        if self.collect is None:
+            yield from super().samples()
+            return
+        for labels, value in sorted(self.collect().items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Histogram:
+    """Observation counts per upper bound, plus their sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts with a trailing +Inf slot, then the running sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the duration of the block; an outcome label, 'ok' or 'error', is appended"""
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'ok'
+        finally:
+            self.observe(time.perf_counter() - started, labels + (outcome,))
+
+    def count(self, labels=()):
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, labels, le), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), cumulative
+
+def counter(name, documentation, labelnames=()):
+    return _register(Counter(name, documentation, labelnames))
+
+def gauge(name, documentation, labelnames=(), collect=None):
+    return _register(Gauge(name, documentation, labelnames, collect))
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+HTTP_REQUESTS = counter('eagleeye_http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+HTTP_DURATION = histogram('eagleeye_http_request_duration_seconds', 'Time to build the response, by route', ('method', 'route'))
+EXTRACT_INFO_DURATION = histogram(
+    'eagleeye_extract_info_duration_seconds', 'yt-dlp extract_info calls', ('service', 'outcome'), UPSTREAM_BUCKETS
+)
+SCRAPE_DURATION = histogram(
+    'eagleeye_scrape_duration_seconds', 'Torrent site requests per mirror attempt', ('host', 'outcome'), UPSTREAM_BUCKETS
+)
+STREAM_BYTES = counter('eagleeye_stream_bytes_total', 'Bytes relayed by the YouTube stream proxy')
+ACTIVE_STREAMS = gauge('eagleeye_active_streams', 'Streams the proxy is relaying right now')
+CACHE_LOOKUPS = counter('eagleeye_cache_lookups_total', 'In-process cache lookups', ('cache', 'result'))
+DB_COMMIT_DURATION = histogram('eagleeye_db_commit_duration_seconds', 'SQLAlchemy commits', ('source', 'outcome'))
+SOCKETIO_EMITS = counter('eagleeye_socketio_emits_total', 'Socket.IO events emitted', ('event',))
+
+# Unlabelled series exist from the start, so dashboards show 0 rather than no data
+STREAM_BYTES.inc(amount=0)
+ACTIVE_STREAMS.set(0)
+
+def _hit_ratios():
+    lookups = CACHE_LOOKUPS.snapshot()
+    ratios = {}
+    for cache in {cache for cache, _ in lookups}:
+        hits, misses = lookups.get((cache, 'hit'), 0), lookups.get((cache, 'miss'), 0)
+        ratios[(cache,)] = hits / (hits + misses) if hits + misses else 0.0
+    return ratios
+
+CACHE_HIT_RATIO = gauge('eagleeye_cache_hit_ratio', 'Hits over lookups since start, per cache', ('cache',), collect=_hit_ratios)
+
+def cache_lookup(cache, hit):
+    CACHE_LOOKUPS.inc((cache, 'hit' if hit else 'miss'))
+
+def render():
+    """Every registered metric in the Prometheus text exposition format"""
+    with _metrics_lock:
+        metrics = list(_metrics.values())
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+def init_app(app):
+    """Time every request and count it by route template, so path parameters do not explode the series"""
+    def start_timer():
+        request.environ['eagleeye.started'] = time.perf_counter()
+
+    def record(response):
+        started = request.environ.get('eagleeye.started')
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_REQUESTS.inc((request.method, route, str(response.status_code)))
+        if started is not None:
+            HTTP_DURATION.observe(time.perf_counter() - started, (request.method, route))
+        return response
+
+    app.before_request(start_timer)
+    app.after_request(record)
+
+def instrument_sqlalchemy(session_class):
+    """Time commits (flush included) of every session of session_class"""
+    from sqlalchemy import event
+
+    if event.contains(session_class, 'before_commit', _commit_started):
+        return
+    event.listen(session_class, 'before_commit', _commit_started)
+    event.listen(session_class, 'after_commit', _commit_finished)
+    event.listen(session_class, 'after_rollback', _commit_abandoned)
+
+def _commit_started(session):
+    session.info['eagleeye.commit_started'] = time.perf_counter()
+
+def _commit_finished(session):
+    started = session.info.pop('eagleeye.commit_started', None)
+    if started is not None:
+        DB_COMMIT_DURATION.observe(time.perf_counter() - started, ('session', 'ok'))
+
+def _commit_abandoned(session):
+    # A rollback between before_commit and after_commit is a failed commit
+    started = session.info.pop('eagleeye.commit_started', None)
+    if started is not None:
+        DB_COMMIT_DURATION.observe(time.perf_counter() - started, ('session', 'error'))
+
+def instrument_socketio(socketio):
+    """Count events by name on their way out, including flask_socketio.emit() inside handlers"""
+    if getattr(socketio, '_eagleeye_counted', False):
+        return
+    emit = socketio.emit
+
+    def counted_emit(event, *args, **kwargs):
+        SOCKETIO_EMITS.inc((event,))
+        return emit(event, *args, **kwargs)
+
+    socketio.emit = counted_emit
+    socketio._eagleeye_counted = True
@@ -0,0 +1,204 @@
+"""
+Mirror failover with health scoring and hedged requests for upstream sites
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils import metrics
+from utils.resilience import (
+    CircuitOpenError, UpstreamBlocked, breaker_for, limiter_for, is_challenge_page, host_of
+)
+
+class MirrorError(Exception):
+    """Raised when every mirror of a pool failed to answer"""
+
+class MirrorHealth:
+    """Latency EWMA, error rate and recent latency samples for one mirror"""
+
+    def __init__(self, base_url, alpha=0.2, window=100, error_half_life=60.0):
+        self.base_url = base_url.rstrip('/')
+        self.host = host_of(self.base_url)
+        self.alpha = alpha
+        self.error_half_life = error_half_life
+        self.latency_ewma = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_error_at = None
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        # Shared with every other pool that talks to the same host
+        self.breaker = breaker_for(self.base_url)
+        self.limiter = limiter_for(self.base_url)
+
+    def record(self, latency, ok, error=None):
+        """Fold the outcome of one request into the health statistics"""
+        with self._lock:
+            self.requests += 1
+            self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+
+            if ok:
+                self._samples.append(latency)
+                if self.latency_ewma is None:
+                    self.latency_ewma = latency
+                else:
+                    self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+            else:
+                self.failures += 1
+                self.last_error = error
+                self.last_error_at = time.monotonic()
+
+    def current_error_rate(self):
+        """Error rate decayed by the time since the last failure so dead mirrors get retried"""
+        if self.last_error_at is None:
+            return self.error_rate
+        age = time.monotonic() - self.last_error_at
+        return self.error_rate * 0.5 ** (age / self.error_half_life)
+
+    def p95(self, default):
+        """95th percentile latency of recent successful requests"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < 5:
+            return default
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def score(self, default_latency):
+        """Expected cost of a request to this mirror, lower is better"""
+        latency = self.latency_ewma if self.latency_ewma is not None else default_latency
+        return latency / max(0.05, 1.0 - self.current_error_rate())
+
+    def snapshot(self, default_latency):
+        return {
+            'base_url': self.base_url,
+            'score': round(self.score(default_latency), 4),
+            'latency_ewma': round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            'latency_p95': round(self.p95(default_latency), 4),
+            'error_rate': round(self.current_error_rate(), 4),
+            'requests': self.requests,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'circuit': self.breaker.snapshot(),
+            'concurrency': self.limiter.snapshot()
+        }
+
+class MirrorPool:
+    """Routes requests to the healthiest mirror, hedging to the runner-up when it is slow"""
+
+    def __init__(self, base_urls, hedge_delay=1.0, min_hedge_delay=0.05, max_hedge_delay=5.0):
+        if not base_urls:
+            raise ValueError('At least one mirror base URL is required')
+
+        self.mirrors = [MirrorHealth(url) for url in base_urls]
+        # Used as the hedge delay and latency estimate until a mirror has enough samples
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(4, 2 * len(self.mirrors)),
+            thread_name_prefix='mirror'
+        )
+
+    @property
+    def primary(self):
+        return self.ranked()[0]
+
+    def ranked(self):
+        """Mirrors ordered best first, ties keep the configured order"""
+        return sorted(self.mirrors, key=lambda m: m.score(self.hedge_delay))
+
+    def fetch(self, path, send):
+        """
+        Run send(url) against the best mirror and return the first good response.
+
+        If the primary has not answered within its p95 latency a hedged request
+        goes to the next-best mirror; if an attempt fails the next mirror is tried.
+        """
+        candidates = self.ranked()
+        pending = {}
+        errors = []
+        hedged = False
+
+        def launch():
+            # Skip mirrors whose circuit is open or that are at their concurrency limit
+            while candidates:
+                mirror = candidates.pop(0)
+                if not mirror.limiter.try_acquire():
+                    errors.append(f"{mirror.base_url}: concurrency limit reached")
+                    continue
+                if not mirror.breaker.allow():
+                    mirror.limiter.release()
+                    errors.append(f"{mirror.base_url}: circuit open")
+                    continue
+                pending[self._executor.submit(self._attempt, mirror, path, send)] = mirror
+                return True
+            return False
+
+        if not launch():
+            # Fail fast rather than queue behind a struggling upstream
+            raise CircuitOpenError('No mirror available: ' + '; '.join(errors))
+
+        while pending:
+            timeout = None
+            if not hedged and candidates:
+                primary = next(iter(pending.values()))
+                timeout = min(self.max_hedge_delay, max(self.min_hedge_delay, primary.p95(self.hedge_delay)))
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                launch()
+                continue
+
+            for future in done:
+                mirror = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    errors.append(f"{mirror.base_url}: {e}")
+
+            # Fail over straight away when nothing else is in flight
+            if not pending:
+                launch()
+
+        raise MirrorError('All mirrors failed: ' + '; '.join(errors))
+
+    def _attempt(self, mirror, path, send):
+        started = time.monotonic()
+        try:
+            response = send(mirror.base_url + path)
+            if is_challenge_page(response):
+                raise UpstreamBlocked(f"Cloudflare challenge from {mirror.base_url}")
+            response.raise_for_status()
+        except Exception as e:
+            latency = time.monotonic() - started
+            host_failed = self._is_host_failure(e)
+            metrics.SCRAPE_DURATION.observe(latency, (mirror.host, 'error'))
+            mirror.record(latency, False, str(e))
+            mirror.limiter.release(latency, ok=not host_failed)
+            if host_failed:
+                mirror.breaker.record_failure()
+            else:
+                mirror.breaker.record_success()
+            raise
+
+        latency = time.monotonic() - started
+        metrics.SCRAPE_DURATION.observe(latency, (mirror.host, 'ok'))
+        mirror.record(latency, True)
+        mirror.limiter.release(latency, ok=True)
+        mirror.breaker.record_success()
+        return response
+
+    def _is_host_failure(self, error):
+        """A missing page is the host working normally; errors, throttling and blocks are not"""
+        response = getattr(error, 'response', None)
+        if response is not None and not isinstance(error, UpstreamBlocked):
+            return response.status_code >= 500 or response.status_code in (403, 429)
+        return True
+
+    def scores(self):
+        """Health snapshot of every mirror, best first, for monitoring"""
+        return [mirror.snapshot(self.hedge_delay) for mirror in self.ranked()]
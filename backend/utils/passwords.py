@@ -0,0 +1,87 @@
+"""
+Password hashing with a tunable cost, run in a bounded process pool off the request threads
+"""
+
+import hashlib
+import hmac
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Unsalted SHA-256 hex digests written by earlier versions of AuthService
+LEGACY_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+class HasherBusy(Exception):
+    """Raised when too many hash operations are already queued"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class PasswordHasher:
+    """
+    werkzeug scrypt or pbkdf2 hashes. cost is the scrypt N (a power of two)
+    or the pbkdf2 iteration count. Hashing and verification run in a process
+    pool of `workers` processes so they use every core and never hold the GIL
+    of the web server; workers=0 runs them inline.
+    """
+
+    def __init__(self, method='scrypt', cost=None, workers=None, max_queue=None, queue_timeout=10.0):
+        if method not in ('scrypt', 'pbkdf2'):
+            raise ValueError(f"Unsupported password hash method: {method}")
+
+        self.method = method
+        self.cost = cost or (32768 if method == 'scrypt' else 600000)
+        self.workers = os.cpu_count() or 1 if workers is None else workers
+        self.queue_timeout = queue_timeout
+        # Bound the work waiting for the pool so a login flood sheds load instead of queueing
+        self._slots = threading.BoundedSemaphore(max_queue or max(1, self.workers) * 8)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def method_spec(self):
+        if self.method == 'scrypt':
+            return f"scrypt:{self.cost}:8:1"
+        return f"pbkdf2:sha256:{self.cost}"
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method_spec)
+
+    def verify(self, stored_hash, password):
+        """Check a password against a current or legacy hash"""
+        if not stored_hash:
+            return False
+        if LEGACY_SHA256.match(stored_hash):
+            digest = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(digest, stored_hash)
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True for legacy hashes and hashes made with another method or cost"""
+        return not stored_hash or stored_hash.split('$', 1)[0] != self.method_spec
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def _run(self, func, *args):
+        if self.workers == 0:
+            return func(*args)
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HasherBusy('Too many password operations in progress', retry_after=max(1, int(self.queue_timeout)))
+        try:
+            return self._get_pool().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
@@ -0,0 +1,203 @@
+"""
+Sampling profiler over sys._current_frames(): on-demand profiles of in-flight requests
+as collapsed stacks (flamegraph.pl, speedscope, inferno), and automatic capture of
+requests slower than a threshold into a bounded ring of reports
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from flask import request
+
+_labels = {}
+
+def _frame_label(code):
+    # One label per function, cached per code object so a sample is mostly dict lookups
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename.replace('\\', '/').split('/')
+        name = getattr(code, 'co_qualname', code.co_name)
+        label = _labels[code] = f"{name} ({'/'.join(path[-2:])})".replace(';', ':')
+    return label
+
+def collapse(frame, root=None):
+    """'root;outermost;...;innermost' for one thread's current frame"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    if root:
+        labels.append(root)
+    return ';'.join(reversed(labels))
+
+def format_collapsed(stacks):
+    """Brendan Gregg's collapsed format: one 'stack count' line per distinct stack, heaviest first"""
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+class ActiveRequest:
+    __slots__ = ('method', 'path', 'route', 'started', 'started_at', 'status', 'stacks')
+
+    def __init__(self, method, path, route):
+        self.method = method
+        self.path = path
+        self.route = route
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc)
+        self.status = None
+        self.stacks = Counter()
+
+class RequestProfiler:
+    """
+    Tracks which thread serves which request. With a slow threshold set, one
+    background thread samples the stacks of every in-flight request each
+    `interval` seconds and sleeps while none are in flight; requests that
+    finish under the threshold drop their samples, slower ones become reports.
+    """
+
+    def __init__(self, app=None, slow_threshold=2.0, interval=0.02, keep=50):
+        self.slow_threshold = slow_threshold
+        self.interval = interval
+        self.reports = deque(maxlen=keep)
+        self.profiling = threading.Lock()
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._ids = itertools.count(1)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._begin)
+        app.after_request(self._status)
+        app.teardown_request(self._end)
+
+    # Request hooks
+
+    def _begin(self):
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        entry = ActiveRequest(request.method, request.path, route)
+        with self._lock:
+            self._active[threading.get_ident()] = entry
+        if self.slow_threshold is not None:
+            self._ensure_sampler()
+            self._wake.set()
+
+    def _status(self, response):
+        entry = self._active.get(threading.get_ident())
+        if entry is not None:
+            entry.status = response.status_code
+        return response
+
+    def _end(self, exc=None):
+        with self._lock:
+            entry = self._active.pop(threading.get_ident(), None)
+            # The sampler adds under the same lock, so this copy is consistent
+            stacks = Counter(entry.stacks) if entry is not None else None
+        if entry is None or self.slow_threshold is None:
+            return
+        duration = time.perf_counter() - entry.started
+        if duration >= self.slow_threshold:
+            self.reports.append({
+                'id': next(self._ids),
+                'method': entry.method,
+                'path': entry.path,
+                'route': entry.route,
+                'status': entry.status if exc is None else 500,
+                'duration_ms': round(duration * 1000, 1),
+                'started_at': entry.started_at.isoformat(),
+                'samples': sum(stacks.values()),
+                'stacks': stacks,
+                'pid': os.getpid()
+            })
+
+    # Slow request sampler
+
+    def _ensure_sampler(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample_loop, name='slow-request-sampler', daemon=True)
+                self._thread.start()
+
+    def _sample_loop(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            samples = [
+                (entry, collapse(frames[ident], f"{entry.method} {entry.route}"))
+                for ident, entry in active.items() if ident in frames
+            ]
+            del frames
+            with self._lock:
+                for entry, stack in samples:
+                    entry.stacks[stack] += 1
+            time.sleep(self.interval)
+
+    def slow_requests(self):
+        """Reports newest first, without their stacks"""
+        return [{key: value for key, value in report.items() if key != 'stacks'} for report in reversed(self.reports)]
+
+    def slow_request(self, report_id):
+        return next((report for report in self.reports if report['id'] == report_id), None)
+
+    # On-demand profile
+
+    def profile(self, seconds, interval=0.005, all_threads=False, route=None):
+        """
+        Sample for `seconds` from the calling thread, which is excluded, and
+        return (stacks, stats). By default only threads serving a request are
+        sampled, rooted at their route. The sampler's lateness beyond its
+        interval is reported as well: high lag means it was waiting for the GIL.
+        """
+        me = threading.get_ident()
+        stacks = Counter()
+        lags = []
+        ticks = 0
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.perf_counter() + seconds
+        next_tick = time.perf_counter()
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            lags.append(max(0.0, now - next_tick))
+            ticks += 1
+            frames = sys._current_frames()
+            with self._lock:
+                active = dict(self._active)
+            for ident, frame in frames.items():
+                if ident == me or ident == getattr(self._thread, 'ident', None):
+                    continue
+                entry = active.get(ident)
+                if entry is not None:
+                    if route and entry.route != route:
+                        continue
+                    stacks[collapse(frame, f"{entry.method} {entry.route}")] += 1
+                elif all_threads:
+                    if ident not in names:
+                        names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    stacks[collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+            del frames
+            next_tick += interval
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+        lags.sort()
+        stats = {
+            'ticks': ticks,
+            'samples': sum(stacks.values()),
+            'interval_ms': interval * 1000,
+            'lag_ms_mean': round(sum(lags) / len(lags) * 1000, 3) if lags else 0.0,
+            'lag_ms_p95': round(lags[int(len(lags) * 0.95)] * 1000, 3) if lags else 0.0
+        }
+        return stacks, stats
@@ -0,0 +1,35 @@
+"""
+Lazily built services: each is constructed by its factory on first use, once per app,
+so importing the app and answering /api/health never loads yt-dlp, cloudscraper or bs4
+"""
+
+import threading
+
+class ServiceRegistry:
+    """{name: factory(app)} resolved on demand; instances are cached for the life of the app"""
+
+    def __init__(self, app, factories):
+        self.app = app
+        self.factories = dict(factories)
+        self._instances = {}
+        # Reentrant: a factory may ask for another service
+        self._lock = threading.RLock()
+
+    def get(self, name):
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = self.factories[name](self.app)
+            return self._instances[name]
+
+    def built(self, name):
+        """The instance if it was built already, without building it"""
+        return self._instances.get(name)
+
+    def loaded(self):
+        """Names of the services built so far"""
+        return sorted(self._instances)
+
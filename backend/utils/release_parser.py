@@ -0,0 +1,138 @@
+"""
+Release-name parser - extracts resolution, source, codec, HDR, audio and group from torrent titles
+"""
+
+import re
+from functools import lru_cache
+
+# One alternation per attribute; the lookarounds stop "hd" matching inside "hdr" or "shadow",
+# and resolution comes after source/audio so "HD-Rip" and "DTS-HD" win over a bare "HD"
+TAG_PATTERN = re.compile(r"""
+    (?<![a-z0-9])
+    (?:
+        (?P<source>blu-?ray|bd-?rip|br-?rip|bd-?remux|remux|web-?dl|web-?rip|web|hdtv|dvd-?rip|dvd|hd-?rip|hd-?cam|cam-?rip|cam|hd-?ts|telesync)
+      | (?P<codec>[xh]\.?264|[xh]\.?265|hevc|avc|av1|xvid|divx|vp9)
+      | (?P<hdr>hdr10\+|hdr10|hdr|dolby[ .]?vision|dovi|dv)
+      | (?P<audio>ddp|dd\+|dd|e-?ac-?3|ac-?3|aac|dts-?hd(?:[ .-]?ma)?|dts|truehd|atmos|flac|mp3|opus)
+        (?P<audio_channels>[ .]?[1-9]\.[0-2])?
+      | (?P<resolution>4320p|2160p|1440p|1080[pi]|720p|576p|480p|360p|8k|4k|uhd|fhd|hd)
+      | (?P<channels>[1-9]\.[0-2])
+    )
+    (?![a-z0-9+])
+""", re.IGNORECASE | re.VERBOSE)
+
+# "...x264-GROUP", optionally followed by a site tag or an extension, or a trailing "[GROUP]"
+GROUP_PATTERN = re.compile(
+    r"(?:-(?P<dash>[A-Za-z0-9]+)(?:\s*\[[^\]]*\])?(?:\.(?:mkv|mp4|avi))?|\[(?P<bracket>[A-Za-z][\w.]*)\])\s*$"
+)
+
+RESOLUTIONS = {
+    '4320p': '4320p', '8k': '4320p',
+    '2160p': '2160p', '4k': '2160p', 'uhd': '2160p',
+    '1440p': '1440p',
+    '1080p': '1080p', '1080i': '1080p', 'fhd': '1080p',
+    '720p': '720p', 'hd': '720p',
+    '576p': '576p', '480p': '480p', '360p': '360p'
+}
+
+SOURCES = {
+    'bluray': 'BluRay', 'bdrip': 'BluRay', 'brrip': 'BluRay', 'bdremux': 'BluRay', 'remux': 'BluRay',
+    'webdl': 'WEB-DL', 'web': 'WEB-DL',
+    'webrip': 'WEBRip',
+    'hdtv': 'HDTV',
+    'dvdrip': 'DVDRip', 'dvd': 'DVDRip',
+    'hdrip': 'HDRip',
+    'hdcam': 'CAM', 'camrip': 'CAM', 'cam': 'CAM',
+    'hdts': 'TS', 'telesync': 'TS'
+}
+
+CODECS = {
+    'x264': 'x264', 'h264': 'x264', 'avc': 'x264',
+    'x265': 'x265', 'h265': 'x265', 'hevc': 'x265',
+    'av1': 'AV1', 'xvid': 'XviD', 'divx': 'XviD', 'vp9': 'VP9'
+}
+
+HDR_FORMATS = {
+    'hdr10+': 'HDR10+', 'hdr10': 'HDR10', 'hdr': 'HDR',
+    'dolbyvision': 'DV', 'dovi': 'DV', 'dv': 'DV'
+}
+
+AUDIO_FORMATS = {
+    'ddp': 'DDP', 'dd+': 'DDP', 'eac3': 'DDP', 'dd': 'DD', 'ac3': 'DD',
+    'aac': 'AAC', 'dts': 'DTS', 'dtshd': 'DTS-HD', 'dtshdma': 'DTS-HD MA',
+    'truehd': 'TrueHD', 'atmos': 'Atmos', 'flac': 'FLAC', 'mp3': 'MP3', 'opus': 'Opus'
+}
+
+# Quality labels the rest of the backend sorts and filters on
+QUALITY_BY_RESOLUTION = {
+    '4320p': '4K', '2160p': '4K', '1440p': '1080p', '1080p': '1080p',
+    '720p': '720p', '576p': '480p', '480p': '480p', '360p': 'SD'
+}
+HD_SOURCES = {'BluRay', 'WEB-DL', 'WEBRip', 'HDTV', 'HDRip'}
+
+def _normalize(token):
+    return re.sub(r'[\s.\-]', '', token.lower())
+
+@lru_cache(maxsize=8192)
+def _parse(title):
+    resolution = source = codec = channels = None
+    hdr = []
+    audio = []
+    last_tag_end = -1
+
+    for match in TAG_PATTERN.finditer(title):
+        kind = match.lastgroup
+        if kind == 'audio_channels':
+            kind = 'audio'
+        token = _normalize(match.group(kind))
+
+        if kind == 'resolution':
+            resolution = resolution or RESOLUTIONS[token]
+        elif kind == 'source':
+            source = source or SOURCES[token]
+        elif kind == 'codec':
+            codec = codec or CODECS[token]
+        elif kind == 'hdr':
+            if HDR_FORMATS[token] not in hdr:
+                hdr.append(HDR_FORMATS[token])
+        elif kind == 'audio':
+            name = AUDIO_FORMATS[token]
+            if name not in audio:
+                audio.append(name)
+            if match.group('audio_channels'):
+                channels = channels or match.group('audio_channels').strip(' .')
+        else:
+            channels = channels or match.group('channels')
+        last_tag_end = match.end()
+
+    group = None
+    group_match = GROUP_PATTERN.search(title)
+    # A suffix that overlaps a recognised tag ("WEB-DL", "[5.1]") is not a group
+    if group_match and group_match.start() >= last_tag_end:
+        group = group_match.group('dash') or group_match.group('bracket')
+
+    if resolution:
+        quality = QUALITY_BY_RESOLUTION[resolution]
+    elif source in HD_SOURCES:
+        quality = 'HD'
+    else:
+        quality = 'SD'
+
+    return (
+        ('quality', quality),
+        ('resolution', resolution),
+        ('source', source),
+        ('codec', codec),
+        ('hdr', tuple(hdr)),
+        ('audio', tuple(audio)),
+        ('channels', channels),
+        ('group', group)
+    )
+
+def parse_release_name(title):
+    """Parse a release name in one pass; results are memoized since titles repeat across searches"""
+    return dict(_parse(title or ''))
+
+def parser_cache_info():
+    """LRU hit/miss statistics of the parser"""
+    return _parse.cache_info()
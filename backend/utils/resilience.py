@@ -0,0 +1,177 @@
+"""
+Circuit breakers and adaptive concurrency limits for upstream hosts
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit is open"""
+
+class ConcurrencyLimitExceeded(Exception):
+    """Raised when a host already has as many requests in flight as its limit allows"""
+
+class UpstreamBlocked(Exception):
+    """Raised when an upstream answers with a Cloudflare challenge instead of content"""
+
+def is_challenge_page(response):
+    """Detect Cloudflare interstitials, which arrive with 403/503 or even 200"""
+    if response.headers.get('cf-mitigated') == 'challenge':
+        return True
+    if response.status_code in (403, 503) and response.headers.get('Server', '').lower() == 'cloudflare':
+        return True
+    head = response.text[:2048] if 'html' in response.headers.get('Content-Type', '') else ''
+    return '<title>Just a moment...</title>' in head or 'cf-browser-verification' in head
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures, half-open probe after reset_timeout"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go ahead; half-open lets a limited number of probes through"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probes = 0
+
+            if self.state == self.HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 2)
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+                'retry_in': retry_in
+            }
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: every fast success raises the limit by 1/limit
+    (about one per round of requests), a failure or a response slower than
+    latency_target multiplies it by backoff. Callers over the limit fail fast.
+    """
+
+    def __init__(self, name, initial=8, min_limit=1, max_limit=64, backoff=0.5, latency_target=3.0):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency=None, ok=True):
+        """Free a slot; latency None means the slot was never used and the limit is left alone"""
+        with self._lock:
+            self.in_flight -= 1
+            if latency is None:
+                return
+            if ok and latency <= self.latency_target:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            else:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'rejected': self.rejected
+            }
+
+# Options applied to breakers and limiters created from now on, see configure()
+BREAKER_OPTIONS = {}
+LIMITER_OPTIONS = {}
+
+_breakers = {}
+_limiters = {}
+_registry_lock = threading.Lock()
+
+def configure(breaker=None, limiter=None):
+    """Set default options for per-host breakers and limiters"""
+    BREAKER_OPTIONS.update(breaker or {})
+    LIMITER_OPTIONS.update(limiter or {})
+
+def host_of(url):
+    return urlparse(url).netloc or url
+
+def breaker_for(url):
+    """The shared circuit breaker of the host serving url"""
+    host = host_of(url)
+    with _registry_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host, **BREAKER_OPTIONS)
+        return _breakers[host]
+
+def limiter_for(url):
+    """The shared concurrency limiter of the host serving url"""
+    host = host_of(url)
+    with _registry_lock:
+        if host not in _limiters:
+            _limiters[host] = AdaptiveLimiter(host, **LIMITER_OPTIONS)
+        return _limiters[host]
+
+def snapshot():
+    """Breaker state and limiter values of every known host, for metrics"""
+    with _registry_lock:
+        breakers = dict(_breakers)
+        limiters = dict(_limiters)
+    return {
+        'breakers': {host: breaker.snapshot() for host, breaker in breakers.items()},
+        'limiters': {host: limiter.snapshot() for host, limiter in limiters.items()}
+    }
@@ -0,0 +1,172 @@
+"""
+Shared state for short-lived entries such as stream tokens, sets of members and
+leases: in-process by default, or a SQLite file that every worker process of one
+deployment opens
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_shared_state_expires ON shared_state (expires_at);
+CREATE TABLE IF NOT EXISTS shared_sets (
+    key TEXT NOT NULL,
+    member TEXT NOT NULL,
+    PRIMARY KEY (key, member)
+) WITHOUT ROWID;
+"""
+
+class MemoryState:
+    """Dict with per-key expiry; only visible inside this process"""
+
+    def __init__(self):
+        self._entries = {}
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return default
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._sets.pop(key, None)
+
+    def add_member(self, key, member):
+        with self._lock:
+            self._sets.setdefault(key, set()).add(member)
+
+    def remove_member(self, key, member):
+        with self._lock:
+            members = self._sets.get(key)
+            if members is not None:
+                members.discard(member)
+                if not members:
+                    del self._sets[key]
+
+    def members(self, key):
+        with self._lock:
+            return set(self._sets.get(key, ()))
+
+    def acquire(self, key, holder, ttl):
+        """Take or renew the lease on key for holder; False while someone else holds it"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != holder and entry[1] > now:
+                return False
+            self._entries[key] = (holder, now + ttl)
+            return True
+
+    def purge(self):
+        """Drop expired entries, returning how many"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._entries.items() if expires_at is not None and expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+class SQLiteState:
+    """JSON values in a WAL-mode SQLite table, shared by every process that opens the file"""
+
+    def __init__(self, db_path, purge_interval=60):
+        self.db_path = db_path
+        self.purge_interval = purge_interval
+        self._next_purge = 0
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), expires_at)
+            )
+        if time.time() >= self._next_purge:
+            self.purge()
+
+    def get(self, key, default=None):
+        row = self._connect().execute(
+            'SELECT value FROM shared_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def delete(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM shared_state WHERE key = ?', (key,))
+            conn.execute('DELETE FROM shared_sets WHERE key = ?', (key,))
+
+    def add_member(self, key, member):
+        conn = self._connect()
+        with conn:
+            conn.execute('INSERT OR IGNORE INTO shared_sets (key, member) VALUES (?, ?)', (key, member))
+
+    def remove_member(self, key, member):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM shared_sets WHERE key = ? AND member = ?', (key, member))
+
+    def members(self, key):
+        return {row[0] for row in self._connect().execute('SELECT member FROM shared_sets WHERE key = ?', (key,))}
+
+    def acquire(self, key, holder, ttl):
+        """Take or renew the lease on key for holder in one statement; False while another process holds it"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO shared_state (key, value, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at '
+                'WHERE shared_state.value = excluded.value OR shared_state.expires_at <= ?',
+                (key, json.dumps(holder), now + ttl, now)
+            )
+        return cursor.rowcount > 0
+
+    def purge(self):
+        self._next_purge = time.time() + self.purge_interval
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute('DELETE FROM shared_state WHERE expires_at <= ?', (time.time(),))
+        return cursor.rowcount
+
+def create_shared_state(url=None):
+    """'memory://' (default) or 'sqlite:///path/to/file.db'"""
+    if not url or url.startswith('memory://'):
+        return MemoryState()
+    if url.startswith('sqlite:///'):
+        return SQLiteState(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported shared state URL: {url}")
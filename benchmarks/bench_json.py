@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Response encoding cost for search and format payloads: Flask's stdlib provider against FastJSONProvider
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import utils.json_provider as json_provider
+from offline import fake_yt_dlp, make_formats
+from utils.json_provider import FastJSONProvider
+
+def build_payloads():
+    from services.youtube_service import YouTubeService
+
+    service = YouTubeService()
+    formats = service._get_available_formats(make_formats())
+    with fake_yt_dlp():
+        return {
+            'search_videos (20 results)': service.search_videos('benchmark', limit=20),
+            'search_videos (50 results)': service.search_videos('benchmark', limit=50),
+            '_get_available_formats': {'success': True, 'title': 'Benchmark video', 'formats': formats},
+        }
+
+def measure(app, payload, iterations, headers=None):
+    with app.test_request_context(headers=headers or {}):
+        app.json.response(payload)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            response = app.json.response(payload)
+        elapsed = time.perf_counter() - started
+    return elapsed / iterations * 1e6, len(response.get_data())
+
+def run(iterations=2000):
+    with tempfile.TemporaryDirectory() as workdir:
+        previous = os.getcwd()
+        os.chdir(workdir)  # YouTubeService creates its downloads folder here
+        try:
+            payloads = build_payloads()
+        finally:
+            os.chdir(previous)
+
+    stdlib_app = Flask(__name__)
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    fast_app = Flask(__name__)
+    fast_app.json = FastJSONProvider(fast_app)
+
+    encoders = [('stdlib json', stdlib_app, None)]
+    if json_provider.orjson is not None:
+        encoders.append(('orjson', fast_app, None))
+    if json_provider.msgpack is not None:
+        encoders.append(('msgpack', fast_app, {'Accept': 'application/msgpack'}))
+
+    results = {}
+    for name, payload in payloads.items():
+        print(name)
+        for label, app, headers in encoders:
+            per_call, size = measure(app, payload, iterations, headers)
+            results[(name, label)] = per_call
+            print(f"  {label:<12} {per_call:>9.1f} us/response  {size / 1024:>7.1f} KiB")
+    return results
+
+if __name__ == '__main__':
+    run()
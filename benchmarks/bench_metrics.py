@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Instrumentation overhead: cost of one counter or histogram update, alone and under
+thread contention, and per-request cost of the metrics hooks on a trivial route
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from flask import Flask
+
+from utils import metrics
+
+def per_call(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e9
+
+def contended(func, threads, iterations):
+    """Nanoseconds per update with several threads updating the same series"""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(iterations):
+            func()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.join()
+    return (time.perf_counter() - started) / (threads * iterations) * 1e9
+
+def make_app(instrumented):
+    app = Flask(__name__)
+    if instrumented:
+        metrics.init_app(app)
+
+    @app.route('/ping')
+    def ping():
+        return 'pong'
+
+    return app
+
+def per_request(app, iterations):
+    client = app.test_client()
+    client.get('/ping')
+    started = time.perf_counter()
+    for _ in range(iterations):
+        client.get('/ping')
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def run(iterations=200000, requests=5000):
+    counter = metrics.Counter('bench_total', 'Benchmark counter', ('route',))
+    histogram = metrics.Histogram('bench_seconds', 'Benchmark histogram', ('route',))
+    labels = ('/api/health',)
+
+    print('Single update')
+    print(f"  Counter.inc          {per_call(lambda: counter.inc(labels), iterations):>8.0f} ns")
+    print(f"  Histogram.observe    {per_call(lambda: histogram.observe(0.042, labels), iterations):>8.0f} ns")
+    print('8 threads, same series')
+    print(f"  Counter.inc          {contended(lambda: counter.inc(labels), 8, iterations // 8):>8.0f} ns")
+    print(f"  Histogram.observe    {contended(lambda: histogram.observe(0.042, labels), 8, iterations // 8):>8.0f} ns")
+
+    plain = per_request(make_app(False), requests)
+    instrumented = per_request(make_app(True), requests)
+    print('Flask test client, trivial route')
+    print(f"  without metrics      {plain:>8.1f} us/request")
+    print(f"  with metrics         {instrumented:>8.1f} us/request  ({instrumented - plain:+.1f} us)")
+    return {'plain_us': plain, 'instrumented_us': instrumented}
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Login throughput with scrypt/pbkdf2 verification against the number of hashing processes
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from flask import Flask
+from flask_jwt_extended import JWTManager
+
+from services.auth_service import AuthService
+from services.user_store import SQLiteUserStore
+from utils.passwords import PasswordHasher
+
+PASSWORD = 'benchmark-password'
+CLIENTS = 32
+
+def worker_counts():
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+def measure(app, store, method, cost, workers, logins_per_worker=12):
+    hasher = PasswordHasher(method, cost=cost, workers=workers)
+    auth = AuthService(store=store, hasher=hasher)
+    logins = logins_per_worker * max(1, workers)
+    remaining = iter(range(logins))
+    lock = threading.Lock()
+
+    def client():
+        with app.app_context():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                assert auth.login_user({'username': 'user0', 'password': PASSWORD})['success']
+
+    auth.login_user({'username': 'user0', 'password': PASSWORD})  # start the pool
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    auth.close()
+
+    label = 'inline' if workers == 0 else f"{workers} process(es)"
+    print(f"{hasher.method_spec:<24} {label:<16} {logins / elapsed:>8,.1f} logins/s")
+    return logins / elapsed
+
+def run(method='scrypt', cost=None):
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'benchmark-secret-key-of-32-bytes!'
+    JWTManager(app)
+
+    with tempfile.TemporaryDirectory() as workdir, app.app_context():
+        store = SQLiteUserStore(os.path.join(workdir, 'users.db'))
+        setup = AuthService(store=store, hasher=PasswordHasher(method, cost=cost, workers=0))
+        setup.register_user({'username': 'user0', 'email': 'user0@example.com', 'password': PASSWORD})
+        setup.close()
+
+        print(f"{os.cpu_count()} CPUs, {CLIENTS} concurrent clients")
+        measure(app, store, method, cost, 0)
+        return {workers: measure(app, store, method, cost, workers) for workers in worker_counts()}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--method', default='scrypt', choices=['scrypt', 'pbkdf2'])
+    parser.add_argument('--cost', type=int, default=None, help='scrypt N or pbkdf2 iterations')
+    args = parser.parse_args()
+    run(args.method, args.cost)
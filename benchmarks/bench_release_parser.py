@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the release-name parser against the old keyword scans
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.release_parser import _parse, parse_release_name
+
+NAMES = ['Oppenheimer', 'The Last of Us', 'Dune Part Two', 'Severance', 'Shadow and Bone', 'Interstellar']
+TAGS = [
+    '2160p.UHD.BluRay.x265.HDR10+.DV.TrueHD.Atmos.7.1-SWTYBLZ',
+    '1080p.WEB-DL.DDP5.1.H.264-NTb',
+    '720p HDTV x264-SYNCOPY [eztv]',
+    '[1080p] [WEBRip] [5.1] [YTS.MX]',
+    '480p.DVDRip.XviD.AC3-FLAWL3SS',
+    'HD-Rip',
+]
+
+def legacy_quality(title):
+    """The keyword scans _determine_quality used before the parser"""
+    title_lower = title.lower()
+    if any(keyword in title_lower for keyword in ['4k', '2160p', 'uhd']):
+        return '4K'
+    elif any(keyword in title_lower for keyword in ['1080p', 'fhd']):
+        return '1080p'
+    elif any(keyword in title_lower for keyword in ['720p', 'hd']):
+        return '720p'
+    elif any(keyword in title_lower for keyword in ['480p']):
+        return '480p'
+    elif any(keyword in title_lower for keyword in ['bluray', 'brrip', 'webrip']):
+        return 'HD'
+    return 'SD'
+
+def make_titles(count, distinct):
+    rng = random.Random(42)
+    pool = [f"{rng.choice(NAMES)} S0{i % 9 + 1}E{i % 20:02d} {rng.choice(TAGS)}" for i in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+def measure(label, func, titles):
+    started = time.perf_counter()
+    for title in titles:
+        func(title)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {len(titles) / elapsed:>12,.0f} titles/s")
+    return len(titles) / elapsed
+
+def run(count=200000, distinct=2000):
+    titles = make_titles(count, distinct)
+    print(f"{count:,} titles, {distinct:,} distinct (searches repeat titles)")
+
+    measure('legacy keyword scans (quality only)', legacy_quality, titles)
+
+    _parse.cache_clear()
+    measure('parser, every title a miss', lambda t: _parse.__wrapped__(t), titles)
+
+    _parse.cache_clear()
+    warm = measure('parser with LRU', parse_release_name, titles)
+    print(f"cache: {_parse.cache_info()}")
+    return warm
+
+if __name__ == '__main__':
+    run()
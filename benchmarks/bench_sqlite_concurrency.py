@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Concurrent progress writers and download-list readers against SQLite, default settings
+against the tuned profile (WAL pragmas, pooled connections, batched progress writes)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import OperationalError
+
+from utils.database import BatchWriter, enable_sqlite_pragmas
+
+ENGINE_OPTIONS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 10,
+    'connect_args': {'check_same_thread': False, 'timeout': 5},
+}
+
+def build(workdir, tuned):
+    app = Flask(__name__, instance_path=workdir)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    if tuned:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = ENGINE_OPTIONS
+    db = SQLAlchemy(app)
+
+    class Download(db.Model):
+        __table_args__ = (db.Index('ix_download_user_created', 'user_id', 'created_at', 'id'),)
+        id = db.Column(db.Integer, primary_key=True)
+        user_id = db.Column(db.String(80), nullable=False)
+        url = db.Column(db.String(500), nullable=False)
+        title = db.Column(db.String(200))
+        status = db.Column(db.String(50), default='pending')
+        progress = db.Column(db.Float, default=0.0)
+        created_at = db.Column(db.DateTime)
+
+    with app.app_context():
+        if tuned:
+            enable_sqlite_pragmas(db.engine)
+        db.create_all()
+        base = datetime(2025, 1, 1)
+        db.session.add_all(
+            Download(user_id=f"user{i % 20}", url=f"https://example.com/{i}", title=f"Video {i}",
+                     created_at=base + timedelta(seconds=i))
+            for i in range(5000)
+        )
+        db.session.commit()
+    return app, db, Download
+
+def run_profile(label, tuned, writers=8, readers=8, duration=3.0):
+    with tempfile.TemporaryDirectory() as workdir:
+        app, db, Download = build(workdir, tuned)
+        batch = BatchWriter(app, db, flush_interval=0.25) if tuned else None
+        stop = threading.Event()
+        counts = {'writes': 0, 'reads': 0, 'errors': 0}
+        read_latencies = []
+        lock = threading.Lock()
+
+        def writer(n):
+            tick = 0
+            with app.app_context():
+                while not stop.is_set():
+                    tick += 1
+                    download_id = n * 100 + tick % 100 + 1
+                    try:
+                        if batch:
+                            batch.update(Download, download_id, progress=tick % 100 / 100)
+                        else:
+                            Download.query.filter_by(id=download_id).update({'progress': tick % 100 / 100})
+                            db.session.commit()
+                        with lock:
+                            counts['writes'] += 1
+                    except OperationalError:
+                        db.session.rollback()
+                        with lock:
+                            counts['errors'] += 1
+                    # yt-dlp calls the progress hook every few milliseconds per download
+                    time.sleep(0.002)
+
+        def reader(n):
+            with app.app_context():
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    try:
+                        Download.query.with_entities(Download.id, Download.title, Download.progress).filter(
+                            Download.user_id == f"user{n % 20}"
+                        ).order_by(Download.created_at.desc(), Download.id.desc()).limit(50).all()
+                        db.session.rollback()
+                        with lock:
+                            counts['reads'] += 1
+                            read_latencies.append(time.perf_counter() - started)
+                    except OperationalError:
+                        db.session.rollback()
+                        with lock:
+                            counts['errors'] += 1
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        if batch:
+            batch.close()
+        with app.app_context():
+            db.engine.dispose()
+
+    read_latencies.sort()
+    p95 = read_latencies[int(len(read_latencies) * 0.95)] * 1000 if read_latencies else float('nan')
+    print(f"{label:<10} {counts['writes'] / duration:>10,.0f} progress updates/s "
+          f"{counts['reads'] / duration:>8,.0f} list reads/s  p95 read {p95:6.1f} ms  "
+          f"{counts['errors']} lock errors"
+          + (f"  ({batch.flushes} transactions)" if batch else ""))
+    return counts
+
+def run(writers=8, readers=8, duration=3.0):
+    print(f"{writers} progress writers, {readers} list readers, {duration:.0f} s each")
+    baseline = run_profile('default', False, writers, readers, duration)
+    tuned = run_profile('tuned', True, writers, readers, duration)
+    return baseline, tuned
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Cold start: `python -X importtime` breakdown of `import app`, and the time from
+spawning a server worker to its first /api/health response, checked against a budget
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Seconds, medians over the runs; generous enough for a slow CI box, tight enough
+# to catch yt-dlp or bs4 creeping back into the import path
+BUDGETS = {'import_app': 1.5, 'first_health': 3.0}
+# Loaded by the services on first use only, never by startup
+DEFERRED_MODULES = ('yt_dlp', 'bs4', 'cloudscraper', 'qbittorrentapi')
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+def direct_imports(modules, parent):
+    """Records imported directly by parent: children are printed before their parent, one level deeper"""
+    end = next(i for i, m in enumerate(modules) if m[0] == parent and m[3] == 0)
+    start = end
+    while start > 0 and modules[start - 1][3] > 0:
+        start -= 1
+    return [m for m in modules[start:end] if m[3] == 1]
+
+def import_breakdown(workdir):
+    """Wall time of `import app` in a fresh interpreter plus its importtime records"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=workdir, env=dict(os.environ, PYTHONPATH=BACKEND),
+        capture_output=True, text=True, check=True
+    )
+    return time.perf_counter() - started, parse_importtime(result.stderr)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def first_health(workdir, timeout=60):
+    """Seconds from spawning one serve.py worker until /api/health answers 200"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND, 'serve.py'), '--workers', '1', '--host', '127.0.0.1', '--port', str(port)],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"worker exited with {process.returncode} before answering")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"no /api/health response within {timeout}s")
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+def run(runs=5, top=15):
+    with tempfile.TemporaryDirectory() as workdir:
+        # The first run creates the databases; later runs start against existing ones like a restart
+        imports = [import_breakdown(workdir) for _ in range(runs)]
+        health = [first_health(workdir) for _ in range(runs)]
+
+    _, modules = imports[-1]
+    print(f"Direct imports of `import app` (last of {runs} runs)")
+    roots = direct_imports(modules, 'app')
+    for name, _, cumulative_us, _ in sorted(roots, key=lambda m: -m[2])[:top]:
+        print(f"  {name:<40} {cumulative_us / 1000:>8.1f} ms")
+
+    deferred = sorted({name for name, *_ in modules if name.split('.')[0] in DEFERRED_MODULES})
+    results = {
+        'import_app': statistics.median(elapsed for elapsed, _ in imports),
+        'first_health': statistics.median(health),
+    }
+    print()
+    for name, seconds in results.items():
+        verdict = 'ok' if seconds <= BUDGETS[name] else 'OVER BUDGET'
+        print(f"  {name:<14} {seconds * 1000:>8.1f} ms  (budget {BUDGETS[name] * 1000:.0f} ms)  {verdict}")
+    print(f"  deferred modules imported at startup: {', '.join(deferred) or 'none'}")
+    return results, deferred
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help='exit 1 when a budget is exceeded')
+    args = parser.parse_args(argv)
+
+    results, deferred = run(args.runs)
+    over = [name for name, seconds in results.items() if seconds > BUDGETS[name]]
+    if args.check and (over or deferred):
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
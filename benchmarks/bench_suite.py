@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite: YouTube search and formats against a fake yt-dlp, torrent
+search and popular listings against saved 1337x pages on a local server, auth,
+/api/downloads and stream proxy throughput, saved as JSON and checked against a baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from offline import FixtureServer, fake_yt_dlp, make_formats
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Slowdown of a case's median over the baseline's that --check fails on. Cases doing
+# loopback I/O or password hashing get more room, their medians move more between runs
+THRESHOLDS = {
+    'default': 0.25,
+    'torrent.search_torrents': 0.5,
+    'torrent.get_popular_torrents': 0.5,
+    'auth.register': 0.5,
+    'auth.login': 0.5,
+    'stream.proxy': 0.5,
+}
+
+SEEDED_DOWNLOADS = 500
+STREAM_SIZE = 8 * 1024 * 1024
+LIST_FIELDS = frozenset({'id', 'title', 'thumbnail', 'duration'})
+
+class Environment:
+    """The real app built by create_app(), pointed at the fixture server"""
+
+    def __init__(self, server):
+        import app as backend
+
+        self.backend = backend
+        self.server = server
+        self.app = backend.create_app()
+        self.app.config.update(
+            TORRENT_PROVIDERS=['1337x'],
+            TORRENT_MIRRORS={'1337x': [server.url]},
+            SHARED_STATE_URL='memory://'
+        )
+        # Rate limits would turn most of the auth iterations into 429s
+        backend.admission.enabled = False
+        self.client = self.app.test_client()
+        self.formats = make_formats()
+
+        with self.app.app_context():
+            from flask_jwt_extended import create_access_token
+            self.youtube = backend.youtube_service._get_current_object()
+            self.torrents = backend.torrent_service._get_current_object()
+            now = datetime.now(timezone.utc)
+            backend.db.session.add_all([
+                backend.Download(
+                    user_id='bench-user', url=f"https://www.youtube.com/watch?v=vid{n:08d}", title=f"Download {n}",
+                    status='completed', progress=100.0, created_at=now - timedelta(minutes=n)
+                )
+                for n in range(SEEDED_DOWNLOADS)
+            ])
+            backend.db.session.commit()
+            token = create_access_token(identity='bench-user')
+            stream = self.youtube.download_video({'url': 'https://www.youtube.com/watch?v=vid00000000', 'quality': 'best'})
+        self.auth_headers = {'Authorization': f"Bearer {token}"}
+        self.stream_path = stream['download_url']
+        self.registered = []
+
+def expect(condition, case, detail):
+    # A failing call is usually faster than a working one, never time it
+    if not condition:
+        raise RuntimeError(f"{case}: {detail}")
+
+def bench_search_videos(env, i):
+    result = env.youtube.search_videos(f"benchmark {i}", limit=20)
+    expect(result['success'] and result['count'] == 20, 'youtube.search_videos', result.get('error'))
+
+def bench_search_videos_flat(env, i):
+    result = env.youtube.search_videos(f"benchmark {i}", limit=20, fields=LIST_FIELDS)
+    expect(result['success'] and result['count'] == 20, 'youtube.search_videos.flat', result.get('error'))
+
+def bench_available_formats(env, i):
+    formats = env.youtube._get_available_formats(env.formats)
+    expect(formats['video_formats'], 'youtube._get_available_formats', 'no video formats')
+
+def bench_search_torrents(env, i):
+    # A new query each time, so the page cache never answers
+    result = env.torrents.search_torrents(f"benchmark{i}")
+    expect(result['success'] and result['count'] == 20, 'torrent.search_torrents', result.get('error'))
+
+def bench_popular_torrents(env, i):
+    result = env.torrents.get_popular_torrents(('movies', 'tv', 'games', 'music', 'apps')[i % 5])
+    expect(result['success'] and result['count'] == 15, 'torrent.get_popular_torrents', result.get('error'))
+
+def bench_register(env, i):
+    username = f"bench{i}"
+    response = env.client.post('/api/auth/register', json={
+        'username': username, 'email': f"{username}@example.com", 'password': 'correct horse battery staple'
+    })
+    expect(response.json.get('success'), 'auth.register', response.json.get('error'))
+    env.registered.append(username)
+
+def bench_login(env, i):
+    username = env.registered[i % len(env.registered)]
+    response = env.client.post('/api/auth/login', json={'username': username, 'password': 'correct horse battery staple'})
+    expect(response.json.get('success'), 'auth.login', response.json.get('error'))
+
+def bench_downloads(env, i):
+    response = env.client.get('/api/downloads?limit=50', headers=env.auth_headers)
+    expect(response.status_code == 200 and len(response.json['downloads']) == 50, 'api.downloads', response.status_code)
+
+def bench_stream(env, i):
+    response = env.client.get(env.stream_path)
+    received = sum(len(chunk) for chunk in response.response)
+    response.close()
+    expect(received == STREAM_SIZE, 'stream.proxy', f"{received} of {STREAM_SIZE} bytes")
+    return received
+
+# (name, function, iterations multiplier)
+CASES = [
+    ('youtube.search_videos', bench_search_videos, 2),
+    ('youtube.search_videos.flat', bench_search_videos_flat, 2),
+    ('youtube._get_available_formats', bench_available_formats, 50),
+    ('torrent.search_torrents', bench_search_torrents, 1),
+    ('torrent.get_popular_torrents', bench_popular_torrents, 1),
+    ('auth.register', bench_register, 1),
+    ('auth.login', bench_login, 1),
+    ('api.downloads', bench_downloads, 5),
+    ('stream.proxy', bench_stream, 1),
+]
+
+def summarize(durations, transferred=0):
+    durations = sorted(durations)
+    summary = {
+        'iterations': len(durations),
+        'mean_ms': round(statistics.fmean(durations) * 1000, 4),
+        'p50_ms': round(statistics.median(durations) * 1000, 4),
+        'p95_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000, 4),
+        'min_ms': round(durations[0] * 1000, 4),
+        'max_ms': round(durations[-1] * 1000, 4),
+    }
+    if transferred:
+        summary['mb_per_s'] = round(transferred / len(durations) / statistics.median(durations) / 1e6, 2)
+    return summary
+
+def run_case(env, func, iterations):
+    func(env, 0)  # warm-up: imports, pools, first-use service construction
+    durations = []
+    transferred = 0
+    for i in range(1, iterations + 1):
+        started = time.perf_counter()
+        received = func(env, i)
+        durations.append(time.perf_counter() - started)
+        transferred += received or 0
+    return summarize(durations, transferred)
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run(iterations=10, only=None):
+    """Run the selected cases in a scratch directory and return the results document"""
+    cases = [case for case in CASES if not only or any(case[0].startswith(prefix) for prefix in only)]
+    results = {}
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, FixtureServer(media_size=STREAM_SIZE) as server:
+        os.chdir(workdir)  # databases, downloads and logs land here
+        try:
+            with fake_yt_dlp(server.url):
+                env = Environment(server)
+                for name, func, multiplier in cases:
+                    if name == 'auth.login' and not env.registered:
+                        bench_register(env, 0)
+                    results[name] = run_case(env, func, iterations * multiplier)
+                    print(f"  {name:<32} p50 {results[name]['p50_ms']:>10.3f} ms  p95 {results[name]['p95_ms']:>10.3f} ms"
+                          + (f"  {results[name]['mb_per_s']:>8.1f} MB/s" if 'mb_per_s' in results[name] else ''))
+        finally:
+            os.chdir(previous)
+
+    return {
+        'suite': 'offline',
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'iterations': iterations,
+        'cases': results,
+    }
+
+def compare(current, baseline, thresholds=THRESHOLDS, override=None):
+    """[(case, baseline_ms, current_ms, change)] for every case slower than its threshold allows"""
+    regressions = []
+    for name, result in current['cases'].items():
+        before = baseline.get('cases', {}).get(name)
+        if not before or not before.get('p50_ms'):
+            continue
+        change = result['p50_ms'] / before['p50_ms'] - 1
+        allowed = override if override is not None else thresholds.get(name, thresholds['default'])
+        if change > allowed:
+            regressions.append((name, before['p50_ms'], result['p50_ms'], change))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=10, help='timed runs per case, before its multiplier')
+    parser.add_argument('--cases', help='comma-separated case names or prefixes, e.g. youtube,auth.login')
+    parser.add_argument('--output', help='results file, defaults to benchmarks/results/offline-<time>.json')
+    parser.add_argument('--baseline', help='earlier results file to compare medians against')
+    parser.add_argument('--threshold', type=float, help='allowed slowdown for every case, e.g. 0.2 for 20%%')
+    parser.add_argument('--check', action='store_true', help='exit 1 when a case regressed against the baseline')
+    args = parser.parse_args(argv)
+
+    only = [name.strip() for name in args.cases.split(',')] if args.cases else None
+    results = run(args.iterations, only)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"offline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, override=args.threshold)
+    for name, before, after, change in regressions:
+        print(f"  REGRESSION {name:<32} {before:>10.3f} ms -> {after:>10.3f} ms  ({change:+.0%})")
+    if not regressions:
+        print(f"No regressions against {args.baseline}")
+    return 1 if args.check and regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
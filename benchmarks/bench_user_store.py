@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Login throughput at 100k users: indexed SQLite store against the legacy JSON file
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from flask import Flask
+from flask_jwt_extended import JWTManager
+
+from services.auth_service import AuthService
+from services.user_store import JsonUserStore, SQLiteUserStore
+
+PASSWORD = 'benchmark-password'
+
+def make_users(count, password_hash):
+    return {
+        f"user{i}": {
+            'username': f"user{i}",
+            'email': f"user{i}@example.com",
+            'password_hash': password_hash,
+            'created_at': '2025-01-01T00:00:00',
+            'last_login': None,
+            'is_active': True,
+            'profile': {'full_name': f"User {i}", 'avatar': None, 'preferences': {}}
+        }
+        for i in range(count)
+    }
+
+def measure(label, auth, logins, count):
+    started = time.perf_counter()
+    for i in range(logins):
+        result = auth.login_user({'username': f"user{(i * 7919) % count}", 'password': PASSWORD})
+        assert result['success'], result
+    elapsed = time.perf_counter() - started
+    auth.close()  # flush buffered last_login updates while the store still exists
+    print(f"{label:<28} {logins / elapsed:>10,.1f} logins/s  ({elapsed / logins * 1000:.2f} ms/login)")
+    return logins / elapsed
+
+def run(count=100000, sqlite_logins=2000, json_logins=5):
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'benchmark-secret-key-of-32-bytes!'
+    JWTManager(app)
+
+    with tempfile.TemporaryDirectory() as workdir, app.app_context():
+        users_file = os.path.join(workdir, 'users_data.json')
+        password_hash = AuthService(store=JsonUserStore(users_file)).hash_password(PASSWORD)
+        with open(users_file, 'w') as f:
+            json.dump(make_users(count, password_hash), f, indent=2)
+        print(f"{count:,} users, users_data.json is {os.path.getsize(users_file) / 1e6:.1f} MB")
+
+        started = time.perf_counter()
+        store = SQLiteUserStore(os.path.join(workdir, 'users.db'), migrate_from=users_file)
+        print(f"migration                    {time.perf_counter() - started:.2f} s for {store.count():,} users")
+
+        measure('json file', AuthService(store=JsonUserStore(users_file)), json_logins, count)
+        return measure('sqlite store', AuthService(store=store), sqlite_logins, count)
+
+if __name__ == '__main__':
+    run()
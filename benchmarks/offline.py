@@ -0,0 +1,200 @@
+"""
+Network-free stand-ins for the upstreams: a fake yt-dlp returning info dicts the size
+of real ones, and a local server replaying saved 1337x pages and serving media bytes
+"""
+
+import hashlib
+import os
+import re
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Where FakeYoutubeDL points format URLs; FixtureServer.url once it is running
+MEDIA_BASE_URL = 'https://rr3---sn-example.googlevideo.com'
+
+def make_formats(base_url=None):
+    """Roughly the format list yt-dlp reports for a popular 4K upload"""
+    base_url = base_url or MEDIA_BASE_URL
+    signature = 'x' * 400
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-us,en;q=0.5',
+        'Sec-Fetch-Mode': 'navigate',
+    }
+    formats = []
+    for i, abr in enumerate((48, 50, 70, 128, 160)):
+        formats.append({
+            'format_id': str(139 + i), 'ext': 'm4a' if i % 2 else 'webm', 'vcodec': 'none',
+            'acodec': 'mp4a.40.2' if i % 2 else 'opus', 'abr': abr, 'filesize': 1200000 * (i + 1),
+            'url': f"{base_url}/media/{139 + i}?{signature}", 'http_headers': dict(headers), 'protocol': 'https'
+        })
+    for i, height in enumerate((144, 240, 360, 480, 720, 1080, 1440, 2160) * 3):
+        formats.append({
+            'format_id': str(160 + i), 'ext': ('mp4', 'webm')[i % 2], 'height': height, 'fps': 30,
+            'vcodec': ('avc1.4d401e', 'vp9', 'av01.0.08M.08')[i // 8], 'acodec': 'none',
+            'filesize': height * 90000,
+            'url': f"{base_url}/media/{160 + i}?{signature}", 'http_headers': dict(headers), 'protocol': 'https'
+        })
+    # The progressive formats carry audio and video in one file
+    for format_id, height in (('18', 360), ('22', 720)):
+        formats.append({
+            'format_id': format_id, 'ext': 'mp4', 'height': height, 'fps': 30, 'vcodec': 'avc1.64001F',
+            'acodec': 'mp4a.40.2', 'filesize': height * 120000,
+            'url': f"{base_url}/media/{format_id}?{signature}", 'http_headers': dict(headers), 'protocol': 'https'
+        })
+    return formats
+
+def make_entry(i, base_url=None):
+    """A full extract_info result for one video"""
+    return {
+        'id': f"vid{i:08d}", 'title': f"Benchmark video number {i} – official upload",
+        'duration': 180 + i * 37, 'view_count': 1000003 * (i + 1), 'like_count': 4242 * (i + 1),
+        'uploader': f"Channel {i % 7}", 'upload_date': '20250101',
+        'description': 'A long description with links and credits. ' * 12,
+        'channel_url': f"https://www.youtube.com/channel/UC{i:022d}",
+        'webpage_url': f"https://www.youtube.com/watch?v=vid{i:08d}",
+        'thumbnail': f"https://i.ytimg.com/vi/vid{i:08d}/maxresdefault.jpg",
+        'thumbnails': [{'url': f"https://i.ytimg.com/vi/vid{i:08d}/{size}.jpg"} for size in ('default', 'mqdefault', 'hqdefault')],
+        'tags': [f"tag{n}" for n in range(25)],
+        'categories': ['Music'],
+        'chapters': [{'start_time': n * 30.0, 'end_time': n * 30.0 + 30, 'title': f"Chapter {n}"} for n in range(12)],
+        'heatmap': [{'start_time': n * 1.8, 'end_time': n * 1.8 + 1.8, 'value': (n % 17) / 17} for n in range(100)],
+        'automatic_captions': {
+            lang: [{'ext': ext, 'url': f"https://www.youtube.com/api/timedtext?v=vid{i:08d}&lang={lang}&fmt={ext}"}
+                   for ext in ('json3', 'srv1', 'srv2', 'srv3', 'ttml', 'vtt')]
+            for lang in ('en', 'de', 'es', 'fr', 'ja', 'pt', 'ru', 'zh-Hans')
+        },
+        'formats': make_formats(base_url),
+    }
+
+def make_flat_entry(i):
+    """A search entry as extract_flat='in_playlist' reports it"""
+    return {
+        '_type': 'url', 'ie_key': 'Youtube', 'id': f"vid{i:08d}",
+        'url': f"https://www.youtube.com/watch?v=vid{i:08d}",
+        'title': f"Benchmark video number {i} – official upload", 'duration': 180.0 + i * 37,
+        'view_count': 1000003 * (i + 1), 'uploader': f"Channel {i % 7}",
+        'channel_url': f"https://www.youtube.com/channel/UC{i:022d}",
+        'thumbnails': [{'url': f"https://i.ytimg.com/vi/vid{i:08d}/hqdefault.jpg", 'height': 360, 'width': 480}],
+    }
+
+class FakeYoutubeDL:
+    """Answers extract_info from memory: 'ytsearchN:query' with N entries, anything else with one video"""
+
+    def __init__(self, opts=None):
+        self.opts = opts or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, query, download=False):
+        if query.startswith('ytsearch'):
+            limit = int(query.split(':', 1)[0][len('ytsearch'):] or 1)
+            flat = self.opts.get('extract_flat') == 'in_playlist'
+            return {
+                '_type': 'playlist', 'id': query.split(':', 1)[1], 'extractor': 'youtube:search',
+                'entries': [make_flat_entry(i) if flat else make_entry(i) for i in range(limit)]
+            }
+        return make_entry(0)
+
+@contextmanager
+def fake_yt_dlp(media_base_url=None):
+    """Swap yt_dlp.YoutubeDL for FakeYoutubeDL, with format URLs on media_base_url"""
+    global MEDIA_BASE_URL
+    import yt_dlp
+
+    original, previous_base = yt_dlp.YoutubeDL, MEDIA_BASE_URL
+    yt_dlp.YoutubeDL = FakeYoutubeDL
+    if media_base_url:
+        MEDIA_BASE_URL = media_base_url
+    try:
+        yield FakeYoutubeDL
+    finally:
+        yt_dlp.YoutubeDL = original
+        MEDIA_BASE_URL = previous_base
+
+def read_fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), encoding='utf-8') as f:
+        return f.read()
+
+class FixtureServer:
+    """
+    Local HTTP server in place of 1337x and the googlevideo CDN: /search/... and
+    /popular-... replay the saved listings, /torrent/<id>/<slug>/ the saved detail
+    page with a magnet per id, and /media/<itag> streams media_size bytes
+    """
+
+    def __init__(self, media_size=8 * 1024 * 1024, chunk_size=64 * 1024):
+        self.pages = {name: read_fixture('1337x', f"{name}.html") for name in ('search', 'popular', 'detail')}
+        self.media_size = media_size
+        self.chunk = os.urandom(chunk_size)
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.hits += 1
+                server._dispatch(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
+
+    def _dispatch(self, handler):
+        path = handler.path.split('?', 1)[0]
+        try:
+            if path.startswith('/media/'):
+                self._send_media(handler)
+            elif path.startswith('/search/'):
+                self._send_page(handler, self.pages['search'])
+            elif path.startswith('/popular-'):
+                self._send_page(handler, self.pages['popular'])
+            elif path.startswith('/torrent/'):
+                infohash = hashlib.sha1(path.encode()).hexdigest()
+                title = re.sub(r'[^\w.-]', '', path.rstrip('/').rsplit('/', 1)[-1])
+                self._send_page(handler, self.pages['detail'].replace('INFOHASH', infohash).replace('TITLE', title))
+            else:
+                self._send_page(handler, 'not found', status=404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_page(self, handler, html, status=200):
+        payload = html.encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _send_media(self, handler):
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'video/mp4')
+        handler.send_header('Content-Length', str(self.media_size))
+        handler.end_headers()
+        remaining = self.media_size
+        while remaining > 0:
+            piece = self.chunk[:remaining]
+            handler.wfile.write(piece)
+            remaining -= len(piece)
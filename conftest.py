@@ -0,0 +1,170 @@
+"""
+Shared pytest fixtures: local stand-in servers for the upstream sites and the qBittorrent
+Web API the backend talks to
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# Services import each other as top-level packages, exactly as app.py does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+class StandInServer:
+    """Tiny HTTP server answering from a {path: handler} table on a free local port"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._dispatch(self, 'GET')
+
+            def do_POST(self):
+                server._dispatch(self, 'POST')
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def _dispatch(self, handler, method):
+        parsed = urlparse(handler.path)
+        self.requests.append((method, handler.path))
+
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+
+        route = self.routes.get(parsed.path)
+        if route is None:
+            status, content_type, payload = 404, 'text/plain', 'not found'
+        else:
+            status, content_type, payload = route(parsed, body)
+
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload)
+        if isinstance(payload, str):
+            payload = payload.encode()
+
+        try:
+            handler.send_response(status)
+            handler.send_header('Content-Type', content_type)
+            handler.send_header('Content-Length', str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def respond(payload, status=200, content_type=None, delay=0):
+    """Build a route handler that sleeps for delay seconds then returns payload"""
+    if content_type is None:
+        content_type = 'application/json' if isinstance(payload, (dict, list)) else 'text/html'
+
+    def handler(parsed, body):
+        if delay:
+            time.sleep(delay)
+        return status, content_type, payload
+
+    return handler
+
+def x1337_listing(rows):
+    """Render a 1337x search or popular page for (title, href, size, seeds, leeches) rows"""
+    body = ''.join(
+        f'<tr><td class="coll-1 name"><a href="{href}">{title}</a></td>'
+        f'<td class="coll-2 seeds">{seeds}</td><td class="coll-3 leeches">{leeches}</td>'
+        f'<td class="coll-4 size">{size}</td></tr>'
+        for title, href, size, seeds, leeches in rows
+    )
+    return f'<html><body><table class="table-list"><tbody>{body}</tbody></table></body></html>'
+
+def x1337_detail(magnet_link):
+    """Render a 1337x torrent detail page carrying a magnet link"""
+    return f'<html><body><ul><li><a href="{magnet_link}">Magnet Download</a></li></ul></body></html>'
+
+HASH_A = 'a' * 40
+HASH_B = 'b' * 40
+
+class FakeQBittorrent:
+    """Imitates the parts of the qBittorrent Web API we use, including rid based sync deltas"""
+
+    def __init__(self):
+        self.add_calls = []
+        self.sync_rids = []
+        # rid -> response the client gets when it asks with that rid
+        self.deltas = {
+            0: {'rid': 1, 'full_update': True, 'torrents': {
+                HASH_A: {'name': 'Alpha', 'progress': 0.1, 'state': 'downloading', 'hash': HASH_A, 'tags': ''},
+                HASH_B: {'name': 'Bravo', 'progress': 0.5, 'state': 'downloading'},
+            }},
+            1: {'rid': 2, 'torrents': {HASH_A: {'progress': 0.6, 'dlspeed': 1024}}},
+            2: {'rid': 3, 'torrents_removed': [HASH_B]},
+        }
+
+    def routes(self):
+        def text(value):
+            return lambda parsed, body: (200, 'text/plain', value)
+
+        def add(parsed, body):
+            self.add_calls.append(body.decode())
+            return 200, 'text/plain', 'Ok.'
+
+        def sync(parsed, body):
+            params = parse_qs(parsed.query)
+            params.update(parse_qs(body.decode()))
+            rid = int(params.get('rid', ['0'])[0])
+            self.sync_rids.append(rid)
+            return 200, 'application/json', self.deltas.get(rid, {'rid': rid})
+
+        return {
+            '/api/v2/auth/login': text('Ok.'),
+            '/api/v2/app/version': text('v4.6.0'),
+            '/api/v2/app/webapiVersion': text('2.9.3'),
+            '/api/v2/torrents/add': add,
+            '/api/v2/sync/maindata': sync,
+        }
+
+@pytest.fixture
+def stand_in_server():
+    """Factory fixture: stand_in_server(routes) starts a server that is closed after the test"""
+    servers = []
+
+    def start(routes):
+        server = StandInServer(routes)
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.close()
+
+@pytest.fixture(scope='session')
+def backend_app(tmp_path_factory):
+    """The real app module, imported from a scratch directory so its databases land there"""
+    workdir = tmp_path_factory.mktemp('backend')
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import app as backend
+        backend.app.config['TESTING'] = True
+        # Endpoint tests share one client address; rate limits get their own tests
+        backend.admission.enabled = False
+        yield backend
+    finally:
+        os.chdir(previous)
@@ -213,6 +213,11 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
   };
 
   const logout = () => {
+    // Revoke the token server-side; the local session ends either way
+    const token = localStorage.getItem('token');
+    if (token) {
+      authAPI.logout(token).catch(() => {});
+    }
     localStorage.removeItem('token');
     dispatch({ type: 'LOGOUT' });
     toast.success('Logged out successfully');
@@ -23,7 +23,7 @@ export const useDownloads = () => {
     refetch,
   } = useQuery<Download[]>('downloads', async () => {
     const response = await downloadsAPI.getAll();
-    return response.data;
+    return response.data.downloads;
   });
 
   // Delete download mutation
@@ -23,17 +23,39 @@ import {
 } from '@mui/icons-material';
 import { motion } from 'framer-motion';
 import { useAuth } from '../hooks/useAuth';
-import { useDownloads } from '../hooks/useDownloads';
+import { Download as DownloadItem } from '../hooks/useDownloads';
 import { useNavigate } from 'react-router-dom';
+import { useQuery } from 'react-query';
+import { dashboardAPI } from '../services/api';
+
+interface DashboardPart<T> {
+  status: 'ok' | 'error' | 'timeout';
+  data?: T;
+  error?: string;
+  elapsed_ms: number;
+}
+
+interface DashboardData {
+  parts: {
+    downloads?: DashboardPart<{ total: number; counts: Record<string, number>; recent: DownloadItem[] }>;
+    system?: DashboardPart<Record<string, unknown>>;
+  };
+  partial: boolean;
+}
 
 const Dashboard: React.FC = () => {
   const { user } = useAuth();
-  const { downloads, isLoading, refetch } = useDownloads();
+  const { data: dashboard, isLoading, refetch } = useQuery<DashboardData>('dashboard', async () => {
+    const response = await dashboardAPI.get({ parts: 'downloads,system' });
+    return response.data;
+  });
   const navigate = useNavigate();
 
-  const recentDownloads = downloads.slice(0, 5);
-  const completedDownloads = downloads.filter(d => d.status === 'completed').length;
-  const activeDownloads = downloads.filter(d => d.status === 'downloading' || d.status === 'pending').length;
+  const downloadStats = dashboard?.parts.downloads?.data;
+  const counts = downloadStats?.counts ?? {};
+  const recentDownloads = downloadStats?.recent ?? [];
+  const completedDownloads = counts.completed ?? 0;
+  const activeDownloads = (counts.downloading ?? 0) + (counts.pending ?? 0);
 
   const quickActions = [
     {
@@ -69,7 +91,7 @@ const Dashboard: React.FC = () => {
   const stats = [
     {
       title: 'Total Downloads',
-      value: downloads.length,
+      value: downloadStats?.total ?? 0,
       icon: <Download />,
       color: '#667eea',
     },
@@ -51,15 +51,21 @@ export const authAPI = {
   getProfile: () => api.get('/auth/profile'),
   
   updateProfile: (profileData: any) => api.put('/auth/profile', profileData),
+  
+  logout: (token: string) =>
+    api.post('/auth/logout', null, { headers: { Authorization: `Bearer ${token}` } }),
+  
+  revokeAllSessions: () => api.post('/auth/revoke-all'),
 };
 
 // YouTube API
 export const youtubeAPI = {
-  search: (query: string, limit: number = 20) =>
-    api.post('/youtube/search', { query, limit }),
+  // fields limits each result to the named keys, e.g. ['id', 'title', 'thumbnail', 'duration_str']
+  search: (query: string, limit: number = 20, fields?: string[]) =>
+    api.post('/youtube/search', { query, limit, fields }),
   
-  getVideoInfo: (url: string) =>
-    api.post('/youtube/info', { url }),
+  getVideoInfo: (url: string, fields?: string[]) =>
+    api.post('/youtube/info', { url, fields }),
   
   download: (data: {
     url: string;
@@ -70,13 +76,32 @@ export const youtubeAPI = {
 
 // Torrent API
 export const torrentAPI = {
-  search: (query: string) =>
-    api.post('/torrent/search', { query }),
+  search: (query: string, fields?: string[]) =>
+    api.post('/torrent/search', { query, fields }),
   
-  getPopular: (category: string = 'movies') =>
-    api.get(`/torrent/popular?category=${category}`),
+  browse: (query: string, options: {
+    sort?: 'seeders' | 'size' | 'quality';
+    order?: 'asc' | 'desc';
+    filters?: {
+      min_seeders?: number;
+      qualities?: string[];
+      min_size?: number | string;
+      max_size?: number | string;
+    };
+    cursor?: string;
+    limit?: number;
+  } = {}) =>
+    api.post('/torrent/search', { query, sort: 'seeders', ...options }),
+  
+  getPopular: (category: string = 'movies', fields?: string[]) =>
+    api.get('/torrent/popular', { params: { category, fields: fields?.join(',') } }),
   
   launch: () => api.post('/torrent/launch'),
+  
+  add: (magnetLinks: string[], category?: string) =>
+    api.post('/torrent/add', { magnet_links: magnetLinks, category }),
+  
+  getActive: () => api.get('/torrent/active'),
 };
 
 // Media API
@@ -90,7 +115,8 @@ export const mediaAPI = {
 
 // Downloads API
 export const downloadsAPI = {
-  getAll: () => api.get('/downloads'),
+  getAll: (params: { limit?: number; cursor?: string; status?: string } = {}) =>
+    api.get('/downloads', { params }),
   
   delete: (downloadId: number) => api.delete(`/downloads/${downloadId}`),
   
@@ -98,6 +124,12 @@ export const downloadsAPI = {
     api.get(`/downloads/${downloadId}/file`, { responseType: 'blob' }),
 };
 
+// Dashboard API: every part in one round trip, each with its own status
+export const dashboardAPI = {
+  get: (params: { parts?: string; category?: string } = {}) =>
+    api.get('/dashboard', { params }),
+};
+
 // System API
 export const systemAPI = {
   getInfo: () => api.get('/system/info'),
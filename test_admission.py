@@ -0,0 +1,108 @@
+"""
+Admission control tests: token buckets, the priority queue and 429 responses from the app
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.admission import (
+    ANONYMOUS, AUTHENTICATED, AdmissionControl, AdmissionQueue, AdmissionRejected, KeyedRateLimiter, TokenBucket
+)
+
+def test_token_bucket_allows_burst_then_reports_wait():
+    bucket = TokenBucket(rate=2.0, burst=3)
+    now = bucket.updated
+    assert [bucket.take(now) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take(now) == pytest.approx(0.5)
+    assert bucket.take(now + 0.5) == 0
+
+def test_keyed_limiter_is_per_key_and_bounded():
+    limiter = KeyedRateLimiter(rate=0.01, burst=1, max_keys=2)
+    limiter.check('a')
+    limiter.check('b')
+    with pytest.raises(AdmissionRejected) as e:
+        limiter.check('a')
+    assert e.value.retry_after >= 99
+
+    limiter.check('c')
+    # 'a' was used more recently than 'b', so 'b' is evicted
+    assert list(limiter._buckets) == ['a', 'c']
+
+def test_queue_serves_authenticated_before_anonymous():
+    queue = AdmissionQueue(max_concurrent=1, max_queue=4, max_wait=5)
+    queue.acquire()
+    order = []
+
+    def waiter(name, priority):
+        queue.acquire(priority)
+        order.append(name)
+        queue.release(0.01)
+
+    threads = [threading.Thread(target=waiter, args=('anonymous', ANONYMOUS))]
+    threads[0].start()
+    while queue.snapshot()['queued'] < 1:
+        time.sleep(0.01)
+    threads.append(threading.Thread(target=waiter, args=('user', AUTHENTICATED)))
+    threads[1].start()
+    while queue.snapshot()['queued'] < 2:
+        time.sleep(0.01)
+
+    queue.release(0.01)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ['user', 'anonymous']
+    assert queue.snapshot()['active'] == 0
+
+def test_queue_sheds_when_full_or_wait_exceeds_budget():
+    queue = AdmissionQueue(max_concurrent=1, max_queue=1, max_wait=0.1)
+    queue.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(AdmissionRejected):
+        queue.acquire()
+    assert time.monotonic() - started >= 0.1
+
+    def shed_waiter():
+        with pytest.raises(AdmissionRejected):
+            queue.acquire()
+
+    blocker = threading.Thread(target=shed_waiter)
+    blocker.start()
+    while queue.snapshot()['queued'] < 1:
+        time.sleep(0.01)
+    with pytest.raises(AdmissionRejected) as e:
+        queue.acquire()
+    assert 'queue is full' in str(e.value)
+    blocker.join()
+    assert queue.snapshot()['shed'] == 3
+
+@pytest.fixture
+def strict_admission(backend_app, monkeypatch):
+    admission = AdmissionControl(limits={
+        'anonymous': {'rate': 0.01, 'burst': 2},
+        'auth': {'rate': 0.01, 'burst': 3},
+    })
+    # Routes hold the decorator's closure, so swap the limiters rather than the object
+    monkeypatch.setattr(backend_app.admission, 'enabled', True)
+    monkeypatch.setattr(backend_app.admission, 'limiters', admission.limiters)
+    return backend_app.app.test_client()
+
+def test_expensive_route_returns_429_with_retry_after(strict_admission):
+    statuses = [strict_admission.post('/api/youtube/info', json={}).status_code for _ in range(3)]
+    assert statuses == [400, 400, 429]
+
+    response = strict_admission.post('/api/youtube/info', json={})
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.json['success'] is False and response.json['retry_after'] >= 1
+
+def test_login_is_limited_per_account(strict_admission):
+    for _ in range(3):
+        strict_admission.post('/api/auth/login', json={'username': 'victim', 'password': 'guess1'},
+                              environ_base={'REMOTE_ADDR': f'10.0.0.{_}'})
+
+    response = strict_admission.post('/api/auth/login', json={'username': 'Victim', 'password': 'guess1'},
+                                     environ_base={'REMOTE_ADDR': '10.0.0.99'})
+    assert response.status_code == 429
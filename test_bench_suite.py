@@ -0,0 +1,50 @@
+"""
+Offline benchmark suite: regression checks against a baseline, and one short run end to end
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+import bench_suite
+
+def results(**medians):
+    return {'cases': {name.replace('_', '.'): {'p50_ms': value} for name, value in medians.items()}}
+
+def test_compare_flags_cases_slower_than_their_threshold():
+    baseline = results(api_downloads=2.0, auth_login=100.0, youtube_search=4.0)
+    current = results(api_downloads=2.6, auth_login=140.0, youtube_search=4.1, stream_proxy=20.0)
+
+    regressions = bench_suite.compare(current, baseline)
+
+    # 30% over the default 25%; login stays within its looser 50%; new cases have no baseline
+    assert [(name, round(change, 2)) for name, _, _, change in regressions] == [('api.downloads', 0.3)]
+    assert [name for name, *_ in bench_suite.compare(current, baseline, override=0.5)] == []
+    assert {name for name, *_ in bench_suite.compare(current, baseline, override=0.01)} == {
+        'api.downloads', 'auth.login', 'youtube.search'
+    }
+
+def test_offline_run_writes_results_and_fails_check_on_regression(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'cases': {'api.downloads': {'p50_ms': 0.0001}}}))
+    output = tmp_path / 'results.json'
+
+    result = subprocess.run(
+        [sys.executable, os.path.join('benchmarks', 'bench_suite.py'), '--iterations', '1',
+         '--cases', 'youtube,torrent.get_popular,api.downloads,stream', '--output', str(output),
+         '--baseline', str(baseline), '--check'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=300
+    )
+
+    assert result.returncode == 1, result.stderr
+    assert 'REGRESSION api.downloads' in result.stdout
+    document = json.loads(output.read_text())
+    assert set(document['cases']) == {
+        'youtube.search_videos', 'youtube.search_videos.flat', 'youtube._get_available_formats',
+        'torrent.get_popular_torrents', 'api.downloads', 'stream.proxy'
+    }
+    assert document['cases']['youtube._get_available_formats']['iterations'] == 50
+    assert document['cases']['stream.proxy']['mb_per_s'] > 0
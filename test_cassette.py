@@ -0,0 +1,141 @@
+"""
+HTTP record/replay tests: requests, cloudscraper and yt-dlp exchanges recorded against
+a stand-in server, then replayed with the server gone
+"""
+
+import json
+import time
+
+import cloudscraper
+import pytest
+import requests
+import yt_dlp
+from flask import Flask
+from yt_dlp.networking.exceptions import HTTPError
+
+from conftest import respond, x1337_detail
+from utils import cassette
+from utils.cassette import CassetteMiss, use_cassette
+
+MAGNET = 'magnet:?xt=urn:btih:' + 'c' * 40
+
+@pytest.fixture(autouse=True)
+def network_restored():
+    yield
+    cassette.uninstall()
+
+def counting(payloads):
+    """Route handler answering with the next payload on each call"""
+    calls = iter(payloads)
+    return lambda parsed, body: (200, 'application/json', next(calls))
+
+def test_requests_and_cloudscraper_replay_without_the_network(stand_in_server, tmp_path):
+    path = str(tmp_path / 'upstream.jsonl')
+    upstream = stand_in_server({
+        '/torrent/7/mint/': respond(x1337_detail(MAGNET)),
+        '/q.php': counting([[{'name': 'first'}], [{'name': 'second'}]]),
+    })
+
+    with use_cassette(path, 'record'):
+        detail = cloudscraper.create_scraper().get(upstream.url + '/torrent/7/mint/', timeout=5)
+        first = requests.get(upstream.url + '/q.php', params={'q': 'linux', 'cat': 0}, timeout=5).json()
+        second = requests.get(upstream.url + '/q.php', params={'cat': 0, 'q': 'linux'}, timeout=5).json()
+        missing = requests.get(upstream.url + '/nowhere', timeout=5)
+    upstream.close()
+    recorded = len(upstream.requests)
+
+    with use_cassette(path) as replay:
+        assert len(replay) == 4
+        assert cloudscraper.create_scraper().get(upstream.url + '/torrent/7/mint/').text == detail.text
+        # Same query in any order; repeats come back in recorded order, then start over
+        replies = [requests.get(upstream.url + '/q.php', params={'q': 'linux', 'cat': 0}).json() for _ in range(3)]
+        assert replies == [first, second, first]
+        assert requests.get(upstream.url + '/nowhere').status_code == missing.status_code == 404
+        with pytest.raises(CassetteMiss):
+            requests.get(upstream.url + '/q.php', params={'q': 'bsd'})
+
+    assert len(upstream.requests) == recorded
+
+def test_replay_can_keep_the_recorded_latency(stand_in_server, tmp_path):
+    path = str(tmp_path / 'slow.jsonl')
+    upstream = stand_in_server({'/slow': respond('late', delay=0.3)})
+    with use_cassette(path, 'record'):
+        requests.get(upstream.url + '/slow', timeout=5)
+
+    recorded = json.loads(open(path).read())
+    assert recorded['elapsed'] >= 0.3 and recorded['status'] == 200
+
+    for latency, at_least, below in ((0, 0, 0.2), (1, 0.3, 2.0)):
+        with use_cassette(path, latency=latency):
+            started = time.perf_counter()
+            assert requests.get(upstream.url + '/slow').text == 'late'
+            assert at_least <= time.perf_counter() - started < below
+
+def test_connection_errors_are_recorded_and_replayed(stand_in_server, tmp_path):
+    path = str(tmp_path / 'down.jsonl')
+    upstream = stand_in_server({})
+    url = upstream.url + '/gone'
+    upstream.close()
+
+    with use_cassette(path, 'record'):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            requests.get(url, timeout=5)
+    with use_cassette(path):
+        with pytest.raises(requests.exceptions.ConnectionError, match='replayed'):
+            requests.get(url)
+
+def test_large_bodies_are_stored_by_size(stand_in_server, tmp_path):
+    path = str(tmp_path / 'media.jsonl')
+    upstream = stand_in_server({'/media/22': respond('x' * 4096, content_type='video/mp4')})
+
+    with use_cassette(path, 'record', max_body=1024):
+        requests.get(upstream.url + '/media/22', timeout=5)
+    assert json.loads(open(path).read())['body_size'] == 4096
+
+    with use_cassette(path):
+        response = requests.get(upstream.url + '/media/22', stream=True)
+        assert b''.join(response.iter_content(1000)) == bytes(4096)
+
+def test_yt_dlp_opener_is_recorded_once_and_replayed(stand_in_server, tmp_path):
+    path = str(tmp_path / 'yt.jsonl')
+    upstream = stand_in_server({
+        '/watch': respond('<html>player</html>'),
+        '/youtubei/v1/player': respond({'playabilityStatus': {'status': 'OK'}}),
+    })
+    player = yt_dlp.networking.Request(upstream.url + '/youtubei/v1/player', data=b'{"videoId": "abc"}')
+
+    with use_cassette(path, 'record'):
+        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            page = ydl.urlopen(upstream.url + '/watch?v=abc').read()
+            answer = ydl.urlopen(player).read()
+            with pytest.raises(HTTPError):
+                ydl.urlopen(upstream.url + '/private')
+    upstream.close()
+
+    # yt-dlp's requests handler runs inside urlopen, its exchanges are not recorded twice
+    assert len(open(path).readlines()) == 3
+
+    with use_cassette(path):
+        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            assert ydl.urlopen(upstream.url + '/watch?v=abc').read() == page
+            assert ydl.urlopen(player).read() == answer
+            with pytest.raises(HTTPError) as error:
+                ydl.urlopen(upstream.url + '/private')
+            assert error.value.status == 404
+            assert error.value.response.read() == b'not found'
+            # A different request body is a different request
+            with pytest.raises(CassetteMiss):
+                ydl.urlopen(yt_dlp.networking.Request(upstream.url + '/youtubei/v1/player', data=b'{"videoId": "xyz"}'))
+
+def test_init_app_installs_the_configured_cassette(tmp_path):
+    path = tmp_path / 'empty.jsonl'
+    path.write_text('')
+    app = Flask(__name__)
+    app.config['HTTP_CASSETTE'] = {'path': str(path), 'mode': 'replay', 'latency': 0}
+
+    cassette.init_app(app)
+
+    with pytest.raises(CassetteMiss):
+        requests.get('https://www.1337x.to/popular-movies')
+    with pytest.raises(ValueError):
+        cassette.Cassette(str(path), mode='rewind')
@@ -0,0 +1,77 @@
+"""
+Compression middleware tests: negotiation, size threshold and streaming exclusion
+"""
+
+import gzip
+import io
+import json
+
+import pytest
+from flask import Flask, Response, jsonify, send_file
+
+from utils.compression import Compression
+
+PAYLOAD = {'results': [{'title': f'Video {i}', 'description': 'lorem ipsum ' * 20} for i in range(20)]}
+
+def make_app(**options):
+    app = Flask(__name__)
+    Compression(app, **options)
+
+    @app.route('/big')
+    def big():
+        response = jsonify(PAYLOAD)
+        response.set_etag('abc')
+        return response
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/stream')
+    def stream():
+        return Response((b'x' * 4096 for _ in range(3)), mimetype='text/plain')
+
+    @app.route('/file')
+    def file():
+        return send_file(io.BytesIO(json.dumps(PAYLOAD).encode()), mimetype='application/json')
+
+    return app.test_client()
+
+def test_prefers_brotli_over_gzip_when_both_accepted():
+    brotli = pytest.importorskip('brotli')
+    client = make_app(algorithms=['br', 'gzip'])
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data)) == PAYLOAD
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'] == 'W/"abc"'
+
+def test_client_quality_values_are_respected():
+    pytest.importorskip('brotli')
+    client = make_app(algorithms=['br', 'gzip'])
+    response = client.get('/big', headers={'Accept-Encoding': 'br;q=0, gzip;q=0.5'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data)) == PAYLOAD
+
+    assert 'Content-Encoding' not in client.get('/big', headers={'Accept-Encoding': 'identity'}).headers
+
+def test_small_streamed_and_file_responses_are_untouched():
+    client = make_app(min_size=1024)
+    headers = {'Accept-Encoding': 'gzip, br, zstd'}
+
+    assert 'Content-Encoding' not in client.get('/small', headers=headers).headers
+
+    streamed = client.get('/stream', headers=headers)
+    assert 'Content-Encoding' not in streamed.headers and len(streamed.data) == 3 * 4096
+
+    sent = client.get('/file', headers=headers)
+    assert 'Content-Encoding' not in sent.headers and json.loads(sent.data) == PAYLOAD
+
+def test_installed_in_the_app(backend_app):
+    client = backend_app.app.test_client()
+    response = client.get('/api/youtube/stream/unknown-token', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 404 and 'Content-Encoding' not in response.headers
+    assert any(getattr(f, '__self__', None) is backend_app.compression
+               for f in backend_app.app.after_request_funcs[None])
@@ -0,0 +1,96 @@
+"""
+/api/dashboard tests: parallel parts, per-part deadlines and statuses, download counts
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.fanout import gather
+
+USER = 'dashboarder'
+
+def test_gather_runs_parts_in_parallel_with_own_deadlines():
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=4)
+
+    def boom():
+        raise RuntimeError('boom')
+
+    started = time.monotonic()
+    results = gather(executor, {
+        'fast': lambda: {'value': 1},
+        'slow': lambda: release.wait(5),
+        'failing': boom,
+        'service_error': lambda: {'success': False, 'error': 'Service not available'},
+    }, deadlines={'slow': 0.2}, default_deadline=1.0)
+    elapsed = time.monotonic() - started
+    release.set()
+
+    assert elapsed < 0.9
+    assert results['fast']['status'] == 'ok' and results['fast']['data'] == {'value': 1}
+    assert results['slow']['status'] == 'timeout'
+    assert results['failing'] == {'status': 'error', 'error': 'boom', 'elapsed_ms': results['failing']['elapsed_ms']}
+    assert results['service_error']['error'] == 'Service not available'
+    executor.shutdown()
+
+@pytest.fixture
+def client(backend_app):
+    app, db, Download = backend_app.app, backend_app.db, backend_app.Download
+    base = datetime(2025, 3, 1)
+    with app.app_context():
+        Download.query.filter_by(user_id=USER).delete()
+        for i, status in enumerate(['completed', 'completed', 'failed', 'downloading', 'pending', 'completed', 'completed']):
+            db.session.add(Download(
+                user_id=USER, url=f'https://example.com/{i}', title=f'Clip {i}',
+                status=status, created_at=base + timedelta(minutes=i)
+            ))
+        db.session.commit()
+
+        from flask_jwt_extended import create_access_token
+        token = create_access_token(identity=USER)
+
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
+
+def test_slow_part_times_out_without_gating_the_rest(client, backend_app, monkeypatch):
+    release = threading.Event()
+
+    def slow_popular(category):
+        release.wait(5)
+        return {'success': True, 'results': []}
+
+    monkeypatch.setattr(backend_app.torrent_service, 'get_popular_torrents', slow_popular)
+    monkeypatch.setitem(backend_app.app.config, 'DASHBOARD_DEADLINES', {'default': 2.0, 'popular': 0.2})
+
+    started = time.monotonic()
+    body = client.get('/api/dashboard').json
+    elapsed = time.monotonic() - started
+    release.set()
+
+    assert elapsed < 1.5
+    assert body['success'] and body['partial']
+    parts = body['parts']
+    assert parts['popular']['status'] == 'timeout'
+    assert parts['system']['status'] == 'ok'
+    assert parts['profile']['status'] == 'error'  # no such account in the user store
+
+    downloads = parts['downloads']['data']
+    assert downloads['total'] == 7
+    assert downloads['counts'] == {'completed': 4, 'failed': 1, 'downloading': 1, 'pending': 1}
+    assert [d['title'] for d in downloads['recent']] == ['Clip 6', 'Clip 5', 'Clip 4', 'Clip 3', 'Clip 2']
+
+def test_parts_selects_what_runs(client, backend_app, monkeypatch):
+    def unexpected(category):
+        raise AssertionError('popular torrents were scraped')
+
+    monkeypatch.setattr(backend_app.torrent_service, 'get_popular_torrents', unexpected)
+
+    body = client.get('/api/dashboard', query_string={'parts': 'downloads,system'}).json
+
+    assert set(body['parts']) == {'downloads', 'system'}
+    assert body['partial'] is False
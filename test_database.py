@@ -0,0 +1,108 @@
+"""
+SQLite profile tests: connection pragmas, unit of work and the batched progress writer
+"""
+
+import gc
+import threading
+import time
+import weakref
+
+import pytest
+from sqlalchemy import event, text
+
+from utils.database import BatchWriter, unit_of_work
+
+def test_connections_use_wal_and_tuned_pragmas(backend_app):
+    with backend_app.app.app_context():
+        with backend_app.db.engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+        assert backend_app.db.engine.pool.size() == 10
+
+def test_unit_of_work_commits_once_or_rolls_back(backend_app):
+    app, db, Download = backend_app.app, backend_app.db, backend_app.Download
+    with app.app_context():
+        with unit_of_work(db.session) as session:
+            session.add(Download(user_id='uow', url='https://example.com/a'))
+            session.add(Download(user_id='uow', url='https://example.com/b'))
+
+        with pytest.raises(ValueError):
+            with unit_of_work(db.session) as session:
+                session.add(Download(user_id='uow', url='https://example.com/c'))
+                raise ValueError('abort')
+
+        urls = sorted(d.url for d in Download.query.filter_by(user_id='uow'))
+        Download.query.filter_by(user_id='uow').delete()
+        db.session.commit()
+
+    assert urls == ['https://example.com/a', 'https://example.com/b']
+
+def test_progress_ticks_coalesce_into_one_flush(backend_app):
+    app, db, Download = backend_app.app, backend_app.db, backend_app.Download
+    with app.app_context():
+        first, second = Download(user_id='batch', url='https://example.com/1'), Download(user_id='batch', url='https://example.com/2')
+        db.session.add_all([first, second])
+        db.session.commit()
+        ids = first.id, second.id
+
+    writer = BatchWriter(app, db, flush_interval=3600)
+    for tick in range(1, 101):
+        writer.update(Download, ids[0], progress=tick / 100)
+        writer.update(Download, ids[1], progress=tick / 200)
+    writer.update(Download, ids[0], status='completed')
+
+    assert writer.flush() == 2
+    writer.close()
+    assert writer.flushes == 1
+
+    with app.app_context():
+        rows = {d.id: d for d in Download.query.filter_by(user_id='batch')}
+        assert (rows[ids[0]].progress, rows[ids[0]].status) == (1.0, 'completed')
+        assert rows[ids[1]].progress == 0.5
+        Download.query.filter_by(user_id='batch').delete()
+        db.session.commit()
+
+def test_a_slow_background_flush_cannot_overwrite_a_newer_value(backend_app):
+    app, db, Download = backend_app.app, backend_app.db, backend_app.Download
+    with app.app_context():
+        row = Download(user_id='race', url='https://example.com/race')
+        db.session.add(row)
+        db.session.commit()
+        pk, engine = row.id, db.engine
+
+    writer = BatchWriter(app, db, flush_interval=3600)
+    writing = threading.Event()
+
+    def stall_background_update(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE') and threading.current_thread().name == 'background-flush':
+            writing.set()
+            time.sleep(0.3)
+
+    event.listen(engine, 'before_cursor_execute', stall_background_update)
+    try:
+        writer.update(Download, pk, progress=0.5)
+        background = threading.Thread(target=writer.flush, name='background-flush')
+        background.start()
+        assert writing.wait(5)
+        # The download finishes while the older tick is still being written
+        writer.update(Download, pk, status='completed', progress=1.0)
+        writer.flush()
+        background.join()
+    finally:
+        event.remove(engine, 'before_cursor_execute', stall_background_update)
+    writer.close()
+
+    with app.app_context():
+        row = db.session.get(Download, pk)
+        assert (row.status, row.progress) == ('completed', 1.0)
+        Download.query.filter_by(user_id='race').delete()
+        db.session.commit()
+
+def test_a_closed_writer_is_released(backend_app):
+    writer = BatchWriter(backend_app.app, backend_app.db, flush_interval=3600)
+    ref = weakref.ref(writer)
+    writer.close()
+    del writer
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,64 @@
+"""
+/api/downloads tests: keyset pagination, status filters, page-size cap and the composite index
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+USER = 'pager'
+
+@pytest.fixture
+def client(backend_app):
+    app, db, Download = backend_app.app, backend_app.db, backend_app.Download
+    base = datetime(2025, 1, 1)
+    with app.app_context():
+        Download.query.filter_by(user_id=USER).delete()
+        # Two rows share a timestamp so the id tie-break is exercised
+        for i, status in enumerate(['completed', 'failed', 'completed', 'pending', 'completed', 'completed', 'failed']):
+            db.session.add(Download(
+                user_id=USER, url=f'https://example.com/{i}', title=f'Video {i}',
+                status=status, created_at=base + timedelta(minutes=min(i, 5))
+            ))
+        db.session.add(Download(user_id='someone-else', url='https://example.com/x', created_at=base))
+        db.session.commit()
+
+        from flask_jwt_extended import create_access_token
+        token = create_access_token(identity=USER)
+
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
+
+def test_keyset_pages_cover_history_once_newest_first(client):
+    titles, cursor = [], None
+    while True:
+        page = client.get('/api/downloads', query_string={'limit': 3, **({'cursor': cursor} if cursor else {})}).json
+        titles += [d['title'] for d in page['downloads']]
+        assert page['count'] <= 3
+        cursor = page['next_cursor']
+        if not page['has_more']:
+            break
+
+    assert titles == ['Video 6', 'Video 5', 'Video 4', 'Video 3', 'Video 2', 'Video 1', 'Video 0']
+
+def test_status_filter_and_page_cap(client, backend_app, monkeypatch):
+    page = client.get('/api/downloads', query_string={'status': 'failed,pending'}).json
+    assert [d['title'] for d in page['downloads']] == ['Video 6', 'Video 3', 'Video 1']
+    assert set(page['downloads'][0]) == {'id', 'url', 'title', 'status', 'progress', 'created_at', 'completed_at'}
+
+    monkeypatch.setitem(backend_app.app.config, 'DOWNLOADS_PAGE_MAX', 2)
+    assert client.get('/api/downloads', query_string={'limit': 1000}).json['count'] == 2
+
+    assert client.get('/api/downloads', query_string={'cursor': 'not-a-cursor'}).status_code == 400
+
+def test_history_query_uses_composite_index(backend_app):
+    with backend_app.app.app_context():
+        plan = backend_app.db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM download WHERE user_id = :user "
+            "AND (created_at, id) < (:created, :id) ORDER BY created_at DESC, id DESC LIMIT 51"
+        ), {'user': USER, 'created': '2025-01-01 00:05:00', 'id': 10}).fetchall()
+
+    details = ' '.join(row[-1] for row in plan)
+    assert 'ix_download_user_created' in details and 'TEMP B-TREE' not in details
@@ -0,0 +1,101 @@
+"""
+JSON provider tests: output compatible with Flask's default provider, stdlib fallback and msgpack negotiation
+"""
+
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+
+import utils.json_provider as json_provider
+from utils.json_provider import FastJSONProvider
+
+PAYLOAD = {
+    'success': True,
+    'results': [{'id': 'abc', 'title': 'Vidéo', 'duration': 212, 'view_count': None}],
+    'created_at': datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    'size': Decimal('1.5'),
+    'token': uuid.UUID(int=1),
+}
+
+def make_app(msgpack_enabled=True):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.json.msgpack_enabled = msgpack_enabled
+
+    @app.route('/payload')
+    def payload():
+        return PAYLOAD
+
+    @app.route('/list')
+    def listing():
+        return jsonify([1, 2, 3])
+
+    return app
+
+def test_matches_default_provider_output():
+    app = make_app()
+    expected = json.loads(Flask(__name__).json.dumps(PAYLOAD))
+
+    response = app.test_client().get('/payload')
+
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == expected
+    assert response.get_json()['created_at'] == 'Thu, 02 Jan 2025 03:04:05 GMT'
+    assert 'Vidéo'.encode() in response.data
+
+def test_keeps_insertion_order_and_non_str_keys():
+    provider = make_app().json
+
+    assert provider.dumps({'b': 1, 'a': 2}) == '{"b":1,"a":2}'
+    assert json.loads(provider.dumps({1: 'x'})) == {'1': 'x'}
+
+    provider.sort_keys = True
+    assert provider.dumps({'b': 1, 'a': 2}) == '{"a":2,"b":1}'
+
+def test_falls_back_to_stdlib_for_values_orjson_rejects():
+    provider = make_app().json
+    huge = 2 ** 70
+
+    assert json.loads(provider.dumps({'n': huge})) == {'n': huge}
+
+def test_works_without_orjson(monkeypatch):
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    app = make_app()
+
+    assert app.test_client().get('/list').get_json() == [1, 2, 3]
+    assert app.json.loads('{"a": [1]}') == {'a': [1]}
+
+def test_pretty_prints_in_debug_mode():
+    app = make_app()
+    app.debug = True
+
+    assert b'\n  ' in app.test_client().get('/list').data
+
+def test_msgpack_only_when_requested():
+    msgpack = pytest.importorskip('msgpack')
+    client = make_app().test_client()
+
+    response = client.get('/payload', headers={'Accept': 'application/msgpack'})
+    assert response.mimetype == 'application/msgpack'
+    assert 'Accept' in response.headers['Vary']
+    body = msgpack.unpackb(response.data)
+    assert body['results'][0]['title'] == 'Vidéo'
+    assert body['created_at'] == 'Thu, 02 Jan 2025 03:04:05 GMT'
+
+    for accept in ('*/*', 'application/json', 'application/json, application/msgpack;q=0.5'):
+        response = client.get('/payload', headers={'Accept': accept})
+        assert response.mimetype == 'application/json', accept
+
+def test_json_when_msgpack_unavailable_or_disabled(monkeypatch):
+    headers = {'Accept': 'application/msgpack'}
+
+    assert make_app(msgpack_enabled=False).test_client().get('/list', headers=headers).get_json() == [1, 2, 3]
+
+    monkeypatch.setattr(json_provider, 'msgpack', None)
+    response = make_app().test_client().get('/list', headers=headers)
+    assert response.mimetype == 'application/json'
+    assert 'Vary' not in response.headers
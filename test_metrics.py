@@ -0,0 +1,124 @@
+"""
+/api/metrics tests: exposition format, per-route counts, upstream histograms and cache lookups
+"""
+
+import re
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from conftest import respond
+from utils import metrics
+from utils.database import BatchWriter
+from utils.mirrors import MirrorPool
+
+def sample(text, name, **labels):
+    """Value of one sample line in an exposition, or None"""
+    wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = '^' + re.escape(name + ('{' + wanted + '}' if labels else '')) + r' (\S+)$'
+    match = re.search(pattern, text, re.M)
+    return float(match.group(1)) if match else None
+
+def test_histogram_buckets_are_cumulative_and_labels_escaped():
+    histogram = metrics.Histogram('test_latency_seconds', 'Test latency', ('path',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, ('a"b',))
+
+    lines = [f"{name}{labels} {value}" for name, labels, value in histogram.samples()]
+    assert lines == [
+        'test_latency_seconds_bucket{path="a\\"b",le="0.1"} 1',
+        'test_latency_seconds_bucket{path="a\\"b",le="1.0"} 3',
+        'test_latency_seconds_bucket{path="a\\"b",le="+Inf"} 4',
+        'test_latency_seconds_sum{path="a\\"b"} 4.05',
+        'test_latency_seconds_count{path="a\\"b"} 4',
+    ]
+
+def test_timer_labels_outcome():
+    histogram = metrics.Histogram('test_calls_seconds', 'Test calls', ('service', 'outcome'))
+    with histogram.time('svc'):
+        pass
+    with pytest.raises(ValueError):
+        with histogram.time('svc'):
+            raise ValueError('upstream broke')
+    assert histogram.count(('svc', 'ok')) == 1
+    assert histogram.count(('svc', 'error')) == 1
+
+def test_label_values_must_match_label_names():
+    histogram = metrics.Histogram('test_mislabelled_seconds', 'Test', ('source',))
+    histogram.observe(0.1, ('batch', 'ok'))
+    with pytest.raises(ValueError):
+        list(histogram.samples())
+
+def test_failed_and_successful_batch_commits_render_as_distinct_series(backend_app):
+    app, db, Download = backend_app.app, backend_app.db, backend_app.Download
+
+    def locked():
+        raise RuntimeError('database is locked')
+
+    broken = BatchWriter(app, SimpleNamespace(engine=SimpleNamespace(begin=locked)), flush_interval=3600)
+    broken.update(Download, 1, progress=0.5)
+    with pytest.raises(RuntimeError):
+        broken.flush()
+    broken._pending.clear()
+    working = BatchWriter(app, db, flush_interval=3600)
+    working.update(Download, 1, progress=0.5)
+    assert working.flush() == 1
+
+    text = metrics.render()
+    series = [line.rsplit(' ', 1)[0] for line in text.splitlines() if not line.startswith('#')]
+    assert [line for line, count in Counter(series).items() if count > 1] == []
+    assert sample(text, 'eagleeye_db_commit_duration_seconds_count', source='batch', outcome='error') >= 1
+    assert sample(text, 'eagleeye_db_commit_duration_seconds_count', source='batch', outcome='ok') >= 1
+
+def test_scrape_attempts_are_timed_per_host(stand_in_server):
+    up = stand_in_server({'/ping': respond('up')})
+    host = up.url.split('://', 1)[1]
+    before = metrics.SCRAPE_DURATION.count((host, 'ok'))
+
+    MirrorPool([up.url]).fetch('/ping', lambda url: requests.get(url, timeout=5))
+
+    assert metrics.SCRAPE_DURATION.count((host, 'ok')) == before + 1
+
+def test_metrics_endpoint_reports_routes_caches_and_emits(backend_app):
+    app = backend_app.app
+    with app.app_context():
+        from flask_jwt_extended import create_access_token
+        token = create_access_token(identity='metrics-user')
+        download = backend_app.Download(user_id='metrics-user', url='https://example.com/clip')
+        backend_app.db.session.add(download)
+        backend_app.db.session.commit()
+        download_id = download.id
+    backend_app.auth_service.register_user({
+        'username': 'metrics-user', 'email': 'metrics@example.com', 'password': 'correct horse battery'
+    })
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    before = client.get('/api/metrics').get_data(as_text=True)
+    client.get('/api/health')
+    client.get('/api/auth/profile')
+    client.get('/api/auth/profile')
+    client.delete('/api/downloads/424242')
+    client.delete(f'/api/downloads/{download_id}')
+    backend_app.socketio.emit('metrics_test', {})
+
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+
+    def delta(name, **labels):
+        return (sample(text, name, **labels) or 0) - (sample(before, name, **labels) or 0)
+
+    assert delta('eagleeye_http_requests_total', method='GET', route='/api/health', status='200') == 1
+    # Path parameters stay in the route template rather than creating a series per id
+    assert delta('eagleeye_http_requests_total', method='DELETE', route='/api/downloads/<int:download_id>', status='404') == 1
+    assert delta('eagleeye_http_request_duration_seconds_count', method='GET', route='/api/auth/profile') == 2
+    assert delta('eagleeye_cache_lookups_total', cache='profile', result='hit') >= 1
+    assert 0 < sample(text, 'eagleeye_cache_hit_ratio', cache='profile') <= 1
+    assert delta('eagleeye_socketio_emits_total', event='metrics_test') == 1
+    assert delta('eagleeye_db_commit_duration_seconds_count', source='session', outcome='ok') == 1
+    assert sample(text, 'eagleeye_active_streams') == 0
+    assert '# TYPE eagleeye_extract_info_duration_seconds histogram' in text
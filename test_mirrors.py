@@ -0,0 +1,76 @@
+"""
+Mirror failover, health scoring and hedged request tests
+"""
+
+import time
+
+import requests
+
+from conftest import respond, x1337_listing, x1337_detail
+from services.torrent_providers import X1337Provider
+from utils.mirrors import MirrorPool, MirrorError
+
+def send(url):
+    return requests.get(url, timeout=5)
+
+def test_hedged_request_takes_faster_mirror(stand_in_server):
+    slow = stand_in_server({'/ping': respond('slow', delay=1.5)})
+    fast = stand_in_server({'/ping': respond('fast')})
+    pool = MirrorPool([slow.url, fast.url], hedge_delay=0.1)
+
+    started = time.monotonic()
+    response = pool.fetch('/ping', send)
+
+    assert response.text == 'fast'
+    assert time.monotonic() - started < 1.0
+    assert [path for _, path in fast.requests] == ['/ping']
+
+def test_failed_primary_fails_over_without_waiting(stand_in_server):
+    down = stand_in_server({'/ping': respond('down', status=503)})
+    up = stand_in_server({'/ping': respond('up')})
+    pool = MirrorPool([down.url, up.url], hedge_delay=5.0)
+
+    assert pool.fetch('/ping', send).text == 'up'
+
+    scores = {s['base_url']: s for s in pool.scores()}
+    assert scores[down.url]['failures'] == 1 and scores[down.url]['last_error']
+    assert scores[up.url]['failures'] == 0
+    # The failing mirror is no longer preferred
+    assert pool.primary.base_url == up.url
+
+def test_all_mirrors_failing_raises(stand_in_server):
+    first = stand_in_server({})
+    second = stand_in_server({})
+    pool = MirrorPool([first.url, second.url])
+
+    try:
+        pool.fetch('/missing', send)
+        assert False, 'expected MirrorError'
+    except MirrorError as e:
+        assert first.url in str(e) and second.url in str(e)
+
+def test_p95_tracks_recent_latency():
+    pool = MirrorPool(['http://a', 'http://b'], hedge_delay=1.0)
+    mirror = pool.mirrors[0]
+    assert mirror.p95(1.0) == 1.0
+
+    for latency in [0.01] * 19 + [0.5]:
+        mirror.record(latency, True)
+
+    assert mirror.p95(1.0) == 0.5
+    assert 0.01 < mirror.latency_ewma < 0.5
+    assert pool.primary is mirror
+
+def test_provider_uses_mirror_that_answered(stand_in_server):
+    magnet = 'magnet:?xt=urn:btih:' + 'd' * 40
+    down = stand_in_server({})
+    up = stand_in_server({
+        '/search/linux/1/': respond(x1337_listing([('Linux Mint', '/torrent/7/mint/', '2.9 GB', 50, 3)])),
+        '/torrent/7/mint/': respond(x1337_detail(magnet)),
+    })
+    provider = X1337Provider(mirrors=[down.url, up.url])
+
+    rows = provider.search('linux')
+
+    assert rows[0]['magnet_link'] == magnet
+    assert rows[0]['detail_url'] == up.url + '/torrent/7/mint/'
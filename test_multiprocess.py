@@ -0,0 +1,219 @@
+"""
+Multi-worker tests: shared state backends in-process, and serve.py end to end with several worker processes
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from conftest import HASH_A, FakeQBittorrent
+from services.token_denylist import TokenDenylist
+from services.user_store import SQLiteUserStore
+from services.youtube_service import YouTubeService
+from utils.message_queue import SQLiteQueueManager
+from utils.shared_state import MemoryState, SQLiteState, create_shared_state
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+def test_shared_state_expiry_and_url(tmp_path):
+    for state in (MemoryState(), SQLiteState(str(tmp_path / 'state.db'))):
+        state.set('a', {'n': 1}, ttl=60)
+        state.set('gone', 1, ttl=0.01)
+        time.sleep(0.02)
+        assert state.get('a') == {'n': 1}
+        assert state.get('gone') is None
+        assert state.get('missing', 'default') == 'default'
+        state.delete('a')
+        assert state.get('a') is None
+
+        state.add_member('set', 'x')
+        state.add_member('set', 'y')
+        state.add_member('set', 'x')
+        state.remove_member('set', 'y')
+        assert state.members('set') == {'x'} and state.members('empty') == set()
+        state.delete('set')
+        assert state.members('set') == set()
+
+        assert state.acquire('lease', 'first', ttl=0.05)
+        assert state.acquire('lease', 'first', ttl=0.05)  # renewal
+        assert not state.acquire('lease', 'second', ttl=0.05)
+        time.sleep(0.06)
+        assert state.acquire('lease', 'second', ttl=60)
+
+    assert isinstance(create_shared_state(None), MemoryState)
+    assert isinstance(create_shared_state(f"sqlite:///{tmp_path / 'other.db'}"), SQLiteState)
+    with pytest.raises(ValueError):
+        create_shared_state('redis://localhost')
+
+def test_stream_token_issued_by_one_worker_is_served_by_another(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'state.db')
+    issuer, server = YouTubeService(SQLiteState(path)), YouTubeService(SQLiteState(path))
+    monkeypatch.setattr(issuer, '_generate_filename', lambda url, download_type: 'video.mp4')
+
+    result = issuer.download_video({'url': 'https://youtu.be/abc', 'quality': '720p'})
+    token = result['download_url'].rsplit('/', 1)[1]
+
+    assert server.get_stream_info(token)['quality'] == '720p'
+    assert YouTubeService().get_stream_info(token) is None  # in-memory state stays private
+
+def test_revocations_and_profile_changes_cross_processes(tmp_path):
+    first, second = TokenDenylist(str(tmp_path / 'deny.db')), TokenDenylist(str(tmp_path / 'deny.db'))
+    now = int(time.time())
+    assert not second.is_revoked({'jti': 'j1', 'sub': 'alice', 'iat': now})
+    first.revoke('j1', now + 60)
+    first.revoke_all('bob', now)
+    assert second.is_revoked({'jti': 'j1', 'sub': 'alice', 'iat': now})
+    assert second.is_revoked({'jti': 'j2', 'sub': 'bob', 'iat': now})
+
+    writer, reader = SQLiteUserStore(str(tmp_path / 'users.db')), SQLiteUserStore(str(tmp_path / 'users.db'))
+    writer.create({'username': 'alice', 'email': 'a@example.com', 'password_hash': 'x', 'created_at': 'now', 'profile': {}})
+    version = reader.data_version()
+    writer.record_logins({'alice': 'later'})
+    assert reader.data_version() == version  # login flushes do not invalidate every cached profile
+    writer.update('alice', profile={'full_name': 'Alice'})
+    assert reader.data_version() > version
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class Cluster:
+    def __init__(self, workdir, workers=2, **env):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.queue_url = f"sqlite:///{workdir / 'socketio_queue.db'}"
+        env = dict(os.environ, EAGLEEYE_SHARED_STATE=f"sqlite:///{workdir / 'shared_state.db'}",
+                   EAGLEEYE_MESSAGE_QUEUE=self.queue_url, **env)
+        self.log = open(workdir / 'serve.log', 'w')
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(BACKEND, 'serve.py'), '--workers', str(workers),
+             '--host', '127.0.0.1', '--port', str(self.port)],
+            cwd=workdir, env=env, stdout=self.log, stderr=subprocess.STDOUT
+        )
+        self.log_path = workdir / 'serve.log'
+        deadline = time.monotonic() + 120
+        # Every worker has built its app, not just the master bound the port
+        while self.log_path.read_text().count(' ready\n') < workers:
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(self.log_path.read_text())
+            time.sleep(0.2)
+
+    def request(self, method, path, body=None, token=None):
+        request = urllib.request.Request(self.url + path, method=method, data=json.dumps(body).encode() if body else None)
+        request.add_header('Content-Type', 'application/json')
+        if token:
+            request.add_header('Authorization', f"Bearer {token}")
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'{}')
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+        self.log.close()
+
+def socketio_connect(stack, port, token):
+    """Minimal Engine.IO v4 websocket client: handshake then connect to the default namespace"""
+    from websockets.sync.client import connect
+    ws = stack.enter_context(connect(f"ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket",
+                                     additional_headers={'Authorization': f"Bearer {token}"}, close_timeout=1))
+    stack.callback(ws.send, '1')  # engine.io close, so the server ends the websocket first
+    assert ws.recv(timeout=10).startswith('0')
+    ws.send('40')
+    return ws
+
+def socketio_next_event(ws, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        packet = ws.recv(timeout=max(0.1, deadline - time.monotonic()))
+        if packet == '2':
+            ws.send('3')  # answer engine.io pings
+        elif packet.startswith('42'):  # events; the '40' connect ack is skipped
+            return json.loads(packet[2:])
+
+def start_cluster(workdir, **env):
+    pytest.importorskip('websockets')
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        pytest.skip('SO_REUSEPORT is not available')
+    return Cluster(workdir, **env)
+
+@pytest.fixture
+def cluster(tmp_path):
+    cluster = start_cluster(tmp_path)
+    yield cluster
+    cluster.close()
+
+def register_and_login(cluster, username):
+    password = 'correct horse battery'
+    status, body = cluster.request('POST', '/api/auth/register', {
+        'username': username, 'email': f'{username}@example.com', 'password': password
+    })
+    assert body['success'], body
+    return cluster.request('POST', '/api/auth/login', {'username': username, 'password': password})[1]['access_token']
+
+def test_workers_share_sessions_profiles_and_events(cluster):
+    # Workers share one listening socket; concurrent connections are what spreads them out
+    with ThreadPoolExecutor(8) as pool:
+        workers = set(pool.map(lambda _: cluster.request('GET', '/api/health')[1]['worker'], range(80)))
+    assert len(workers) > 1
+
+    token = register_and_login(cluster, 'alice')
+
+    # Warm every worker's profile cache, then change the profile through one of them
+    for _ in range(15):
+        assert cluster.request('GET', '/api/auth/profile', token=token)[0] == 200
+    assert cluster.request('PUT', '/api/auth/profile', {'full_name': 'Alice Liddell'}, token=token)[0] == 200
+    names = {cluster.request('GET', '/api/auth/profile', token=token)[1]['user']['profile'].get('full_name') for _ in range(15)}
+    assert names == {'Alice Liddell'}
+
+    # Events published to the queue reach clients on whichever worker holds their socket
+    with ExitStack() as stack:
+        sockets = [socketio_connect(stack, cluster.port, token) for _ in range(4)]
+        for ws in sockets:
+            assert socketio_next_event(ws)[0] == 'status'
+        SQLiteQueueManager(cluster.queue_url, write_only=True).emit(
+            'download_progress', {'download_id': 7, 'progress': 0.5}, room='user:alice', namespace='/'
+        )
+        for ws in sockets:
+            assert socketio_next_event(ws) == ['download_progress', {'download_id': 7, 'progress': 0.5}]
+
+    # A logout on one worker is honoured by all of them
+    assert cluster.request('POST', '/api/auth/logout', token=token)[0] == 200
+    assert {cluster.request('GET', '/api/auth/profile', token=token)[0] for _ in range(15)} == {401}
+
+def test_workers_share_torrent_owners_and_elect_one_poller(tmp_path, stand_in_server):
+    fake = FakeQBittorrent()
+    qbittorrent = stand_in_server(fake.routes())
+    cluster = start_cluster(tmp_path, EAGLEEYE_QBITTORRENT_HOST=qbittorrent.url)
+    try:
+        alice, mallory = register_and_login(cluster, 'alice'), register_and_login(cluster, 'mallory')
+        # Each add subscribes alice and starts a poll thread on the worker that took it
+        for _ in range(10):
+            result = cluster.request('POST', '/api/torrent/add', {'magnet_links': f'magnet:?xt=urn:btih:{HASH_A}'}, token=alice)
+            assert result == (200, {'success': True, 'message': 'Added 1 torrent(s) to qBittorrent', 'hashes': [HASH_A]})
+
+        def active(token):
+            return [(t['hash'], t['progress']) for t in cluster.request('GET', '/api/torrent/active', token=token)[1]['torrents']]
+
+        deadline = time.monotonic() + 20
+        while active(alice) != [(HASH_A, 0.6)] and time.monotonic() < deadline:
+            time.sleep(0.2)
+        # Whichever worker answers knows alice's torrent and its latest progress, and only hers
+        assert {tuple(active(alice)) for _ in range(15)} == {((HASH_A, 0.6),)}
+        assert {tuple(active(mallory)) for _ in range(15)} == {()}
+        assert fake.sync_rids.count(0) == 1
+    finally:
+        cluster.close()
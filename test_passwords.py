@@ -0,0 +1,105 @@
+"""
+Password hasher tests: werkzeug hashes in a process pool, legacy SHA-256 upgrade on login
+"""
+
+import hashlib
+import threading
+
+import pytest
+from flask import Flask, current_app
+from flask_jwt_extended import JWTManager
+
+from services.auth_service import AuthService
+from services.user_store import SQLiteUserStore
+from utils.passwords import HasherBusy, PasswordHasher
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-at-least-32-bytes'
+    JWTManager(app)
+    with app.app_context():
+        yield
+
+def test_hash_and_verify_in_process_pool():
+    hasher = PasswordHasher('pbkdf2', cost=1000, workers=1)
+    try:
+        stored = hasher.hash('secret1')
+        assert stored.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(stored, 'secret1')
+        assert not hasher.verify(stored, 'secret2')
+        assert hasher.hash('secret1') != stored  # salted
+    finally:
+        hasher.close()
+
+def test_needs_rehash_on_legacy_hash_or_cost_change():
+    hasher = PasswordHasher(cost=1024, workers=0)
+    legacy = hashlib.sha256(b'secret1').hexdigest()
+
+    assert hasher.verify(legacy, 'secret1') and not hasher.verify(legacy, 'secret2')
+    assert hasher.needs_rehash(legacy)
+    assert not hasher.needs_rehash(hasher.hash('secret1'))
+    assert PasswordHasher(cost=2048, workers=0).needs_rehash(hasher.hash('secret1'))
+
+def test_full_queue_sheds_load():
+    hasher = PasswordHasher(cost=1024, workers=1, max_queue=1, queue_timeout=0.05)
+    hasher._slots.acquire()  # one operation already waiting for the pool
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.hash('secret1')
+    finally:
+        hasher._slots.release()
+        hasher.close()
+
+def test_legacy_hash_is_upgraded_on_login(tmp_path, app_context):
+    store = SQLiteUserStore(str(tmp_path / 'users.db'))
+    store.create({
+        'username': 'juma',
+        'email': 'juma@example.com',
+        'password_hash': hashlib.sha256(b'123456').hexdigest(),
+        'created_at': '2025-09-16T20:07:38.427748',
+    })
+    auth = AuthService(store=store, hasher=PasswordHasher(cost=1024, workers=0))
+
+    assert not auth.login_user({'username': 'juma', 'password': 'wrong1'})['success']
+    assert store.get('juma')['password_hash'] == hashlib.sha256(b'123456').hexdigest()
+
+    assert auth.login_user({'username': 'juma', 'password': '123456'})['success']
+    upgraded = store.get('juma')['password_hash']
+    assert upgraded.startswith('scrypt:1024:8:1$')
+
+    assert auth.login_user({'username': 'juma', 'password': '123456'})['success']
+    assert store.get('juma')['password_hash'] == upgraded
+
+def test_concurrent_logins_share_the_pool(tmp_path, app_context):
+    app = current_app._get_current_object()
+    hasher = PasswordHasher(cost=1024, workers=2)
+    auth = AuthService(store=SQLiteUserStore(str(tmp_path / 'users.db')), hasher=hasher)
+    auth.register_user({'username': 'juma', 'email': 'juma@example.com', 'password': 'secret1'})
+    results = []
+
+    def login():
+        with app.app_context():
+            results.append(auth.login_user({'username': 'juma', 'password': 'secret1'})['success'])
+
+    threads = [threading.Thread(target=login) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 8
+    auth.close()
+
+def test_busy_hasher_is_a_503_not_a_failed_login(backend_app, monkeypatch):
+    def saturated(stored_hash, password):
+        raise HasherBusy('Too many password operations in progress', retry_after=3)
+
+    monkeypatch.setattr(backend_app.auth_service.hasher, 'verify', saturated)
+    backend_app.auth_service.register_user({'username': 'busy-user', 'email': 'busy@example.com', 'password': 'secret1'})
+
+    response = backend_app.app.test_client().post('/api/auth/login', json={'username': 'busy-user', 'password': 'secret1'})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert response.json['success'] is False and response.json['retry_after'] == 3
@@ -0,0 +1,111 @@
+"""
+Profile cache tests: invalidation on writes, JSON mtime invalidation and ETag handling
+"""
+
+import os
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager
+
+from services.auth_service import AuthService
+from services.user_store import JsonUserStore, SQLiteUserStore
+from utils.passwords import PasswordHasher
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-at-least-32-bytes'
+    JWTManager(app)
+    with app.app_context():
+        yield
+
+def counting(store):
+    store.reads = 0
+    original = store.get
+
+    def get(username):
+        store.reads += 1
+        return original(username)
+
+    store.get = get
+    return store
+
+def make_auth(store, **kwargs):
+    auth = AuthService(store=store, hasher=PasswordHasher(cost=1024, workers=0), **kwargs)
+    auth.register_user({'username': 'juma', 'email': 'juma@example.com', 'password': 'secret1'})
+    return auth
+
+def test_repeated_reads_hit_the_cache_until_a_write(tmp_path, app_context):
+    store = counting(SQLiteUserStore(str(tmp_path / 'users.db')))
+    auth = make_auth(store)
+    store.reads = 0
+
+    first, etag = auth.get_user_profile_with_etag('juma')
+    again, same_etag = auth.get_user_profile_with_etag('juma')
+    assert first == again and etag == same_etag and store.reads == 1
+
+    auth.update_user_profile('juma', {'full_name': 'Juma M'})
+    updated, new_etag = auth.get_user_profile_with_etag('juma')
+    assert updated['user']['profile']['full_name'] == 'Juma M' and new_etag != etag
+
+    login = auth.login_user({'username': 'juma', 'password': 'secret1'})
+    assert auth.get_user_profile('juma')['user']['last_login'] == login['user']['last_login']
+
+def test_cache_is_bounded(tmp_path, app_context):
+    auth = make_auth(SQLiteUserStore(str(tmp_path / 'users.db')), profile_cache_size=2)
+    for name in ('amina', 'baraka'):
+        auth.register_user({'username': name, 'email': f'{name}@example.com', 'password': 'secret1'})
+
+    for name in ('juma', 'amina', 'baraka'):
+        auth.get_user_profile(name)
+
+    assert list(auth._profiles) == ['amina', 'baraka']
+    # Invalidation keeps no per-user bookkeeping of its own
+    for n in range(50):
+        auth._invalidate_profile(f'gone{n}')
+    assert list(auth._profiles) == ['amina', 'baraka']
+
+def test_callers_cannot_edit_the_cached_profile(tmp_path, app_context):
+    auth = make_auth(SQLiteUserStore(str(tmp_path / 'users.db')))
+
+    for _ in range(2):  # the miss that fills the cache, then a hit
+        result, _ = auth.get_user_profile_with_etag('juma')
+        result['user']['email'] = 'tampered@example.com'
+        result['user']['profile']['preferences']['default_quality'] = '144p'
+
+    fresh = auth.get_user_profile('juma')['user']
+    assert fresh['email'] == 'juma@example.com'
+    assert fresh['profile']['preferences']['default_quality'] == '720p'
+
+def test_json_file_edits_by_other_processes_invalidate(tmp_path, app_context):
+    users_file = str(tmp_path / 'users_data.json')
+    auth = make_auth(JsonUserStore(users_file))
+    assert auth.get_user_profile('juma')['user']['profile']['full_name'] == ''
+
+    # Another worker writes the file directly
+    JsonUserStore(users_file).update('juma', profile={'full_name': 'Elsewhere'})
+    os.utime(users_file, ns=(0, os.stat(users_file).st_mtime_ns + 1))
+
+    assert auth.get_user_profile('juma')['user']['profile']['full_name'] == 'Elsewhere'
+
+def test_profile_endpoint_answers_if_none_match_with_304(backend_app):
+    client = backend_app.app.test_client()
+    client.post('/api/auth/register', json={
+        'username': 'etaguser', 'email': 'etag@example.com', 'password': 'secret1'
+    })
+    token = client.post('/api/auth/login', json={'username': 'etaguser', 'password': 'secret1'}).json['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get('/api/auth/profile', headers=headers)
+    assert response.status_code == 200 and response.headers['ETag']
+
+    etag = response.headers['ETag']
+    not_modified = client.get('/api/auth/profile', headers={**headers, 'If-None-Match': etag})
+    assert not_modified.status_code == 304 and not_modified.data == b''
+
+    updated = client.put('/api/auth/profile', headers=headers, json={'full_name': 'Etag User'})
+    assert updated.json['profile']['full_name'] == 'Etag User'
+
+    changed = client.get('/api/auth/profile', headers={**headers, 'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.json['user']['profile']['full_name'] == 'Etag User'
@@ -0,0 +1,94 @@
+"""
+Admin profiling tests: on-demand collapsed stacks of in-flight requests and slow-request capture
+"""
+
+import threading
+import time
+
+import pytest
+
+ADMIN = 'profiler-admin'
+
+@pytest.fixture
+def clients(backend_app, monkeypatch):
+    app = backend_app.app
+    monkeypatch.setitem(app.config, 'ADMIN_USERS', [ADMIN])
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        tokens = {name: create_access_token(identity=name) for name in (ADMIN, 'profiler-user')}
+
+    def client_for(name):
+        client = app.test_client()
+        client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {tokens[name]}'
+        return client
+
+    return client_for(ADMIN), client_for('profiler-user')
+
+def busy_yt_dlp_extraction(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(200))
+
+def test_admin_routes_need_an_admin(backend_app, clients):
+    _, user = clients
+    assert backend_app.app.test_client().get('/api/admin/slow-requests').status_code == 401
+    assert user.get('/api/admin/slow-requests').status_code == 403
+    assert user.post('/api/admin/profile', json={'seconds': 0.1}).status_code == 403
+
+def test_profile_returns_collapsed_stacks_of_in_flight_requests(backend_app, clients, monkeypatch):
+    admin, user = clients
+
+    def slow_search(query, limit=20, fields=None):
+        busy_yt_dlp_extraction(0.8)
+        return {'success': True, 'results': []}
+
+    monkeypatch.setattr(backend_app.youtube_service, 'search_videos', slow_search)
+    search = threading.Thread(target=lambda: user.post('/api/youtube/search', json={'query': 'cats'}))
+    search.start()
+    time.sleep(0.1)
+    response = admin.post('/api/admin/profile', json={'seconds': 0.3, 'interval_ms': 5})
+    search.join()
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    assert int(response.headers['X-Profile-Samples']) > 0
+    assert 'X-Profile-Lag-Ms-P95' in response.headers
+    lines = response.get_data(as_text=True).splitlines()
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert stack.startswith('POST /api/youtube/search;')
+    assert any('busy_yt_dlp_extraction (' in line for line in lines)
+    # The admin's own sampling request is never part of the profile
+    assert not any('run_profile' in line for line in lines)
+
+def test_profile_arguments_are_validated(clients):
+    admin, _ = clients
+    assert admin.post('/api/admin/profile', json={'seconds': 0}).status_code == 400
+    assert admin.post('/api/admin/profile', json={'seconds': 3600}).status_code == 400
+    assert admin.post('/api/admin/profile?seconds=soon').status_code == 400
+
+def test_slow_requests_are_captured_with_their_stacks(backend_app, clients, monkeypatch):
+    admin, user = clients
+    profiler = backend_app.app.extensions['profiler']
+    monkeypatch.setattr(profiler, 'slow_threshold', 0.2)
+    monkeypatch.setattr(profiler, 'interval', 0.01)
+
+    def slow_info(url, fields=None):
+        busy_yt_dlp_extraction(0.4)
+        return {'success': True, 'title': 'slow'}
+
+    monkeypatch.setattr(backend_app.youtube_service, 'get_video_info', slow_info)
+    assert user.post('/api/youtube/info', json={'url': 'https://youtu.be/slow'}).status_code == 200
+    user.get('/api/health')  # fast, never reported
+
+    reports = admin.get('/api/admin/slow-requests').json['reports']
+    report = reports[0]
+    assert report['route'] == '/api/youtube/info' and report['status'] == 200
+    assert report['duration_ms'] >= 400 and report['samples'] > 5
+    assert all(r['route'] != '/api/health' for r in reports)
+    assert 'stacks' not in report
+
+    stacks = admin.get(f"/api/admin/slow-requests/{report['id']}").get_data(as_text=True)
+    assert stacks.startswith('POST /api/youtube/info;')
+    assert 'busy_yt_dlp_extraction (' in stacks
+    assert admin.get('/api/admin/slow-requests/999999').status_code == 404
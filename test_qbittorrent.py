@@ -0,0 +1,208 @@
+"""
+qBittorrent Web API integration tests against a local stand-in of the Web API
+"""
+
+import threading
+import time
+
+from conftest import HASH_A, HASH_B, FakeQBittorrent
+from services.qbittorrent_service import QBittorrentService
+from services.torrent_service import TorrentService
+from utils.shared_state import SQLiteState
+
+def make_service(stand_in_server, emitted, state=None, fake=None):
+    fake = fake or FakeQBittorrent()
+    server = stand_in_server(fake.routes())
+    service = QBittorrentService(
+        host=server.url,
+        poll_interval=0.05,
+        emit=lambda event, payload, room: emitted.append((event, payload, room)),
+        state=state,
+        lease_ttl=0.5
+    )
+    return fake, service
+
+def test_batched_add_is_one_api_call(stand_in_server):
+    fake, service = make_service(stand_in_server, [])
+    service.start = lambda: None  # keep the poller out of this test
+    torrents = TorrentService(providers=[], qbittorrent=service)
+
+    result = torrents.add_torrents_to_qbittorrent(
+        [f'magnet:?xt=urn:btih:{HASH_A}', f'magnet:?xt=urn:btih:{HASH_B.upper()}'], username='juma'
+    )
+
+    assert result['success'] and result['hashes'] == [HASH_A, HASH_B]
+    assert len(fake.add_calls) == 1
+    assert HASH_A in fake.add_calls[0] and HASH_B.upper() in fake.add_calls[0]
+
+def test_sync_deltas_fan_out_to_subscribers(stand_in_server):
+    emitted = []
+    fake, service = make_service(stand_in_server, emitted)
+    service.start = lambda: None  # drive sync_once by hand
+    service.claim('juma', [HASH_A, HASH_B])
+    service.claim('amina', [HASH_B])
+    service.subscribe('juma', [HASH_A, HASH_B])
+    service.subscribe('amina', [HASH_B])
+
+    service.sync_once()
+    first = {room: payload for _, payload, room in emitted}
+    assert sorted(t['hash'] for t in first['user:juma']['torrents']) == [HASH_A, HASH_B]
+    assert [t['hash'] for t in first['user:amina']['torrents']] == [HASH_B]
+    assert 'tags' not in first['user:juma']['torrents'][0]
+
+    emitted.clear()
+    service.sync_once()
+    assert emitted == [('torrent_progress', {
+        'torrents': [{'progress': 0.6, 'dlspeed': 1024, 'hash': HASH_A}], 'removed': []
+    }, 'user:juma')]
+    assert service.get_torrents('juma')['torrents'][0]['name'] == 'Alpha'
+
+    emitted.clear()
+    service.sync_once()
+    assert sorted(room for _, _, room in emitted) == ['user:amina', 'user:juma']
+    assert all(payload['removed'] == [HASH_B] for _, payload, _ in emitted)
+
+    assert fake.sync_rids == [0, 1, 2]
+    assert [t['hash'] for t in service.get_torrents('juma')['torrents']] == [HASH_A]
+    assert service.get_torrents('amina')['torrents'] == []
+
+def test_single_poller_follows_rids(stand_in_server):
+    emitted = []
+    fake, service = make_service(stand_in_server, emitted)
+    done = threading.Event()
+    original = service.sync_once
+
+    def sync_and_signal():
+        updates = original()
+        if service._rid >= 3:
+            done.set()
+        return updates
+
+    service.sync_once = sync_and_signal
+    service.claim('juma', [HASH_A, HASH_B])
+    service.subscribe('juma', [HASH_A])
+    service.subscribe('juma', [HASH_B])
+
+    assert done.wait(5)
+    service.stop()
+    assert [t.name for t in threading.enumerate()].count('qbittorrent-sync') == 0
+    assert fake.sync_rids[:3] == [0, 1, 2]
+
+def test_workers_sharing_state_elect_one_poller(stand_in_server, tmp_path):
+    path = str(tmp_path / 'state.db')
+    emitted = []
+    fake, first = make_service(stand_in_server, emitted, SQLiteState(path))
+    _, second = make_service(stand_in_server, emitted, SQLiteState(path), fake=fake)
+
+    # Added through one worker, followed and read through the other
+    first.claim('juma', [HASH_A])
+    assert second.subscribe('juma', [HASH_A])['success']
+    first.start()
+
+    deadline = time.monotonic() + 5
+    while not second.get_torrents('juma')['torrents'] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert second.get_torrents('juma')['torrents'][0]['name'] == 'Alpha'
+    assert fake.sync_rids.count(0) == 1  # one poller, one full update
+
+    # The leader stops; the other worker takes over from a fresh full update
+    leader, follower = (first, second) if first.state.get('qbittorrent:poller') == first.poller_id else (second, first)
+    leader.stop()
+    synced = len(fake.sync_rids)
+    deadline = time.monotonic() + 5
+    while fake.sync_rids.count(0) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    follower.stop()
+    assert fake.sync_rids.count(0) == 2 and len(fake.sync_rids) > synced
+
+def test_poller_exits_once_nobody_follows(stand_in_server):
+    fake, service = make_service(stand_in_server, [])
+    service.claim('juma', [HASH_A])
+    service.subscribe('juma', [HASH_A])
+    poller = service._poller
+
+    deadline = time.monotonic() + 5
+    while not fake.sync_rids and time.monotonic() < deadline:
+        time.sleep(0.05)
+    service.unsubscribe('juma')
+    poller.join(5)
+
+    assert not poller.is_alive() and service.state.get('qbittorrent:poller') is None
+    synced = len(fake.sync_rids)
+    time.sleep(0.2)
+    assert len(fake.sync_rids) == synced
+
+    # Following again restarts it from a full update
+    service.subscribe('juma', [HASH_A])
+    deadline = time.monotonic() + 5
+    while len(fake.sync_rids) == synced and time.monotonic() < deadline:
+        time.sleep(0.05)
+    service.stop()
+    assert fake.sync_rids[synced] == 0
+
+def test_only_owners_see_or_follow_a_torrent(stand_in_server):
+    emitted = []
+    fake, service = make_service(stand_in_server, emitted)
+    service.start = lambda: None
+
+    assert service.add_torrents([f'magnet:?xt=urn:btih:{HASH_A}'], username='juma')['success']
+    assert service.subscribe('mallory', [HASH_A, HASH_B]) == {
+        'success': False, 'subscribed': [], 'error': 'Only torrents you added can be followed',
+        'rejected': [HASH_A, HASH_B]
+    }
+
+    service.sync_once()
+    assert [room for _, _, room in emitted] == ['user:juma']
+    assert [t['hash'] for t in service.get_torrents('juma')['torrents']] == [HASH_A]
+    assert service.get_torrents('mallory')['torrents'] == []
+
+def test_socket_subscription_to_someone_elses_torrent_is_refused(backend_app, monkeypatch):
+    from flask_jwt_extended import create_access_token
+    qbittorrent = backend_app.torrent_service.qbittorrent
+    monkeypatch.setattr(qbittorrent, 'start', lambda: None)
+    qbittorrent.claim('socket-owner', [HASH_A])
+    with backend_app.app.app_context():
+        token = create_access_token(identity='socket-intruder')
+
+    client = backend_app.socketio.test_client(backend_app.app, headers={'Authorization': f'Bearer {token}'})
+    ack = client.emit('subscribe_torrents', {'hashes': [HASH_A]}, callback=True)
+    client.disconnect()
+
+    assert ack['success'] is False and ack['rejected'] == [HASH_A]
+    assert 'socket-intruder' not in qbittorrent.subscribers(HASH_A)
+
+def test_add_route_takes_a_single_magnet_string(backend_app, monkeypatch):
+    from flask_jwt_extended import create_access_token
+    calls = []
+    monkeypatch.setattr(backend_app.torrent_service, 'add_torrents_to_qbittorrent',
+                        lambda links, username=None, category=None: calls.append(links) or {'success': True})
+    with backend_app.app.app_context():
+        token = create_access_token(identity='magnet-user')
+    client = backend_app.app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    magnet = f'magnet:?xt=urn:btih:{HASH_A}'
+    assert client.post('/api/torrent/add', json={'magnet_links': magnet}).status_code == 200
+    assert calls == [[magnet]]
+    assert client.post('/api/torrent/add', json={'magnet_links': {'a': magnet}}).status_code == 400
+
+def test_closing_the_last_socket_drops_subscriptions(backend_app, monkeypatch):
+    from flask_jwt_extended import create_access_token
+    qbittorrent = backend_app.torrent_service.qbittorrent
+    monkeypatch.setattr(qbittorrent, 'start', lambda: None)
+    qbittorrent.claim('socket-follower', [HASH_B])
+    with backend_app.app.app_context():
+        token = create_access_token(identity='socket-follower')
+
+    clients = [
+        backend_app.socketio.test_client(backend_app.app, headers={'Authorization': f'Bearer {token}'})
+        for _ in range(2)
+    ]
+    for client in clients:
+        assert client.emit('subscribe_torrents', {'hashes': [HASH_B]}, callback=True)['success']
+
+    # Another tab is still open
+    clients[0].disconnect()
+    assert 'socket-follower' in qbittorrent.subscribers(HASH_B)
+    clients[1].disconnect()
+    assert 'socket-follower' not in qbittorrent.subscribers(HASH_B)
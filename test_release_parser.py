@@ -0,0 +1,66 @@
+"""
+Release-name parser accuracy tests against a corpus of real-world style torrent titles
+"""
+
+from utils.release_parser import parse_release_name, parser_cache_info
+
+# (title, expected attributes); attributes not listed are not checked
+CORPUS = [
+    ('Oppenheimer.2023.2160p.UHD.BluRay.x265.10bit.HDR10+.DV.TrueHD.Atmos.7.1-SWTYBLZ',
+     {'quality': '4K', 'resolution': '2160p', 'source': 'BluRay', 'codec': 'x265',
+      'hdr': ('HDR10+', 'DV'), 'audio': ('TrueHD', 'Atmos'), 'channels': '7.1', 'group': 'SWTYBLZ'}),
+    ('The.Last.of.Us.S01E09.1080p.WEB-DL.DDP5.1.H.264-NTb',
+     {'quality': '1080p', 'source': 'WEB-DL', 'codec': 'x264', 'audio': ('DDP',), 'channels': '5.1', 'group': 'NTb'}),
+    ('House of the Dragon S02E01 720p HDTV x264-SYNCOPY [eztv]',
+     {'quality': '720p', 'source': 'HDTV', 'codec': 'x264', 'group': 'SYNCOPY'}),
+    ('Dune Part Two (2024) [1080p] [WEBRip] [5.1] [YTS.MX]',
+     {'quality': '1080p', 'source': 'WEBRip', 'codec': None, 'channels': '5.1', 'group': 'YTS.MX'}),
+    ('Interstellar.2014.1080p.BluRay.DTS-HD.MA.5.1.AVC.REMUX-FraMeSToR',
+     {'quality': '1080p', 'source': 'BluRay', 'codec': 'x264', 'audio': ('DTS-HD MA',), 'group': 'FraMeSToR'}),
+    ('Blade.Runner.2049.2017.4K.HDR.AV1.Opus-DMnT',
+     {'quality': '4K', 'codec': 'AV1', 'hdr': ('HDR',), 'audio': ('Opus',), 'group': 'DMnT'}),
+    ('Severance.S02E03.WEBRip.x265.AAC2.0-PSA',
+     {'quality': 'HD', 'resolution': None, 'source': 'WEBRip', 'audio': ('AAC',), 'channels': '2.0'}),
+    ('The.Matrix.1999.480p.DVDRip.XviD.AC3-FLAWL3SS',
+     {'quality': '480p', 'source': 'DVDRip', 'codec': 'XviD', 'audio': ('DD',)}),
+    ('Some Concert Film HD', {'quality': '720p', 'resolution': '720p'}),
+    ('Night Train HD-Rip', {'quality': 'HD', 'resolution': None, 'source': 'HDRip'}),
+    ('New.Release.2024.HDCAM.x264', {'quality': 'SD', 'source': 'CAM'}),
+    ('Planet Earth III 2023 Documentary', {'quality': 'SD', 'source': None, 'group': None}),
+    ('Show.S02.Complete.WEB-DL', {'source': 'WEB-DL', 'group': None}),
+    ('Film.2021.1080p.Dolby.Vision.HEVC.DDP.Atmos',
+     {'codec': 'x265', 'hdr': ('DV',), 'audio': ('DDP', 'Atmos')}),
+]
+
+# Titles the old substring scans misread: "hd" inside other words
+FALSE_POSITIVES = [
+    ('The Shadow (1994) DVDRip', 'SD'),
+    ('Shadowhunters Complete Series', 'SD'),
+    ('Hdr Landscapes Photo Pack', 'SD'),
+    ('Richard Hammond Documentary', 'SD'),
+    ('Ghost.Hunters.S01.WEBRip', 'HD'),
+]
+
+def test_corpus_accuracy():
+    failures = []
+    for title, expected in CORPUS:
+        parsed = parse_release_name(title)
+        for key, value in expected.items():
+            if parsed[key] != value:
+                failures.append(f"{title}: {key}={parsed[key]!r}, expected {value!r}")
+    assert failures == []
+
+def test_hd_does_not_match_inside_words():
+    for title, quality in FALSE_POSITIVES:
+        assert parse_release_name(title)['quality'] == quality, title
+
+def test_results_are_memoized_and_isolated():
+    title = 'Memo.Test.2024.1080p.WEB-DL.x264-GRP'
+    hits_before = parser_cache_info().hits
+
+    first = parse_release_name(title)
+    first['quality'] = 'mutated'
+    second = parse_release_name(title)
+
+    assert second['quality'] == '1080p'
+    assert parser_cache_info().hits > hits_before
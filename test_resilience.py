@@ -0,0 +1,120 @@
+"""
+Circuit breaker, adaptive concurrency limit and Cloudflare challenge handling tests
+"""
+
+import time
+
+import requests
+
+from conftest import respond
+from services.torrent_index import TorrentIndex
+from services.torrent_providers import ApibayProvider
+from services.torrent_service import TorrentService
+from utils.mirrors import MirrorPool, MirrorError
+from utils.resilience import AdaptiveLimiter, CircuitBreaker, CircuitOpenError, breaker_for
+
+CHALLENGE = '<html><head><title>Just a moment...</title></head><body></body></html>'
+
+def send(url):
+    return requests.get(url, timeout=5)
+
+def test_breaker_opens_after_threshold_and_probes_after_timeout():
+    breaker = CircuitBreaker('host', failure_threshold=3, reset_timeout=0.1)
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.15)
+    # Half-open: one probe goes through, the rest keep failing fast
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker('host', failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.snapshot()['times_opened'] == 2
+
+def test_limiter_increases_additively_and_backs_off_multiplicatively():
+    limiter = AdaptiveLimiter('host', initial=4, max_limit=5, latency_target=1.0)
+
+    assert all(limiter.try_acquire() for _ in range(4))
+    assert not limiter.try_acquire()
+
+    # One round of fast successes raises the limit by about one, capped at max_limit
+    for _ in range(4):
+        limiter.release(0.1, ok=True)
+    assert 4.9 < limiter.limit <= 5
+    for _ in range(8):
+        limiter.try_acquire()
+        limiter.release(0.1, ok=True)
+    assert limiter.limit == 5
+
+    limiter.try_acquire()
+    limiter.release(2.0, ok=True)
+    assert limiter.limit == 2.5
+
+    limiter.try_acquire()
+    limiter.release(0.1, ok=False)
+    assert limiter.limit == 1.25 and limiter.snapshot()['rejected'] == 1
+
+def test_challenge_page_counts_as_failure(stand_in_server):
+    blocked = stand_in_server({'/ping': respond(CHALLENGE, content_type='text/html')})
+    pool = MirrorPool([blocked.url])
+
+    try:
+        pool.fetch('/ping', send)
+        assert False, 'expected MirrorError'
+    except MirrorError as e:
+        assert 'challenge' in str(e)
+
+    assert breaker_for(blocked.url).consecutive_failures == 1
+
+def test_missing_page_does_not_trip_breaker(stand_in_server):
+    server = stand_in_server({})
+    pool = MirrorPool([server.url])
+
+    for _ in range(6):
+        try:
+            pool.fetch('/missing', send)
+        except MirrorError:
+            pass
+
+    assert breaker_for(server.url).state == CircuitBreaker.CLOSED
+
+def test_open_circuit_fails_fast_and_search_uses_index(stand_in_server, tmp_path):
+    upstream = stand_in_server({'/q.php': respond([])})
+    breaker = breaker_for(upstream.url)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    try:
+        MirrorPool([upstream.url]).fetch('/q.php', send)
+        assert False, 'expected CircuitOpenError'
+    except CircuitOpenError:
+        pass
+
+    index = TorrentIndex(str(tmp_path / 'index.db'))
+    index.add([{'title': 'Elephants Dream', 'infohash': '8' * 40, 'seeders': 3}], category='movies')
+    service = TorrentService(providers=[ApibayProvider(base_url=upstream.url)], index=index)
+
+    result = service.search_torrents('elephants')
+    assert result['success'] and result['source'] == 'index'
+
+    popular = service.get_popular_torrents('movies')
+    assert popular['success'] and popular['source'] == 'index'
+    assert upstream.requests == []
+
+    status = service.get_upstream_status()
+    host = upstream.url.split('://', 1)[1]
+    assert status['breakers'][host]['state'] == 'open'
+    assert status['providers']['apibay']['mirrors'][0]['circuit']['rejected'] >= 1
@@ -0,0 +1,112 @@
+"""
+Sparse fieldset tests: fields= on YouTube, media and torrent endpoints, and skipped work for unrequested fields
+"""
+
+import pytest
+
+import services.youtube_service as youtube_module
+from utils.helpers import parse_fields, select_fields, select_result_fields
+
+FORMATS = [
+    {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128},
+    {'format_id': '137', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'none', 'height': 1080},
+]
+
+class FakeYoutubeDL:
+    calls = []
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, target, download=False):
+        FakeYoutubeDL.calls.append(self.opts)
+        entry = {
+            'id': 'abc123', 'title': 'A video', 'duration': 75.0, 'view_count': 10,
+            'description': 'long text ' * 50, 'thumbnails': [{'url': 'https://i.ytimg.com/a.jpg'}],
+            'tags': ['one', 'two'], 'like_count': 3,
+        }
+        if not self.opts.get('extract_flat'):
+            entry['formats'] = FORMATS
+        if target.startswith('ytsearch'):
+            return {'entries': [entry]}
+        return entry
+
+@pytest.fixture
+def client(backend_app, monkeypatch):
+    FakeYoutubeDL.calls = []
+    monkeypatch.setattr(youtube_module.yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+
+    from flask_jwt_extended import create_access_token
+    with backend_app.app.app_context():
+        token = create_access_token(identity='sparse')
+    client = backend_app.app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
+
+def test_parse_and_select_helpers():
+    assert parse_fields(None) is None
+    assert parse_fields(' , ') is None
+    assert parse_fields('id, title,') == {'id', 'title'}
+    assert parse_fields(['id']) == {'id'}
+
+    row = {'id': 1, 'title': 't', 'size': 2}
+    assert select_fields(row, None) is row
+    assert select_fields({'success': True, **row}, {'id'}) == {'success': True, 'id': 1}
+
+    result = {'success': True, 'results': [row], 'count': 1}
+    assert select_result_fields(result, frozenset({'title'})) == {'success': True, 'results': [{'title': 't'}], 'count': 1}
+    assert result['results'][0] is row  # shared cached rows are never modified
+
+def test_search_list_fields_use_flat_extraction(client):
+    response = client.post('/api/youtube/search', json={'query': 'x', 'fields': 'id,title,thumbnail,duration_str'})
+
+    assert response.json['results'] == [
+        {'id': 'abc123', 'title': 'A video', 'thumbnail': 'https://i.ytimg.com/a.jpg', 'duration_str': '01:15'}
+    ]
+    assert FakeYoutubeDL.calls[-1]['extract_flat'] == 'in_playlist'
+
+def test_search_quality_fields_need_full_extraction(client):
+    response = client.post('/api/youtube/search', json={'query': 'x', 'fields': ['id', 'video_qualities']})
+
+    assert response.json['results'] == [{'id': 'abc123', 'video_qualities': ['1080p']}]
+    assert FakeYoutubeDL.calls[-1]['extract_flat'] is False
+
+def test_search_without_fields_is_unchanged(client):
+    result = client.post('/api/youtube/search', json={'query': 'x'}).json['results'][0]
+
+    assert result['audio_qualities'] == ['128kbps']
+    assert result['description'].endswith('...')
+    assert {'like_count', 'channel_url', 'webpage_url'} <= set(result)
+
+def test_info_skips_format_ladder_when_not_requested(client, backend_app, monkeypatch):
+    def fail(formats):
+        raise AssertionError('formats were computed')
+    monkeypatch.setattr(backend_app.youtube_service, '_get_available_formats', fail)
+
+    response = client.post('/api/youtube/info?fields=title,tags', json={'url': 'https://youtu.be/abc123'})
+
+    assert response.json == {'success': True, 'info': {'title': 'A video', 'tags': ['one', 'two']}}
+
+def test_torrent_and_media_results_are_projected(client, backend_app, monkeypatch):
+    rows = [{'name': 'Ubuntu', 'seeders': 5, 'magnet_link': 'magnet:?xt=urn:btih:' + 'a' * 40, 'size': '1 GB'}]
+    monkeypatch.setattr(
+        backend_app.torrent_service, 'search_torrents',
+        lambda query, page=1, local_first=False: {'success': True, 'results': rows, 'count': 1}
+    )
+    monkeypatch.setattr(
+        backend_app.media_service, 'stream_media',
+        lambda data: {'success': True, 'stream_url': 'https://cdn/x', 'title': 'T', 'duration': 5}
+    )
+
+    search = client.post('/api/torrent/search', json={'query': 'ubuntu', 'fields': 'name,seeders'}).json
+    assert search == {'success': True, 'results': [{'name': 'Ubuntu', 'seeders': 5}], 'count': 1}
+    assert 'magnet_link' in rows[0]
+
+    stream = client.post('/api/media/stream', json={'url': 'https://youtu.be/abc123', 'fields': 'stream_url'}).json
+    assert stream == {'success': True, 'stream_url': 'https://cdn/x'}
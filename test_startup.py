@@ -0,0 +1,53 @@
+"""
+Startup stays light: importing the app builds nothing, and services load their heavy modules on first use
+"""
+
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+import bench_startup
+
+LAZY_STARTUP = """
+import sys
+import app as backend
+
+def deferred():
+    return sorted(name for name in sys.modules if name.split('.')[0] in {modules!r})
+
+assert backend._default_app is None
+assert not deferred(), deferred()
+
+instance = backend.create_app()
+assert backend.app is instance
+assert instance.test_client().get('/api/health').status_code == 200
+assert instance.extensions['services'].loaded() == [], instance.extensions['services'].loaded()
+assert not deferred(), deferred()
+
+backend.youtube_service.search_videos
+assert instance.extensions['services'].loaded() == ['youtube']
+assert 'yt_dlp' in sys.modules
+"""
+
+def test_import_and_health_check_skip_heavy_modules(tmp_path):
+    result = subprocess.run(
+        [sys.executable, '-c', LAZY_STARTUP.format(modules=bench_startup.DEFERRED_MODULES)],
+        cwd=tmp_path, env=dict(os.environ, PYTHONPATH=bench_startup.BACKEND),
+        capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+def test_importtime_breakdown_lists_direct_imports(tmp_path):
+    elapsed, modules = bench_startup.import_breakdown(tmp_path)
+    names = {name for name, *_ in bench_startup.direct_imports(modules, 'app')}
+    assert elapsed > 0
+    assert {'flask', 'flask_sqlalchemy'} <= names
+    assert not names & set(bench_startup.DEFERRED_MODULES)
+
+def test_services_are_shared_inside_and_outside_app_context(backend_app):
+    outside = backend_app.auth_service._get_current_object()
+    with backend_app.app.app_context():
+        assert backend_app.auth_service._get_current_object() is outside
+    assert 'auth' in backend_app.app.extensions['services'].loaded()
@@ -0,0 +1,91 @@
+"""
+Token denylist tests: jti revocation, per-user cutoffs, bucketed expiry and the logout endpoints
+"""
+
+import time
+
+from services.token_denylist import TokenDenylist
+
+def claims(jti, sub='juma', iat=None):
+    iat = int(time.time()) if iat is None else iat
+    return {'jti': jti, 'sub': sub, 'iat': iat, 'exp': iat + 3600}
+
+def test_revoked_jti_and_revoke_all_cutoff():
+    denylist = TokenDenylist()
+    now = int(time.time())
+
+    denylist.revoke('a', now + 60)
+    assert denylist.is_revoked(claims('a'))
+    assert not denylist.is_revoked(claims('b'))
+
+    denylist.revoke_all('juma', before=now - 10)
+    assert denylist.is_revoked(claims('old', iat=now - 20))
+    assert denylist.is_revoked(claims('edge', iat=now - 10))
+    assert not denylist.is_revoked(claims('new', iat=now - 5))
+    assert not denylist.is_revoked(claims('other', sub='amina', iat=now - 20))
+
+def test_expired_buckets_are_dropped_whole():
+    denylist = TokenDenylist(bucket_seconds=10)
+    now = int(time.time())
+    denylist.revoke('expired-1', now - 100)
+    denylist.revoke('expired-2', now - 95)
+    denylist.revoke('live', now + 100)
+    # Revoked again with a later expiry: must survive its old bucket being dropped
+    denylist.revoke('extended', now - 100)
+    denylist.revoke('extended', now + 100)
+
+    assert denylist.sweep(now) == 2
+    assert len(denylist) == 2 and len(denylist._buckets) == 1
+    assert denylist.is_revoked(claims('extended'))
+
+def test_sqlite_persistence_survives_restart(tmp_path):
+    db_path = str(tmp_path / 'denylist.db')
+    now = int(time.time())
+    denylist = TokenDenylist(db_path)
+    denylist.revoke('a', now + 60)
+    denylist.revoke('gone', now - 60)
+    denylist.revoke_all('amina', before=now)
+
+    restarted = TokenDenylist(db_path)
+    assert restarted.is_revoked(claims('a'))
+    assert restarted.is_revoked(claims('x', sub='amina', iat=now))
+    assert len(restarted) == 1
+
+def login(client, username):
+    return client.post('/api/auth/login', json={'username': username, 'password': 'secret1'}).json['access_token']
+
+def next_second():
+    time.sleep(1 - time.time() % 1 + 0.01)
+
+def test_logout_and_revoke_all_endpoints(backend_app):
+    client = backend_app.app.test_client()
+    client.post('/api/auth/register', json={
+        'username': 'revoker', 'email': 'revoker@example.com', 'password': 'secret1'
+    })
+
+    def profile_status(token):
+        return client.get('/api/auth/profile', headers={'Authorization': f'Bearer {token}'}).status_code
+
+    first, second = login(client, 'revoker'), login(client, 'revoker')
+    assert client.post('/api/auth/logout', headers={'Authorization': f'Bearer {first}'}).json['success']
+    assert profile_status(first) == 401
+    assert profile_status(second) == 200
+
+    client.post('/api/auth/revoke-all', headers={'Authorization': f'Bearer {second}'})
+    assert profile_status(second) == 401
+
+    next_second()
+    assert profile_status(login(client, 'revoker')) == 200
+
+def test_deactivated_user_loses_access(backend_app):
+    client = backend_app.app.test_client()
+    client.post('/api/auth/register', json={
+        'username': 'leaver', 'email': 'leaver@example.com', 'password': 'secret1'
+    })
+    headers = {'Authorization': f"Bearer {login(client, 'leaver')}"}
+    assert client.get('/api/auth/profile', headers=headers).status_code == 200
+
+    with backend_app.app.app_context():
+        backend_app.auth_service.store.update('leaver', is_active=False)
+    assert client.get('/api/auth/profile', headers=headers).status_code == 401
+    assert client.get('/api/downloads', headers=headers).status_code == 401
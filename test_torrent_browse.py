@@ -0,0 +1,144 @@
+"""
+Server-side sort, filter and cursor pagination tests for TorrentService.browse_torrents
+"""
+
+import pytest
+
+from conftest import respond, x1337_listing
+from services.torrent_providers import X1337Provider
+from services.torrent_service import TorrentService
+from utils.helpers import parse_file_size
+
+PAGES = {
+    1: [('Alpha 1080p', '/torrent/1/a/', '1.4 GB', 10, 1), ('Bravo 720p', '/torrent/2/b/', '700 MB', 90, 1),
+        ('Charlie 2160p', '/torrent/3/c/', '12 GB', 40, 1)],
+    2: [('Delta 1080p', '/torrent/4/d/', '2.1 GB', 70, 1), ('Echo 480p', '/torrent/5/e/', '350 MB', 5, 1)],
+    3: [],
+}
+
+def start_upstream(stand_in_server):
+    return stand_in_server({
+        f'/search/demo/{page}/': respond(x1337_listing(rows)) for page, rows in PAGES.items()
+    })
+
+def make_service(upstream):
+    return TorrentService(providers=[X1337Provider(base_url=upstream.url)])
+
+def test_parse_file_size():
+    assert parse_file_size('1.4 GB') == int(1.4 * 1024 ** 3)
+    assert parse_file_size('700 MB') == 700 * 1024 ** 2
+    assert parse_file_size('Unknown') is None
+
+def test_sort_is_global_across_upstream_pages_and_cursor_pages(stand_in_server):
+    service = make_service(start_upstream(stand_in_server))
+
+    whole = service.browse_torrents('demo', sort='seeders', limit=10)
+    seeders = [t['seeders'] for t in whole['results']]
+    assert seeders == sorted(seeders, reverse=True) == [90, 70, 40, 10, 5]
+    assert whole['pages_scanned'] == 2 and whole['total'] == 5
+
+    first = service.browse_torrents('demo', sort='seeders', limit=2)
+    assert [t['title'] for t in first['results']] == ['Bravo 720p', 'Delta 1080p']
+    assert first['results'][0]['size_bytes'] == 700 * 1024 ** 2
+
+    second = service.browse_torrents('demo', sort='seeders', limit=2, cursor=first['next_cursor'])
+    assert [t['title'] for t in second['results']] == ['Charlie 2160p', 'Alpha 1080p']
+
+    third = service.browse_torrents('demo', sort='seeders', limit=2, cursor=second['next_cursor'])
+    assert [t['title'] for t in third['results']] == ['Echo 480p']
+    assert third['has_more'] is False
+
+def test_filters_and_size_sort(stand_in_server):
+    service = make_service(start_upstream(stand_in_server))
+
+    result = service.browse_torrents(
+        'demo', sort='size', order='asc', limit=10,
+        filters={'min_seeders': 6, 'qualities': ['1080p', '720p', '4K'], 'max_size': '10 GB'}
+    )
+
+    assert [t['title'] for t in result['results']] == ['Bravo 720p', 'Alpha 1080p', 'Delta 1080p']
+
+def test_cursor_fetches_further_upstream_pages_as_it_reaches_them(stand_in_server):
+    upstream = start_upstream(stand_in_server)
+    service = make_service(upstream)
+    service.browse_window_pages = 1
+
+    first = service.browse_torrents('demo', limit=2)
+    assert [t['seeders'] for t in first['results']] == [90, 40]
+    assert first['pages_scanned'] == 1 and first['has_more'] is True
+    assert ('GET', '/search/demo/2/') not in upstream.requests
+
+    # Page 1 runs out, so pages 2 and 3 are read; Delta (70) ranks above the cursor and is skipped, not repeated
+    second = service.browse_torrents('demo', limit=2, cursor=first['next_cursor'])
+    assert [t['seeders'] for t in second['results']] == [10, 5]
+    assert second['pages_scanned'] == 2 and second['has_more'] is False and second['truncated'] is False
+    assert ('GET', '/search/demo/3/') in upstream.requests
+
+def test_reaching_the_page_limit_is_reported_as_truncated(stand_in_server):
+    upstream = start_upstream(stand_in_server)
+    service = make_service(upstream)
+    service.browse_window_pages = service.browse_max_pages = 1
+
+    result = service.browse_torrents('demo', limit=10)
+
+    assert [t['seeders'] for t in result['results']] == [90, 40, 10]
+    assert result['has_more'] is False and result['truncated'] is True
+    assert ('GET', '/search/demo/2/') not in upstream.requests
+
+@pytest.mark.parametrize('options, message', [
+    ({'filters': {'max_size': 'big'}}, 'max_size'),
+    ({'filters': {'min_size': -5}}, 'min_size'),
+    ({'filters': {'min_seeders': 'many'}}, 'min_seeders'),
+    ({'filters': {'min_seeders': -1}}, 'min_seeders'),
+    ({'filters': {'qualities': 1080}}, 'qualities'),
+    ({'filters': {'qualities': ['1080p', None]}}, 'qualities'),
+    ({'limit': 'ten'}, 'limit'),
+    ({'limit': 0}, 'limit'),
+    ({'limit': None}, 'limit'),
+    ({'order': 'up'}, 'order'),
+    ({'sort': 'name'}, 'sort'),
+])
+def test_unparseable_options_are_rejected(stand_in_server, options, message):
+    upstream = start_upstream(stand_in_server)
+    result = make_service(upstream).browse_torrents('demo', **options)
+
+    assert result['success'] is False and result['invalid'] is True
+    assert message in result['error']
+    assert upstream.requests == []
+
+def test_cursor_is_bound_to_its_query_and_sort(stand_in_server):
+    service = make_service(start_upstream(stand_in_server))
+    cursor = service.browse_torrents('demo', limit=1)['next_cursor']
+
+    assert service.browse_torrents('demo', sort='size', cursor=cursor) == {
+        'success': False, 'error': 'Invalid cursor', 'invalid': True
+    }
+    assert service.browse_torrents('demo', cursor='garbage')['error'] == 'Invalid cursor'
+    assert service.browse_torrents('demo', sort='name')['success'] is False
+
+def test_search_route_answers_bad_options_with_400(backend_app):
+    from flask_jwt_extended import create_access_token
+    with backend_app.app.app_context():
+        token = create_access_token(identity='browse-user')
+    client = backend_app.app.test_client()
+
+    for body, message in (({'filters': {'max_size': 'big'}}, 'max_size'), ({'sort': 'size', 'limit': 'ten'}, 'limit')):
+        response = client.post('/api/torrent/search', json={'query': 'demo', **body},
+                               headers={'Authorization': f'Bearer {token}'})
+
+        assert response.status_code == 400
+        assert message in response.json['error']
+
+@pytest.mark.parametrize('sort, order', [('quality', 'desc'), ('size', 'asc')])
+def test_following_cursors_walks_every_row_once(stand_in_server, sort, order):
+    service = make_service(start_upstream(stand_in_server))
+    whole = service.browse_torrents('demo', sort=sort, order=order, limit=10)['results']
+
+    walked, cursor = [], None
+    while True:
+        page = service.browse_torrents('demo', sort=sort, order=order, limit=1, cursor=cursor)
+        walked += page['results']
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert [t['title'] for t in walked] == [t['title'] for t in whole] and len(walked) == 5
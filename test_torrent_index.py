@@ -0,0 +1,128 @@
+"""
+Local torrent index tests: FTS5 search, seeder decay and local-first TorrentService search
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from conftest import respond
+from services.torrent_index import TorrentIndex
+from services.torrent_providers import ApibayProvider
+from services.torrent_service import TorrentService
+
+def row(title, infohash, seeders, size='1.5 GB'):
+    return {
+        'title': title,
+        'infohash': infohash,
+        'magnet_link': f'magnet:?xt=urn:btih:{infohash}',
+        'size': size,
+        'seeders': seeders,
+        'leechers': 1,
+        'quality': '1080p',
+        'provider': 'apibay'
+    }
+
+def test_index_full_text_search_and_upsert(tmp_path):
+    index = TorrentIndex(str(tmp_path / 'index.db'))
+    index.add([
+        row('Big Buck Bunny 1080p', '1' * 40, 10),
+        row('Sintel 2010 1080p', '2' * 40, 50),
+        row('Tears of Steel "Director" Cut', '3' * 40, 5),
+    ])
+
+    assert [r['title'] for r in index.search('1080p')] == ['Sintel 2010 1080p', 'Big Buck Bunny 1080p']
+    assert index.search('bunny')[0]['size_bytes'] == 1610612736
+    # Quotes and FTS operators in user input are taken literally
+    assert index.search('"director" OR')[0:1] == []
+    assert index.search('director')[0]['infohash'] == '3' * 40
+
+    index.add([row('Big Buck Bunny 1080p', '1' * 40, 99)])
+    assert index.count() == 3
+    assert index.search('bunny')[0]['seeders'] == 99
+
+def test_seeders_decay_with_age(tmp_path):
+    index = TorrentIndex(str(tmp_path / 'index.db'), seeder_half_life=3600)
+    index.add([row('Old Release', '4' * 40, 100), row('New Release', '5' * 40, 60)])
+
+    conn = index._connect()
+    with conn:
+        conn.execute('UPDATE torrents SET last_seen = ? WHERE infohash = ?', (time.time() - 7200, '4' * 40))
+
+    results = index.search('release')
+    assert [r['title'] for r in results] == ['New Release', 'Old Release']
+    assert results[1]['seeders'] == 25 and results[1]['seeders_seen'] == 100
+
+def test_decay_uses_the_clock_of_each_query(tmp_path, monkeypatch):
+    index = TorrentIndex(str(tmp_path / 'index.db'), seeder_half_life=3600)
+    index.add([row('Aging Release', '6' * 40, 100)])
+    assert index.search('aging')[0]['seeders'] == 100
+
+    # Same connection, an hour later: the earlier result is not reused
+    later = time.time() + 3600
+    monkeypatch.setattr('services.torrent_index.time', SimpleNamespace(time=lambda: later))
+    assert index.search('aging')[0]['seeders'] == 50
+
+def test_local_first_answers_from_index_and_refreshes(stand_in_server, tmp_path):
+    upstream = stand_in_server({'/q.php': respond([
+        {'id': '1', 'name': 'Sintel 2010', 'info_hash': '6' * 40, 'seeders': '70', 'leechers': '2', 'size': '100'},
+    ])})
+    index = TorrentIndex(str(tmp_path / 'index.db'))
+    index.add([row('Sintel 2010', '6' * 40, 10)])
+    service = TorrentService(providers=[ApibayProvider(base_url=upstream.url)], index=index)
+
+    result = service.search_torrents('sintel', local_first=True)
+
+    assert result['source'] == 'index' and result['results'][0]['seeders'] == 10
+
+    deadline = time.time() + 5
+    while index.search('sintel')[0]['seeders'] != 70 and time.time() < deadline:
+        time.sleep(0.05)
+    assert index.search('sintel')[0]['seeders'] == 70
+
+def test_unreachable_upstream_falls_back_to_index(stand_in_server, tmp_path):
+    upstream = stand_in_server({'/q.php': respond('down', status=503, content_type='text/plain')})
+    index = TorrentIndex(str(tmp_path / 'index.db'))
+    index.add([row('Cosmos Laundromat', '7' * 40, 12)])
+    service = TorrentService(providers=[ApibayProvider(base_url=upstream.url)], index=index)
+
+    result = service.search_torrents('cosmos')
+
+    assert result['success'] and result['source'] == 'index'
+    assert result['results'][0]['infohash'] == '7' * 40
+
+def test_popular_row_moves_onto_its_infohash(tmp_path):
+    index = TorrentIndex(str(tmp_path / 'index.db'))
+    detail_url = 'https://www.1337x.to/torrent/1/sintel/'
+    listed = {'title': 'Sintel 2010', 'detail_url': detail_url, 'seeders': 40, 'leechers': 1, 'provider': '1337x'}
+    index.add([listed], category='movies')
+
+    # A search later scrapes the detail page and learns the magnet
+    index.add([dict(row('Sintel 2010', '8' * 40, 45), detail_url=detail_url, provider='1337x')])
+    assert index.count() == 1
+    assert index.popular('movies')[0]['infohash'] == '8' * 40
+
+    # Further listings without a magnet update the same row
+    index.add([dict(listed, seeders=60)], category='movies')
+    assert index.count() == 1
+    assert index.popular('movies')[0]['seeders'] == 60
+
+def test_service_prunes_stale_rows_once_per_interval(tmp_path):
+    index = TorrentIndex(str(tmp_path / 'index.db'))
+    index.add([row('Old Release', '4' * 40, 100)])
+    conn = index._connect()
+    with conn:
+        conn.execute('UPDATE torrents SET last_seen = ?', (time.time() - 7200,))
+    service = TorrentService(providers=[], index=index, index_max_age=3600)
+
+    service._index_results([row('New Release', '5' * 40, 10)])
+    service._background.shutdown(wait=True)
+    assert [r['title'] for r in index.search('release')] == ['New Release']
+
+    # The next prune is not due for an hour
+    service._background = ThreadPoolExecutor(max_workers=1)
+    with conn:
+        conn.execute('UPDATE torrents SET last_seen = ?', (time.time() - 7200,))
+    service._index_results([row('Another Release', '6' * 40, 10)])
+    service._background.shutdown(wait=True)
+    assert index.count() == 2
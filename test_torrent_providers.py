@@ -0,0 +1,89 @@
+"""
+Federated torrent search tests against local stand-in servers, one per provider
+"""
+
+from conftest import respond, x1337_listing, x1337_detail
+from services.torrent_providers import X1337Provider, ApibayProvider
+from services.torrent_service import TorrentService
+from utils.helpers import extract_infohash
+
+SHARED_HASH = 'a' * 40
+ONLY_1337X_HASH = 'b' * 40
+ONLY_APIBAY_HASH = 'c' * 40
+
+def start_1337x(stand_in_server, delay=0):
+    routes = {
+        '/search/ubuntu/1/': respond(x1337_listing([
+            ('Ubuntu 24.04 Desktop', '/torrent/1/ubuntu-desktop/', '5.7 GB', 120, 4),
+            ('Ubuntu 24.04 Server', '/torrent/2/ubuntu-server/', '2.6 GB', 40, 2),
+        ]), delay=delay),
+        '/torrent/1/ubuntu-desktop/': respond(x1337_detail(f'magnet:?xt=urn:btih:{SHARED_HASH}&dn=desktop')),
+        '/torrent/2/ubuntu-server/': respond(x1337_detail(f'magnet:?xt=urn:btih:{ONLY_1337X_HASH}&dn=server')),
+    }
+    return stand_in_server(routes)
+
+def start_apibay(stand_in_server, delay=0):
+    routes = {
+        '/q.php': respond([
+            {'id': '10', 'name': 'Ubuntu 24.04 Desktop', 'info_hash': SHARED_HASH.upper(),
+             'seeders': '300', 'leechers': '9', 'size': '6120000000'},
+            {'id': '11', 'name': 'Ubuntu Budgie 24.04', 'info_hash': ONLY_APIBAY_HASH,
+             'seeders': '15', 'leechers': '1', 'size': '3900000000'},
+        ], delay=delay),
+    }
+    return stand_in_server(routes)
+
+def make_service(x1337, apibay, deadline=5):
+    return TorrentService(
+        providers=[X1337Provider(base_url=x1337.url), ApibayProvider(base_url=apibay.url)],
+        search_deadline=deadline
+    )
+
+def test_extract_infohash_hex_and_base32():
+    assert extract_infohash(f'magnet:?xt=urn:btih:{SHARED_HASH.upper()}&dn=x') == SHARED_HASH
+    assert extract_infohash('magnet:?xt=urn:btih:' + 'A' * 32) == '00' * 20
+    assert extract_infohash('magnet:?dn=missing-hash') is None
+    assert extract_infohash(None) is None
+
+def test_federated_search_merges_and_dedupes_by_infohash(stand_in_server):
+    service = make_service(start_1337x(stand_in_server), start_apibay(stand_in_server))
+
+    result = service.search_torrents('ubuntu')
+
+    assert result['success'] and not result['partial']
+    assert result['providers']['1337x'] == {'success': True, 'count': 2}
+    assert result['providers']['apibay'] == {'success': True, 'count': 2}
+
+    by_hash = {t['infohash']: t for t in result['results']}
+    assert set(by_hash) == {SHARED_HASH, ONLY_1337X_HASH, ONLY_APIBAY_HASH}
+    assert sorted(by_hash[SHARED_HASH]['sources']) == ['1337x', 'apibay']
+    assert by_hash[SHARED_HASH]['seeders'] == 300
+    assert [t['seeders'] for t in result['results']] == [300, 40, 15]
+
+def test_federated_search_returns_partial_results_at_deadline(stand_in_server):
+    service = make_service(start_1337x(stand_in_server), start_apibay(stand_in_server, delay=2), deadline=0.5)
+
+    result = service.search_torrents('ubuntu')
+
+    assert result['success'] and result['partial']
+    assert result['providers']['apibay'] == {'success': False, 'error': 'Deadline exceeded'}
+    assert {t['provider'] for t in result['results']} == {'1337x'}
+
+def test_failing_provider_does_not_sink_search(stand_in_server):
+    apibay = stand_in_server({'/q.php': respond('boom', status=500, content_type='text/plain')})
+    service = make_service(start_1337x(stand_in_server), apibay)
+
+    result = service.search_torrents('ubuntu')
+
+    assert result['success'] and result['count'] == 2
+    assert result['providers']['apibay']['success'] is False
+
+def test_disabled_provider_is_skipped(stand_in_server):
+    apibay = start_apibay(stand_in_server)
+    service = make_service(start_1337x(stand_in_server), apibay)
+    service.providers[1].enabled = False
+
+    result = service.search_torrents('ubuntu')
+
+    assert 'apibay' not in result['providers']
+    assert apibay.requests == []
@@ -0,0 +1,124 @@
+"""
+User store tests: indexed SQLite store, JSON migration and AuthService on either backend
+"""
+
+import json
+import os
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager
+
+from services.auth_service import AuthService
+from services.user_store import JsonUserStore, SQLiteUserStore, UserExistsError
+from utils.passwords import PasswordHasher
+
+def legacy_user(username, email, password_hash='0' * 64):
+    return {
+        'username': username,
+        'email': email,
+        'password_hash': password_hash,
+        'created_at': '2025-09-16T20:07:38.427748',
+        'last_login': None,
+        'is_active': True,
+        'profile': {'full_name': username, 'avatar': None, 'preferences': {'default_quality': '720p'}}
+    }
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-at-least-32-bytes'
+    JWTManager(app)
+    with app.app_context():
+        yield
+
+def test_unique_username_and_email(tmp_path):
+    store = SQLiteUserStore(str(tmp_path / 'users.db'))
+    store.create(legacy_user('amina', 'amina@example.com'))
+
+    with pytest.raises(UserExistsError) as e:
+        store.create(legacy_user('amina', 'other@example.com'))
+    assert e.value.field == 'Username'
+
+    with pytest.raises(UserExistsError) as e:
+        store.create(legacy_user('other', 'amina@example.com'))
+    assert e.value.field == 'Email'
+
+    assert store.email_exists('amina@example.com') and store.count() == 1
+
+def test_json_file_is_migrated_once(tmp_path):
+    users_file = tmp_path / 'users_data.json'
+    users_file.write_text(json.dumps({
+        'juma': legacy_user('juma', 'juma@example.com'),
+        'amina': legacy_user('amina', 'amina@example.com'),
+    }))
+    db_path = str(tmp_path / 'users.db')
+
+    store = SQLiteUserStore(db_path, migrate_from=str(users_file))
+    assert store.count() == 2
+    assert store.get('juma')['profile']['preferences'] == {'default_quality': '720p'}
+    assert store.get('juma')['is_active'] is True
+
+    # Users added to the JSON file later are not imported again
+    users_file.write_text(json.dumps({'late': legacy_user('late', 'late@example.com')}))
+    assert SQLiteUserStore(db_path, migrate_from=str(users_file)).count() == 2
+
+@pytest.mark.parametrize('backend', ['sqlite', 'json'])
+def test_auth_flow_on_each_backend(tmp_path, app_context, backend):
+    if backend == 'sqlite':
+        store = SQLiteUserStore(str(tmp_path / 'users.db'))
+    else:
+        store = JsonUserStore(str(tmp_path / 'users_data.json'))
+    auth = AuthService(store=store, hasher=PasswordHasher(cost=1024, workers=0))
+
+    registered = auth.register_user({'username': 'juma', 'email': 'juma@example.com', 'password': 'secret1'})
+    assert registered['success'] and registered['access_token']
+
+    duplicate = auth.register_user({'username': 'juma2', 'email': 'juma@example.com', 'password': 'secret1'})
+    assert duplicate == {'success': False, 'error': 'Email already registered'}
+
+    assert not auth.login_user({'username': 'juma', 'password': 'wrong-password'})['success']
+    login = auth.login_user({'username': 'juma', 'password': 'secret1'})
+    assert login['success']
+    # Buffered until the flush, but visible through the service straight away
+    assert auth.get_user_profile('juma')['user']['last_login'] == login['user']['last_login']
+    auth.flush_logins()
+    assert store.get('juma')['last_login'] == login['user']['last_login']
+
+    auth.update_user_profile('juma', {'full_name': 'Juma M'})
+    assert auth.get_user_profile('juma')['user']['profile']['full_name'] == 'Juma M'
+
+def test_last_login_updates_coalesce_into_one_flush(tmp_path, app_context):
+    store = SQLiteUserStore(str(tmp_path / 'users.db'))
+    auth = AuthService(store=store, flush_interval=3600, hasher=PasswordHasher(cost=1024, workers=0))
+    for name in ('juma', 'amina'):
+        auth.register_user({'username': name, 'email': f'{name}@example.com', 'password': 'secret1'})
+
+    flushed = []
+    original = store.record_logins
+    store.record_logins = lambda logins: flushed.append(dict(logins)) or original(logins)
+
+    for name in ('juma', 'amina', 'juma', 'juma'):
+        last = auth.login_user({'username': name, 'password': 'secret1'})['user']['last_login']
+
+    assert store.get('juma')['last_login'] is None
+    auth.close()
+    assert len(flushed) == 1 and sorted(flushed[0]) == ['amina', 'juma']
+    assert store.get('juma')['last_login'] == last
+    assert auth.flush_logins() == 0
+
+def test_json_store_write_is_atomic(tmp_path, monkeypatch):
+    users_file = tmp_path / 'users_data.json'
+    store = JsonUserStore(str(users_file))
+    store.create(legacy_user('juma', 'juma@example.com'))
+    before = users_file.read_text()
+
+    def crash(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(json, 'dump', crash)
+    with pytest.raises(OSError):
+        store.create(legacy_user('amina', 'amina@example.com'))
+
+    assert users_file.read_text() == before
+    assert os.listdir(tmp_path) == ['users_data.json']